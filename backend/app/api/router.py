@@ -1,175 +1,617 @@
 import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.utils import (
-    cleanup_conversation,
+    answer_chat_turn,
+    build_conversation,
+    check_conversation_owner,
     create_title,
-    get_and_save_ai_response,
-    save_conversation,
-    save_message,
+    decode_cursor,
+    encode_cursor,
+    get_conversation_history,
+    paginate,
+    queue_chat_turn,
+    stream_and_save_ai_response,
+    validate_message_content,
+    wait_for_turn,
+)
+from app.api.websocket import ConversationChannel
+from app.config.config import settings
+from app.core.dependencies import (
+    get_async_session,
+    get_current_user_id,
+    get_langchain_service,
+    get_session_factory,
+    get_turn_queue,
+    resolve_user_id,
+)
+from app.core.metrics import time_stage
+from app.core.models import (
+    ChatTurnPublic,
+    Conversation,
+    ConversationCreate,
+    ConversationPublic,
+    ConversationSummary,
+    ConversationSync,
+    MessageCreate,
+    MessagePublic,
+    MessageSync,
+    Token,
+    UserPublic,
 )
-from app.core.dependencies import get_langchain_service, get_session
-from app.core.models import ConversationPublic, MessageCreate, MessageRole, UserPublic
-from app.db.crud import (
-    check_conversation_exists,
-    check_user_exists,
+from app.core.security import (
+    create_access_token,
+    token_cache,
+    verify_password_async,
+)
+from app.db import async_crud
+from app.db.async_crud import (
     get_conversation_by_id,
     get_conversations_by_user_id,
+    get_conversations_updated_since,
+    get_message_page,
+    get_message_position,
+    get_messages_after,
+)
+from app.db.lookup_cache import (
     get_user_name,
+    lookup_cache_stats,
 )
+from app.db.pool import pool_stats
 from app.services.llm import LangchainService
+from app.services.turn_queue import TurnQueue
 
 router = APIRouter(prefix="/v1", tags=["agent"])
 
 logger = logging.getLogger(__name__)
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Long polls end before common load balancer idle timeouts of 60 seconds
+MAX_TURN_WAIT_SECONDS = 30
+
 
 @router.post("/new", response_model=ConversationPublic)
 async def start_conversation(
     query: MessageCreate,
-    user_id: UUID = Query(...),
-    db: Session = Depends(get_session),
+    user_id: UUID = Depends(get_current_user_id),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
     langchain_service: LangchainService = Depends(get_langchain_service),
 ):
     """Start a new conversation with the AI.
 
+    The conversation and both messages of the first turn are saved in a single
+    transaction once the AI has responded, so a failed response leaves nothing
+    behind. A duplicate request sent while the first one is answered gets the
+    same conversation.
+
     Args:
         query (MessageCreate): The message to send to the AI.
-        user_id (UUID): The ID of the user.
-        db (Session): The SQLModel session.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn.
         langchain_service (LangchainService): The Langchain service instance.
 
     Returns:
         ConversationPublic: The created conversation object.
     """
-    if not check_user_exists(session=db, user_id=user_id):
-        raise HTTPException(status_code=404, detail="User not found")
+    validate_message_content(query.content)
+    langchain_service.check_capacity()
 
-    new_conversation = save_conversation(
-        db=db, user_id=user_id, title=create_title(query.content)
-    )
-
-    user_message = save_message(
-        db=db,
+    new_conversation = build_conversation(user_id, query.content)
+    new_conversation, messages = await answer_chat_turn(
         conversation_id=new_conversation.id,
-        content=query.content,
-        role=MessageRole.user,
-        message_data=None,
+        user_content=query.content,
+        service=langchain_service,
+        session_factory=session_factory,
+        conversation=new_conversation,
     )
 
-    try:
-        await get_and_save_ai_response(
-            conversation_id=str(new_conversation.id),
-            user_content=user_message.content,
-            service=langchain_service,
-            db=db,
+    logger.info(f"Created new conversation with ID: {new_conversation.id}")
+    with time_stage("response_serialization"):
+        return ConversationPublic(**new_conversation.model_dump(), messages=messages)
+
+
+@router.post("/conversations", response_model=ConversationPublic)
+async def continue_conversation(  # noqa: PLR0913, PLR0917
+    query: MessageCreate,
+    conversation_id: UUID = Query(...),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+    langchain_service: LangchainService = Depends(get_langchain_service),
+):
+    """Continue an existing conversation of the user by conversation ID.
+
+    Both messages of the turn are saved in a single transaction. The response
+    carries the conversation with only the new user and assistant messages;
+    earlier messages are available from GET /v1/messages. A duplicate request
+    sent while the first one is answered gets the same messages.
+
+    Args:
+        query (MessageCreate): The message to send to the AI.
+        conversation_id (UUID): The ID of the conversation.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn.
+        langchain_service (LangchainService): The Langchain service instance.
+
+    Returns:
+        ConversationPublic: The updated conversation object.
+    """
+    with time_stage("ownership_check"):
+        conversation = await get_conversation_by_id(
+            session=db, conversation_id=conversation_id
         )
-    except HTTPException as e:
-        cleanup_conversation(db=db, conversation_id=new_conversation.id)
-        raise e
+    if not conversation or conversation.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    validate_message_content(query.content)
+    langchain_service.check_capacity()
 
-    # Return the newly created conversation with the messages
-    conversation = get_conversation_by_id(
-        session=db, conversation_id=new_conversation.id
+    history = await get_conversation_history(db=db, conversation_id=conversation_id)
+    _, messages = await answer_chat_turn(
+        conversation_id=conversation_id,
+        user_content=query.content,
+        service=langchain_service,
+        session_factory=session_factory,
+        history=history,
     )
 
-    if not conversation:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    logger.info(f"Continued conversation with ID: {conversation.id}")
+    with time_stage("response_serialization"):
+        return ConversationPublic(**conversation.model_dump(), messages=messages)
 
-    logger.info(f"Retrieved conversation with ID: {conversation.id} and messages")
-    return conversation
 
+@router.post("/new/stream")
+async def start_conversation_stream(
+    query: MessageCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+    langchain_service: LangchainService = Depends(get_langchain_service),
+) -> StreamingResponse:
+    """Start a new conversation with the AI and stream the response.
 
-@router.post("/conversations", response_model=ConversationPublic)
-async def continue_conversation(
+    The response is a server-sent event stream. The first "conversation" event
+    carries the new conversation, followed by "token" events as the model
+    generates and a "message" event for each saved message of the turn. The
+    conversation is only saved once the response is complete.
+
+    Args:
+        query (MessageCreate): The message to send to the AI.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn.
+        langchain_service (LangchainService): The Langchain service instance.
+
+    Returns:
+        StreamingResponse: The server-sent event stream.
+    """
+    validate_message_content(query.content)
+    langchain_service.check_capacity()
+
+    new_conversation = build_conversation(user_id, query.content)
+    return StreamingResponse(
+        stream_and_save_ai_response(
+            conversation_id=new_conversation.id,
+            user_content=query.content,
+            service=langchain_service,
+            session_factory=session_factory,
+            conversation=new_conversation,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/conversations/stream")
+async def continue_conversation_stream(  # noqa: PLR0913, PLR0917
     query: MessageCreate,
     conversation_id: UUID = Query(...),
-    db: Session = Depends(get_session),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
     langchain_service: LangchainService = Depends(get_langchain_service),
-):
-    """Continue an existing conversation by conversation ID.
+) -> StreamingResponse:
+    """Continue an existing conversation and stream the response.
+
+    The response is a server-sent event stream of "token" events followed by a
+    "message" event for each saved message of the turn. A duplicate request
+    sent while the first one streams only gets the message events.
 
     Args:
         query (MessageCreate): The message to send to the AI.
         conversation_id (UUID): The ID of the conversation.
-        db (Session): The SQLModel session.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn.
         langchain_service (LangchainService): The Langchain service instance.
 
     Returns:
-        ConversationPublic: The updated conversation object.
+        StreamingResponse: The server-sent event stream.
     """
-    if not check_conversation_exists(session=db, conversation_id=conversation_id):
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    with time_stage("ownership_check"):
+        await check_conversation_owner(db, conversation_id, user_id)
+    validate_message_content(query.content)
+    langchain_service.check_capacity()
+
+    history = await get_conversation_history(db=db, conversation_id=conversation_id)
+    return StreamingResponse(
+        stream_and_save_ai_response(
+            conversation_id=conversation_id,
+            user_content=query.content,
+            service=langchain_service,
+            session_factory=session_factory,
+            history=history,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 
-    user_message = save_message(
+@router.post("/conversations/async", response_model=ChatTurnPublic, status_code=202)
+async def queue_conversation_turn(  # noqa: PLR0913, PLR0917
+    query: MessageCreate,
+    response: Response,
+    conversation_id: UUID = Query(...),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    turn_queue: TurnQueue = Depends(get_turn_queue),
+):
+    """Continue an existing conversation with the AI response generated in the
+    background.
+
+    The user message is saved and the turn queued before returning 202
+    Accepted, so the request does not wait for the model. Poll the turn from
+    the URL in the Location header until its status is "completed", when its
+    messages include the AI response, or "failed". A conversation has at most
+    one turn in progress.
+
+    Args:
+        query (MessageCreate): The message to send to the AI.
+        response (Response): The response, to set the Location header on.
+        conversation_id (UUID): The ID of the conversation.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+        turn_queue (TurnQueue): The queue running the turns.
+
+    Returns:
+        ChatTurnPublic: The pending turn with its user message.
+    """
+    with time_stage("ownership_check"):
+        await check_conversation_owner(db, conversation_id, user_id)
+    validate_message_content(query.content)
+    turn_queue.check_capacity()
+
+    turn, user_message = await queue_chat_turn(
         db=db,
         conversation_id=conversation_id,
-        content=query.content,
-        role=MessageRole.user,
-        message_data=None,
+        user_content=query.content,
+        # Turns of the in-process queue are lost when their worker stops
+        stale_after=None if turn_queue.shared else settings.TURN_STALE_SECONDS,
     )
+    turn_queue.enqueue(turn.id)
 
+    response.headers["Location"] = f"{router.prefix}/turns/{turn.id}"
+    return ChatTurnPublic(
+        **turn.model_dump(), messages=[MessagePublic.model_validate(user_message)]
+    )
+
+
+@router.get("/turns/{turn_id}", response_model=ChatTurnPublic)
+async def get_turn(
+    turn_id: UUID,
+    wait: float = Query(0, ge=0, le=MAX_TURN_WAIT_SECONDS),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    turn_queue: TurnQueue = Depends(get_turn_queue),
+):
+    """Get a chat turn queued by POST /v1/conversations/async.
+
+    With ``wait`` the request long-polls: it returns as soon as the turn is
+    finished, or with the turn still in progress after ``wait`` seconds.
+
+    Args:
+        turn_id (UUID): The ID of the turn.
+        wait (float): The maximum number of seconds to wait for the turn to
+            finish.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+        turn_queue (TurnQueue): The queue running the turns.
+
+    Returns:
+        ChatTurnPublic: The turn with its messages.
+    """
+    turn = await wait_for_turn(db=db, turn_id=turn_id, turn_queue=turn_queue, wait=wait)
+    if turn is None:
+        raise HTTPException(status_code=404, detail="Turn not found")
     try:
-        await get_and_save_ai_response(
-            conversation_id=str(conversation_id),
-            user_content=user_message.content,
-            service=langchain_service,
-            db=db,
-        )
+        await check_conversation_owner(db, turn.conversation_id, user_id)
     except HTTPException as e:
-        raise e
+        raise HTTPException(status_code=404, detail="Turn not found") from e
+    return turn
 
-    conversation = get_conversation_by_id(session=db, conversation_id=conversation_id)
 
-    if not conversation:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+@router.websocket("/ws")
+async def conversation_channel(  # noqa: PLR0913, PLR0917
+    websocket: WebSocket,
+    user_id: UUID | None = Query(None),
+    token: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_session),
+    session_factory: Callable[[], AsyncSession] = Depends(get_session_factory),
+    langchain_service: LangchainService = Depends(get_langchain_service),
+):
+    """Open a conversation channel carrying the user's turns over one socket.
 
-    logger.info(f"Retrieved conversation with ID: {conversation.id} and messages")
-    return conversation
+    Browsers cannot set headers on a WebSocket, so the access token is passed
+    as the token query parameter, or user_id as on the other endpoints. The
+    socket is closed with code 1008 when neither identifies a user. See
+    app.api.websocket for the frames exchanged.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection.
+        user_id (Optional[UUID]): The ID of the user, without a token.
+        token (Optional[str]): An access token from POST /v1/token.
+        db (AsyncSession): The async SQLModel session, to authenticate.
+        session_factory (Callable[[], AsyncSession]): Opens a session per turn.
+        langchain_service (LangchainService): The Langchain service instance.
+    """
+    try:
+        user_id = await resolve_user_id(user_id=user_id, token=token, session=db)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    await db.close()  # Turns open their own sessions
+
+    await websocket.accept()
+    channel = ConversationChannel(
+        websocket,
+        user_id,
+        langchain_service,
+        session_factory,
+        max_turns=settings.WS_MAX_TURNS_PER_CONNECTION,
+    )
+    await channel.serve()
 
 
-@router.get("/conversations", response_model=list[ConversationPublic])
+@router.get("/conversations", response_model=list[ConversationSummary])
 async def get_conversations(
-    user_id: UUID = Query(...), db: Session = Depends(get_session)
+    response: Response,
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_session),
 ):
-    """Get all conversations for a user by user ID.
+    """Get a page of a user's conversations, newest first, without their messages.
+
+    When more conversations exist, the cursor for the next page is returned in
+    the X-Next-Cursor header.
 
     Args:
-        user_id (UUID): The ID of the user.
-        db (Session): The SQLModel session.
+        response (Response): The response, to set the next page cursor on.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        limit (int): The maximum number of conversations to return.
+        cursor (Optional[str]): The cursor of the page to return.
+        db (AsyncSession): The async SQLModel session.
 
     Returns:
-        List[ConversationPublic]: A list of conversations for the user.
+        List[ConversationSummary]: A page of conversations for the user.
     """
-    if not check_user_exists(session=db, user_id=user_id):
-        raise HTTPException(status_code=404, detail="User not found")
+    before = decode_cursor(cursor) if cursor else None
 
-    conversations = get_conversations_by_user_id(session=db, user_id=user_id)
+    conversations = await get_conversations_by_user_id(
+        session=db, user_id=user_id, limit=limit + 1, before=before
+    )
 
-    if not conversations:
+    if not conversations and before is None:
         raise HTTPException(status_code=404, detail="No conversations found")
 
+    conversations = paginate(response, conversations, limit)
     logger.info(f"Retrieved {len(conversations)} conversations for user ID: {user_id}")
     return conversations
 
 
+@router.get("/messages", response_model=list[MessagePublic])
+async def get_messages(  # noqa: PLR0913, PLR0917
+    response: Response,
+    conversation_id: UUID = Query(...),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Get a page of the messages of a conversation of the user, newest first.
+
+    When older messages exist, the cursor for the next page is returned in the
+    X-Next-Cursor header.
+
+    Args:
+        response (Response): The response, to set the next page cursor on.
+        conversation_id (UUID): The ID of the conversation.
+        limit (int): The maximum number of messages to return.
+        cursor (Optional[str]): The cursor of the page to return.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+
+    Returns:
+        List[MessagePublic]: A page of messages of the conversation.
+    """
+    before = decode_cursor(cursor) if cursor else None
+    await check_conversation_owner(db, conversation_id, user_id)
+
+    messages = await get_message_page(
+        session=db, conversation_id=conversation_id, limit=limit + 1, before=before
+    )
+
+    messages = paginate(response, messages, limit)
+    logger.info(
+        f"Retrieved {len(messages)} messages for conversation ID: {conversation_id}"
+    )
+    return messages
+
+
+@router.get("/sync/messages", response_model=MessageSync)
+async def sync_messages(
+    conversation_id: UUID = Query(...),
+    after_id: UUID | None = Query(None),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Get the messages of a conversation of the user created after a given
+    message.
+
+    Clients poll with the ID of the last message they have, so each poll only
+    reads the new messages. Without after_id the conversation is read from its
+    first message. When has_more is set, poll again right away with the last
+    returned message.
+
+    Args:
+        conversation_id (UUID): The ID of the conversation.
+        after_id (Optional[UUID]): The ID of the last message the client has.
+        limit (int): The maximum number of messages to return.
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        db (AsyncSession): The async SQLModel session.
+
+    Returns:
+        MessageSync: The new messages, oldest first.
+    """
+    await check_conversation_owner(db, conversation_id, user_id)
+
+    after = None
+    if after_id is not None:
+        after = await get_message_position(
+            session=db, conversation_id=conversation_id, message_id=after_id
+        )
+        if after is None:
+            raise HTTPException(status_code=404, detail="Message not found")
+
+    messages = await get_messages_after(
+        session=db, conversation_id=conversation_id, limit=limit + 1, after=after
+    )
+    return MessageSync(messages=messages[:limit], has_more=len(messages) > limit)
+
+
+@router.get("/sync/conversations", response_model=ConversationSync)
+async def sync_conversations(
+    user_id: UUID = Depends(get_current_user_id),
+    cursor: str | None = Query(None),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Get a user's conversations updated since a sync cursor.
+
+    Without a cursor every conversation is returned. The response cursor is
+    passed back on the next poll to only get the conversations updated since.
+    Updates from the last SYNC_SAFETY_WINDOW_SECONDS are left for a later poll,
+    so that an update committed late, with an earlier updated_at than the
+    cursor, is not skipped.
+
+    Args:
+        user_id (UUID): The ID of the user, from the access token or the
+            user_id query parameter.
+        cursor (Optional[str]): The cursor returned by the previous sync.
+        limit (int): The maximum number of conversations to return.
+        db (AsyncSession): The async SQLModel session.
+
+    Returns:
+        ConversationSync: The updated conversations, oldest update first.
+    """
+    since = decode_cursor(cursor) if cursor else None
+
+    conversations = await get_conversations_updated_since(
+        session=db,
+        user_id=user_id,
+        limit=limit + 1,
+        since=since,
+        until=datetime.utcnow()
+        - timedelta(seconds=settings.SYNC_SAFETY_WINDOW_SECONDS),
+    )
+    page = conversations[:limit]
+    if page:
+        cursor = encode_cursor(page[-1].updated_at, page[-1].id)
+    return ConversationSync(
+        conversations=page, cursor=cursor, has_more=len(conversations) > limit
+    )
+
+
+@router.post("/token", response_model=Token)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Issue an access token for a username and password.
+
+    The token is sent as "Authorization: Bearer <token>" instead of the user_id
+    query parameter, and is verified without a database query. The password
+    hash is always read from the database, never from the lookup cache.
+
+    Args:
+        form_data (OAuth2PasswordRequestForm): The username and password.
+        db (AsyncSession): The async SQLModel session.
+
+    Returns:
+        Token: The access token and its lifetime in seconds.
+    """
+    user = await async_crud.get_user_name(session=db, user_name=form_data.username)
+    if not user or not await verify_password_async(
+        form_data.password, user.password_hash
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    logger.info(f"Issued access token for user: {user.username}")
+    return Token(
+        access_token=create_access_token(user.id),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
 @router.get("/name", response_model=UserPublic)
 async def get_user_by_name(
-    user_name: str = Query(...), db: Session = Depends(get_session)
+    user_name: str = Query(...), db: AsyncSession = Depends(get_async_session)
 ):
     """Get a user by their username.
 
     Args:
         user_name (str): The username of the user.
-        db (Session): The SQLModel session.
+        db (AsyncSession): The async SQLModel session.
 
     Returns:
         User: The user object if found, otherwise raises HTTPException.
     """
-    user = get_user_name(session=db, user_name=user_name)
+    user = await get_user_name(session=db, user_name=user_name)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -178,6 +620,47 @@ async def get_user_by_name(
     return user
 
 
+@router.get("/metrics")
+async def get_metrics(
+    langchain_service: LangchainService = Depends(get_langchain_service),
+    turn_queue: TurnQueue = Depends(get_turn_queue),
+):
+    """Get runtime metrics of this worker.
+
+    Args:
+        langchain_service (LangchainService): The Langchain service instance.
+        turn_queue (TurnQueue): The queue running background chat turns.
+
+    Returns:
+        dict: Token usage reported by the model, including the prompt cache
+        read and write tokens, and the hit and miss counters of the user and
+        conversation lookup caches, of the verified token cache and of the
+        first-turn response cache (None when disabled), the admission,
+        throttling and retry counters of the model scheduler, and how many
+        duplicate turns were coalesced and how often a turn waited for another
+        turn of its conversation, the state of the background turn queue, and
+        the usage of the database pool (None when it is not open), including the
+        requests waiting for a connection and the time they waited.
+    """
+    return {
+        "llm_tokens": langchain_service.token_usage.as_dict(),
+        "llm_scheduler": langchain_service.model_scheduler.as_dict(),
+        "turn_coalescing": {
+            **langchain_service.turn_coalescer.stats(),
+            "thread_locks": langchain_service.thread_locks.stats(),
+        },
+        "response_cache": (
+            langchain_service.response_cache.stats()
+            if langchain_service.response_cache is not None
+            else None
+        ),
+        "turn_queue": turn_queue.stats(),
+        "lookup_cache": lookup_cache_stats(),
+        "token_cache": token_cache.stats(),
+        "database_pool": pool_stats(),
+    }
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint.
@@ -1,86 +1,149 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
 import logging
+import math
+from collections.abc import AsyncIterator, Callable, Hashable, Sequence
+from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID
 
-from fastapi import HTTPException
-from sqlmodel import Session
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    message_chunk_to_message,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.config.config import settings
+from app.core.metrics import time_stage
 from app.core.models import (
+    ChatTurn,
+    ChatTurnPublic,
     Conversation,
     ConversationCreate,
+    ConversationPublic,
     Message,
     MessageCreate,
+    MessagePublic,
     MessageRole,
+    TurnStatus,
+)
+from app.db.async_crud import (
+    claim_chat_turn,
+    complete_chat_turn,
+    create_chat_turn,
+    create_conversation,
+    create_message,
+    create_pending_turn,
+    fail_chat_turn,
+    fail_stale_chat_turns,
+    get_chat_turn,
+    get_messages_by_conversation_id,
+    get_turn_messages,
 )
-from app.db.crud import create_conversation, create_message
-from app.services.llm import LangchainService
+from app.db.lookup_cache import get_conversation_owner
+from app.services.llm import LangchainService, ServiceOverloadedError
+from app.services.turn_queue import TurnQueue, worker_id
 
 logger = logging.getLogger(__name__)
 
+FINISHED_TURN_STATUSES = {TurnStatus.completed, TurnStatus.failed}
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
-def save_conversation(db: Session, user_id: UUID, title: str | None) -> Conversation:
+async def check_conversation_owner(
+    db: AsyncSession, conversation_id: UUID, user_id: UUID
+) -> None:
     """
-    Create the conversation object and save it to the database
+    Check that a conversation exists and belongs to a user.
+
+    Conversations of other users are reported as not found, like missing ones.
 
     Args:
-        db (Session): The SQLModel session.
-        user_id (UUID): The ID of the user.
-        title (Optional[str]): The title of the conversation.
+        db (AsyncSession): The async SQLModel session.
+        conversation_id (UUID): The ID of the conversation.
+        user_id (UUID): The ID of the user making the request.
 
-    Returns:
-        Conversation: The saved conversation object.
+    Raises:
+        HTTPException: 404 when the conversation is missing or not the user's.
     """
+    owner = await get_conversation_owner(session=db, conversation_id=conversation_id)
+    if owner != user_id:
+        raise HTTPException(status_code=404, detail="Conversation not found")
 
-    conversation = ConversationCreate(title=title)
-    db_conversation = create_conversation(
-        session=db, conversation_create=conversation, user_id=user_id
-    )
-    if not db_conversation:
-        raise HTTPException(status_code=500, detail="Failed to create conversation")
-    logger.info(f"Created new conversation with ID: {db_conversation.id}")
 
-    return db_conversation
+def validate_message_content(content: str | None) -> None:
+    """
+    Reject empty message content before any work is done for it.
+
+    Args:
+        content (Optional[str]): The content of the message.
+    """
+    if content is None or content == "":
+        raise HTTPException(status_code=400, detail="Message content cannot be empty")
 
 
-def save_message(
-    db: Session,
+async def save_chat_turn(
+    db: AsyncSession,
     conversation_id: UUID,
-    content: str,
-    role: MessageRole,
-    message_data: dict[str, Any] | None = None,
-) -> Message:
+    user_content: str,
+    ai_response: BaseMessage,
+    conversation: Conversation | None = None,
+) -> tuple[Message, Message]:
     """
-    Create the message object and save it to the database
+    Save the user message and the AI response of a turn in one transaction.
 
     Args:
-        db (Session): The SQLModel session.
+        db (AsyncSession): The async SQLModel session.
         conversation_id (UUID): The ID of the conversation.
-        content (str): The content of the message.
-        role (str): The role of the message (e.g., 'user', 'assistant').
-        message_data (Optional[Dict[str, Any]]): The full messaged data .
+        user_content (str): The content of the user's message.
+        ai_response (BaseMessage): The AI response message.
+        conversation (Optional[Conversation]): A new conversation to insert along
+            with the turn.
 
     Returns:
-        Message: The saved message object.
+        Tuple[Message, Message]: The saved user and assistant messages.
     """
-    if content is None or content == "":
-        raise HTTPException(status_code=400, detail="Message content cannot be empty")
+    user_message = MessageCreate(content=user_content, role=MessageRole.user)
+    assistant_message = build_assistant_message(ai_response)
+    try:
+        with time_stage("messages_insert"):
+            db_user_message, db_ai_message = await create_chat_turn(
+                session=db,
+                conversation_id=conversation_id,
+                user_message=user_message,
+                assistant_message=assistant_message,
+                conversation=conversation,
+            )
+    except Exception as e:
+        logger.error(f"Error saving chat turn: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to save messages") from e
 
-    message_create = MessageCreate(
-        content=content, role=role, message_data=message_data
+    logger.info(
+        f"Created messages with IDs: {db_user_message.id}, {db_ai_message.id} "
+        f"in conversation ID: {conversation_id}"
     )
+    return db_user_message, db_ai_message
 
-    db_message = create_message(
-        session=db, message_create=message_create, conversation_id=conversation_id
-    )
-    if not db_message:
-        raise HTTPException(status_code=500, detail="Failed to create message")
 
-    logger.info(
-        f"Created new message with ID: {db_message.id} in conversation ID: {conversation_id}"
+def build_assistant_message(ai_response: BaseMessage) -> MessageCreate:
+    """Build the assistant message saved for an AI response."""
+    return MessageCreate(
+        content=ai_response.text(),
+        role=MessageRole.assistant,
+        message_data=serialise_message_data(ai_response),
+        **extract_message_stats(ai_response),
     )
 
-    return db_message
-
 
 def serialise_message_data(ai_response: Any) -> dict[str, Any] | None:
     """
@@ -112,6 +175,44 @@ def serialise_message_data(ai_response: Any) -> dict[str, Any] | None:
     return message_data_dict
 
 
+def extract_message_stats(ai_response: Any) -> dict[str, Any]:
+    """
+    Extract the compact columns saved on the messages row from an AI response.
+
+    Bedrock reports stopReason and metrics.latencyMs, other providers a
+    finish_reason. Chunks merged from a stream carry latencyMs as a list.
+
+    Args:
+        ai_response (Any): The AI response object.
+
+    Returns:
+        Dict[str, Any]: The MessageStats fields found in the response.
+    """
+    usage = getattr(ai_response, "usage_metadata", None) or {}
+    metadata = getattr(ai_response, "response_metadata", None) or {}
+    latency = (metadata.get("metrics") or {}).get("latencyMs")
+    if isinstance(latency, list):
+        latency = sum(latency)
+    return {
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+        "latency_ms": latency,
+        "stop_reason": metadata.get("stopReason") or metadata.get("finish_reason"),
+        "model_id": metadata.get("model_name") or metadata.get("model_id"),
+    }
+
+
+def build_conversation(user_id: UUID, content: str) -> Conversation:
+    """Build a new, not yet persisted, conversation titled after its first message.
+
+    The ID is generated client side so it can be used as the LangGraph thread ID
+    before the conversation is inserted together with its first turn.
+    """
+    return Conversation.model_validate(
+        ConversationCreate(title=create_title(content)), update={"user_id": user_id}
+    )
+
+
 def create_title(content: str) -> str:
     """
     Create a title for the conversation based on the content.
@@ -127,61 +228,574 @@ def create_title(content: str) -> str:
     return title
 
 
-def cleanup_conversation(db: Session, conversation_id: UUID) -> None:
+def to_langchain_messages(messages: Sequence[Message]) -> list[BaseMessage]:
     """
-    Clean up the conversation by deleting it from the database.
+    Convert saved messages into LangChain messages for the model.
 
     Args:
-        db (Session): The SQLModel session.
-        conversation (Conversation): The conversation object to be deleted.
+        messages (Sequence[Message]): The saved messages, oldest first.
+
+    Returns:
+        List[BaseMessage]: The user and assistant messages as LangChain messages.
     """
-    conversation = db.get(Conversation, conversation_id)
-    if not conversation:
-        logger.error(f"Conversation with ID {conversation_id} not found")
-        raise HTTPException(status_code=404, detail="Conversation not found")
-    try:
-        db.delete(conversation)
-        db.commit()
-        logger.info(f"Deleted conversation with ID: {conversation_id}")
-    except Exception as e:
-        logger.error(f"Error deleting conversation: {e}", exc_info=True)
-        db.rollback()
-        raise HTTPException(
-            status_code=500, detail="Failed to delete conversation"
-        ) from e
+    history: list[BaseMessage] = []
+    for message in messages:
+        if message.role == MessageRole.user:
+            history.append(HumanMessage(content=message.content))
+        elif message.role == MessageRole.assistant:
+            history.append(AIMessage(content=message.content))
+    return history
+
+
+async def get_conversation_history(
+    db: AsyncSession,
+    conversation_id: UUID,
+    messages: Sequence[Message] | None = None,
+) -> list[BaseMessage] | None:
+    """
+    Get the history to send with a turn when the messages table is the source of
+    truth for conversations.
 
+    Args:
+        db (AsyncSession): The async SQLModel session.
+        conversation_id (UUID): The ID of the conversation.
+        messages (Optional[Sequence[Message]]): Already loaded messages of the
+            conversation, to avoid querying them again.
 
-async def get_and_save_ai_response(
-    conversation_id: UUID, user_content: str, service: LangchainService, db: Session
-) -> Message:
+    Returns:
+        Optional[List[BaseMessage]]: The conversation history, or None when it is
+        restored from the LangGraph checkpointer instead.
     """
-    Get the AI response and save it to the database.
+    if settings.CONVERSATION_HISTORY_SOURCE != "messages":
+        return None
+    if messages is None:
+        messages = await get_messages_by_conversation_id(
+            session=db, conversation_id=conversation_id
+        )
+    return to_langchain_messages(messages)
+
+
+def history_kwargs(history: Sequence[BaseMessage] | None) -> dict[str, Any]:
+    """Only pass history to the service when it was loaded from the database."""
+    return {} if history is None else {"history": history}
+
+
+async def get_ai_response(
+    conversation_id: UUID,
+    user_content: str,
+    service: LangchainService,
+    history: Sequence[BaseMessage] | None = None,
+) -> BaseMessage:
+    """
+    Get the AI response for a user message.
 
     Args:
         conversation_id (UUID): The ID of the conversation.
         user_content (str): The content of the user's message.
         service (LangchainService): The Langchain service instance.
-        db (Session): The SQLModel session.
+        history (Optional[Sequence[BaseMessage]]): Previous messages, when they
+            are not restored by the checkpointer.
 
     Returns:
-        Message: The saved AI response message object.
+        BaseMessage: The AI response message.
     """
     try:
-        ai_response = await service.conversation(str(conversation_id), user_content)
+        ai_response = await service.conversation(
+            str(conversation_id), user_content, **history_kwargs(history)
+        )
         if not ai_response:
             raise ValueError("Langchain service returned None or empty response")
         logger.info(f"Received AI response: {ai_response}")
-        ai_response_metadata = serialise_message_data(ai_response)
-        ai_message = save_message(
-            db=db,
-            conversation_id=conversation_id,
-            content=ai_response.content,
-            role=MessageRole.assistant,
-            message_data=ai_response_metadata,
-        )
-        return ai_message
+        return ai_response
+    except ServiceOverloadedError:
+        raise  # Answered with a 429 by the app's exception handler
     except Exception as e:
         logger.error(f"Langchain service error: {e!s}")
         raise HTTPException(
             status_code=500, detail=f"Error getting AI response: {e!s}"
         ) from e
+
+
+def chat_turn_key(
+    conversation_id: UUID, user_content: str, conversation: Conversation | None
+) -> Hashable:
+    """Identify duplicate turns: the same message in the same conversation, or
+    starting a conversation for the same user."""
+    scope = conversation_id if conversation is None else ("new", conversation.user_id)
+    return ("chat_turn", scope, hashlib.sha256(user_content.encode()).digest())
+
+
+async def answer_chat_turn(  # noqa: PLR0913
+    conversation_id: UUID,
+    user_content: str,
+    service: LangchainService,
+    session_factory: Callable[[], AsyncSession],
+    *,
+    conversation: Conversation | None = None,
+    history: Sequence[BaseMessage] | None = None,
+) -> tuple[Conversation | None, tuple[Message, Message]]:
+    """
+    Get the AI response of a turn and save both its messages.
+
+    Identical concurrent turns, such as a double submit, share one response and
+    one saved pair of messages, in the conversation started by the first one.
+
+    Args:
+        conversation_id (UUID): The ID of the conversation.
+        user_content (str): The content of the user's message.
+        service (LangchainService): The Langchain service instance.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn, which outlives the request when a duplicate awaits it.
+        conversation (Optional[Conversation]): A new conversation to insert along
+            with the turn.
+        history (Optional[Sequence[BaseMessage]]): Previous messages, when they
+            are not restored by the checkpointer.
+
+    Returns:
+        Tuple[Optional[Conversation], Tuple[Message, Message]]: The conversation
+        started by the turn, if any, and the saved user and assistant messages.
+    """
+
+    async def run_turn() -> tuple[Conversation | None, tuple[Message, Message]]:
+        ai_response = await get_ai_response(
+            conversation_id=conversation_id,
+            user_content=user_content,
+            service=service,
+            history=history,
+        )
+        async with session_factory() as db:
+            messages = await save_chat_turn(
+                db=db,
+                conversation_id=conversation_id,
+                user_content=user_content,
+                ai_response=ai_response,
+                conversation=conversation,
+            )
+        return conversation, messages
+
+    return await service.turn_coalescer.do(
+        chat_turn_key(conversation_id, user_content, conversation), run_turn
+    )
+
+
+def encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    """
+    Encode the position of a row as an opaque pagination cursor.
+
+    Args:
+        timestamp (datetime): The creation or update time of the row.
+        row_id (UUID): The ID of the row, which breaks ties on the timestamp.
+
+    Returns:
+        str: The URL safe cursor.
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a pagination cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor received from the client.
+
+    Returns:
+        Tuple[datetime, UUID]: The timestamp and ID of the row.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def paginate(response: Response, rows: Sequence[Any], limit: int) -> list[Any]:
+    """
+    Trim a page fetched with one extra row and set the next page cursor.
+
+    Args:
+        response (Response): The response to set the X-Next-Cursor header on.
+        rows (Sequence[Any]): Up to limit + 1 rows with created_at and id.
+        limit (int): The page size.
+
+    Returns:
+        List[Any]: The rows of the page.
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return page
+
+
+def retry_after_seconds(error: ServiceOverloadedError) -> int:
+    """Whole seconds for the Retry-After header of a rejected request."""
+    return max(1, math.ceil(error.retry_after))
+
+
+def overloaded_response(error: ServiceOverloadedError) -> JSONResponse:
+    """
+    Answer a request the model scheduler could not admit with a 429.
+
+    Args:
+        error (ServiceOverloadedError): The rejection raised by the scheduler.
+
+    Returns:
+        JSONResponse: The 429 response with a Retry-After header.
+    """
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Error getting AI response: {error!s}"},
+        headers={"Retry-After": str(retry_after_seconds(error))},
+    )
+
+
+def format_sse(event: str, data: dict[str, Any]) -> str:
+    """
+    Format a server-sent event frame.
+
+    Args:
+        event (str): The event name.
+        data (Dict[str, Any]): The JSON serialisable event payload.
+
+    Returns:
+        str: The encoded SSE frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_turn_events(  # noqa: PLR0913
+    conversation_id: UUID,
+    user_content: str,
+    service: LangchainService,
+    session_factory: Callable[[], AsyncSession],
+    *,
+    conversation: Conversation | None = None,
+    history: Sequence[BaseMessage] | None = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Stream the events of a turn's AI response and save the turn once complete.
+
+    A turn starting a conversation first emits a "conversation" event with it.
+    Then a "token" event is emitted for every chunk received from the model, and
+    a "message" event for each saved message of the turn, user message first.
+    Nothing is saved if the model fails. Identical concurrent turns share one
+    response and one saved pair of messages, as with answer_chat_turn: the
+    duplicates only get the conversation and message events, once the turn is
+    saved. Errors raised after the response has started are reported as an
+    "error" event since the status code can no longer change.
+
+    Args:
+        conversation_id (UUID): The ID of the conversation.
+        user_content (str): The content of the user's message.
+        service (LangchainService): The Langchain service instance.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn, which outlives the request when a duplicate awaits it.
+        conversation (Optional[Conversation]): A new conversation to insert along
+            with the turn.
+        history (Optional[Sequence[BaseMessage]]): Previous messages, when they
+            are not restored by the checkpointer.
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: The name and data of each event.
+    """
+    # Events of the turn, only fed when this call is the one running it
+    events: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+
+    async def run_turn() -> tuple[Conversation | None, tuple[Message, Message]]:
+        if conversation is not None:
+            events.put_nowait(("conversation", conversation_event(conversation)))
+        response = None
+        async for chunk in service.stream_conversation(
+            str(conversation_id), user_content, **history_kwargs(history)
+        ):
+            response = chunk if response is None else response + chunk
+            token = chunk.text()
+            if token:
+                events.put_nowait(("token", {"content": token}))
+
+        if response is None:
+            raise ValueError("Langchain service returned None or empty response")
+        async with session_factory() as db:
+            messages = await save_chat_turn(
+                db=db,
+                conversation_id=conversation_id,
+                user_content=user_content,
+                ai_response=message_chunk_to_message(response),
+                conversation=conversation,
+            )
+        return conversation, messages
+
+    turn = asyncio.ensure_future(
+        service.turn_coalescer.do(
+            chat_turn_key(conversation_id, user_content, conversation), run_turn
+        )
+    )
+    next_event = None
+    try:
+        streamed = False
+        while not turn.done() or not events.empty():
+            if events.empty():
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait(
+                    {next_event, turn}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not next_event.done():
+                    next_event.cancel()
+                    continue
+                event = next_event.result()
+            else:
+                event = events.get_nowait()
+            streamed = True
+            yield event
+
+        saved_conversation, messages = await turn
+        if saved_conversation is not None and not streamed:
+            yield "conversation", conversation_event(saved_conversation)
+        with time_stage("response_serialization"):
+            message_events = [
+                MessagePublic.model_validate(message).model_dump(mode="json")
+                for message in messages
+            ]
+        for data in message_events:
+            yield "message", data
+    except ServiceOverloadedError as e:
+        logger.warning(f"Langchain streaming rejected: {e!s}")
+        yield "error", overloaded_event(e)
+    except Exception as e:
+        logger.error(f"Langchain streaming error: {e!s}")
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield "error", {"detail": f"Error getting AI response: {detail}"}
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+        # Only stops waiting, the shared turn still completes for its duplicates
+        turn.cancel()
+
+
+def conversation_event(conversation: Conversation) -> dict[str, Any]:
+    """Data of the "conversation" event streamed for a new conversation."""
+    return ConversationPublic(**conversation.model_dump()).model_dump(mode="json")
+
+
+def overloaded_event(error: ServiceOverloadedError) -> dict[str, Any]:
+    """Data of the "error" event streamed when the model is overloaded."""
+    return {
+        "detail": f"Error getting AI response: {error!s}",
+        "retry_after": retry_after_seconds(error),
+    }
+
+
+async def stream_and_save_ai_response(  # noqa: PLR0913
+    conversation_id: UUID,
+    user_content: str,
+    service: LangchainService,
+    session_factory: Callable[[], AsyncSession],
+    *,
+    conversation: Conversation | None = None,
+    history: Sequence[BaseMessage] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the AI response as server-sent events and save the turn once complete.
+
+    The events are those of stream_turn_events.
+
+    Args:
+        conversation_id (UUID): The ID of the conversation.
+        user_content (str): The content of the user's message.
+        service (LangchainService): The Langchain service instance.
+        session_factory (Callable[[], AsyncSession]): Opens the session saving
+            the turn.
+        conversation (Optional[Conversation]): A new conversation to insert along
+            with the turn.
+        history (Optional[Sequence[BaseMessage]]): Previous messages, when they
+            are not restored by the checkpointer.
+
+    Yields:
+        str: Encoded SSE frames.
+    """
+    async for event, data in stream_turn_events(
+        conversation_id,
+        user_content,
+        service,
+        session_factory,
+        conversation=conversation,
+        history=history,
+    ):
+        yield format_sse(event, data)
+
+
+async def queue_chat_turn(
+    db: AsyncSession,
+    conversation_id: UUID,
+    user_content: str,
+    stale_after: float | None = None,
+) -> tuple[ChatTurn, Message]:
+    """
+    Save the user message of a turn and the turn itself as pending.
+
+    Args:
+        db (AsyncSession): The async SQLModel session.
+        conversation_id (UUID): The ID of the conversation.
+        user_content (str): The content of the user's message.
+        stale_after (Optional[float]): When the conversation has an unfinished
+            turn older than this many seconds, mark it failed and queue the new
+            turn, for queues whose turns are lost when their worker stops.
+
+    Returns:
+        Tuple[ChatTurn, Message]: The pending turn and the saved user message.
+    """
+    user_message = MessageCreate(content=user_content, role=MessageRole.user)
+    for attempt in range(2):
+        try:
+            with time_stage("user_message_insert"):
+                turn, db_user_message = await create_pending_turn(
+                    session=db,
+                    conversation_id=conversation_id,
+                    user_message=user_message,
+                    worker_id=worker_id(),
+                )
+            break
+        except IntegrityError as e:
+            await db.rollback()
+            if (
+                attempt > 0
+                or stale_after is None
+                or not await fail_stale_chat_turns(
+                    session=db,
+                    stale_after=stale_after,
+                    conversation_id=conversation_id,
+                )
+            ):
+                raise HTTPException(
+                    status_code=409,
+                    detail="The conversation already has a turn in progress",
+                ) from e
+
+    logger.info(f"Queued turn {turn.id} in conversation ID: {conversation_id}")
+    return turn, db_user_message
+
+
+async def run_chat_turn(
+    turn_id: UUID | None,
+    *,
+    service: LangchainService,
+    session_factory: Callable[[], AsyncSession],
+    stale_after: float | None = None,
+) -> UUID | None:
+    """
+    Claim a pending turn, get the AI response and save it.
+
+    A turn whose response fails is marked failed with the error, for clients
+    polling it, and so is a turn cancelled because its worker is stopping. A
+    response is only saved if the turn is still held by this claim.
+
+    Args:
+        turn_id (Optional[UUID]): The turn to run, or None for the oldest
+            pending turn.
+        service (LangchainService): The Langchain service instance.
+        session_factory (Callable[[], AsyncSession]): Opens a database session.
+        stale_after (Optional[float]): Also claim turns left running for longer
+            than this many seconds.
+
+    Returns:
+        Optional[UUID]: The ID of the turn that was run, or None when there was
+        none to claim.
+    """
+    async with session_factory() as db:
+        turn = await claim_chat_turn(
+            session=db, turn_id=turn_id, stale_after=stale_after, worker_id=worker_id()
+        )
+        if turn is None:
+            return None
+        # The turn is expired if the session rolls back
+        turn_id, started_at = turn.id, turn.started_at
+        try:
+            user_message = await db.get(Message, turn.user_message_id)
+            messages = None
+            if settings.CONVERSATION_HISTORY_SOURCE == "messages":
+                messages = [
+                    message
+                    for message in await get_messages_by_conversation_id(
+                        session=db, conversation_id=turn.conversation_id
+                    )
+                    if message.id != turn.user_message_id
+                ]
+            history = await get_conversation_history(
+                db=db, conversation_id=turn.conversation_id, messages=messages
+            )
+            ai_response = await service.conversation(
+                str(turn.conversation_id),
+                user_message.content,
+                **history_kwargs(history),
+            )
+            with time_stage("assistant_message_insert"):
+                completed = await complete_chat_turn(
+                    session=db,
+                    turn=turn,
+                    assistant_message=build_assistant_message(ai_response),
+                )
+            if completed is None:
+                logger.warning(f"Turn {turn_id} was failed or claimed again meanwhile")
+            else:
+                logger.info(f"Completed turn {turn_id}")
+        except asyncio.CancelledError:
+            logger.warning(f"Turn {turn_id} was cancelled")
+            await db.rollback()
+            await fail_chat_turn(
+                session=db,
+                turn_id=turn_id,
+                error="The turn was cancelled when its worker stopped",
+                started_at=started_at,
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Error running turn {turn_id}: {e}", exc_info=True)
+            await db.rollback()
+            await fail_chat_turn(
+                session=db,
+                turn_id=turn_id,
+                error=f"Error getting AI response: {e!s}",
+                started_at=started_at,
+            )
+        return turn_id
+
+
+async def wait_for_turn(
+    db: AsyncSession, turn_id: UUID, turn_queue: TurnQueue, wait: float
+) -> ChatTurnPublic | None:
+    """
+    Get a turn, waiting up to ``wait`` seconds for it to finish.
+
+    A turn finished by this worker wakes the wait straight away. Turns run by
+    other workers are noticed by reading the turn again every poll interval.
+    The database connection is released while waiting.
+
+    Args:
+        db (AsyncSession): The async SQLModel session.
+        turn_id (UUID): The ID of the turn.
+        turn_queue (TurnQueue): The queue running the turns.
+        wait (float): The maximum number of seconds to wait.
+
+    Returns:
+        Optional[ChatTurnPublic]: The turn with its messages, or None when it
+        does not exist.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        turn = await get_chat_turn(session=db, turn_id=turn_id)
+        remaining = deadline - loop.time()
+        if turn is None or turn.status in FINISHED_TURN_STATUSES or remaining <= 0:
+            break
+        await db.rollback()
+        await turn_queue.wait(turn_id, min(remaining, turn_queue.poll_interval))
+    if turn is None:
+        return None
+    messages = await get_turn_messages(session=db, turn=turn)
+    return ChatTurnPublic(
+        **turn.model_dump(),
+        messages=[MessagePublic.model_validate(message) for message in messages],
+    )
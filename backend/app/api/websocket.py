@@ -0,0 +1,163 @@
+"""A WebSocket channel carrying a user's chat turns for any of their conversations.
+
+The user is authenticated once when the socket opens, and each conversation's
+ownership is checked once per socket, so turns skip the per-request HTTP, CORS
+and auth overhead. The client sends turns as JSON frames:
+
+    {"ref": "1", "conversation_id": "<uuid or null>", "content": "..."}
+
+A null conversation_id starts a new conversation. Turns run concurrently, and
+every frame sent back carries the ref of its turn:
+
+    {"type": "conversation" | "token" | "message" | "error", "ref": "1", "data": {}}
+
+The events are those of the streaming endpoints: "conversation" for a new
+conversation, "token" for each chunk of the response and "message" for each
+saved message of the turn. A turn that fails gets an "error" frame, with the
+status code of the equivalent HTTP error when there is one.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.utils import (
+    build_conversation,
+    get_conversation_history,
+    overloaded_event,
+    stream_turn_events,
+    validate_message_content,
+)
+from app.core.metrics import time_stage
+from app.core.models import ChannelTurn
+from app.db.async_crud import get_conversation_by_id
+from app.services.llm import LangchainService, ServiceOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationChannel:
+    """Runs the turns received on one WebSocket and sends back their events."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: UUID,
+        service: LangchainService,
+        session_factory: Callable[[], AsyncSession],
+        max_turns: int,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.service = service
+        self.session_factory = session_factory
+        self.max_turns = max_turns
+        self.turns: dict[str, asyncio.Task] = {}
+        self.conversations: set[UUID] = set()  # Owned by the user, checked once
+        self.send_lock = asyncio.Lock()
+
+    async def serve(self) -> None:
+        """Receive turns until the client disconnects, then cancel running turns."""
+        try:
+            while True:
+                await self.start_turn(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            logger.info(f"Conversation channel of user {self.user_id} closed")
+        finally:
+            for task in self.turns.values():
+                task.cancel()
+            await asyncio.gather(*self.turns.values(), return_exceptions=True)
+
+    async def send(self, event: str, ref: str | None, data: dict[str, Any]) -> None:
+        async with self.send_lock:
+            await self.websocket.send_json({"type": event, "ref": ref, "data": data})
+
+    async def start_turn(self, frame: str) -> None:
+        try:
+            turn = ChannelTurn.model_validate_json(frame)
+        except ValidationError as e:
+            await self.send("error", None, {"detail": f"Invalid turn: {e}"})
+            return
+        if turn.ref in self.turns:
+            await self.send("error", turn.ref, {"detail": "Turn is already running"})
+            return
+        if len(self.turns) >= self.max_turns:
+            await self.send(
+                "error", turn.ref, {"detail": "Too many turns running on this socket"}
+            )
+            return
+        task = asyncio.create_task(self.run_turn(turn))
+        self.turns[turn.ref] = task
+        task.add_done_callback(lambda done: self.finish_turn(turn.ref, done))
+
+    def finish_turn(self, ref: str, task: asyncio.Task) -> None:
+        self.turns.pop(ref, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error running turn {ref}: {task.exception()!s}")
+
+    async def run_turn(self, turn: ChannelTurn) -> None:
+        try:
+            validate_message_content(turn.content)
+            self.service.check_capacity()
+            async with self.session_factory() as db:
+                await self.stream_turn(db, turn)
+        except HTTPException as e:
+            await self.send(
+                "error", turn.ref, {"detail": e.detail, "status": e.status_code}
+            )
+        except ServiceOverloadedError as e:
+            await self.send("error", turn.ref, overloaded_event(e))
+        except WebSocketDisconnect:
+            pass  # serve() cancels the other turns
+        except Exception as e:
+            logger.error(f"Error running turn {turn.ref}: {e!s}", exc_info=True)
+            await self.send(
+                "error",
+                turn.ref,
+                {"detail": f"Error running turn: {e!s}", "status": 500},
+            )
+
+    async def stream_turn(self, db: AsyncSession, turn: ChannelTurn) -> None:
+        conversation = history = None
+        if turn.conversation_id is None:
+            conversation = build_conversation(self.user_id, turn.content)
+            conversation_id = conversation.id
+        else:
+            conversation_id = turn.conversation_id
+            await self.check_owner(db, conversation_id)
+            history = await get_conversation_history(
+                db=db, conversation_id=conversation_id
+            )
+
+        async for event, data in stream_turn_events(
+            conversation_id,
+            turn.content,
+            self.service,
+            self.session_factory,
+            conversation=conversation,
+            history=history,
+        ):
+            if event == "conversation":
+                # A duplicate turn gets the conversation started by the first one
+                conversation_id = UUID(data["id"])
+            elif event == "message":
+                self.conversations.add(conversation_id)
+            await self.send(event, turn.ref, data)
+
+    async def check_owner(self, db: AsyncSession, conversation_id: UUID) -> None:
+        """Check once per socket that a conversation belongs to the user."""
+        if conversation_id in self.conversations:
+            return
+        with time_stage("ownership_check"):
+            conversation = await get_conversation_by_id(
+                session=db, conversation_id=conversation_id
+            )
+        if conversation is None or conversation.user_id != self.user_id:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        self.conversations.add(conversation_id)
@@ -0,0 +1,139 @@
+"""
+Throughput benchmark for concurrent chat turns against a fake slow model.
+
+Compares the previous synchronous model node, which LangGraph runs in the event
+loop's default thread pool, with the async node and its concurrency limit. The
+fake model sleeps instead of calling Bedrock, so the numbers isolate how many
+model calls a single worker can keep in flight.
+
+Usage (from the backend directory):
+    python -m app.benchmarks.llm_concurrency --latency 0.5 --requests 256
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from app.prompts.prompt_utils import generate_health_anxiety_prompt
+from app.services.llm import LangchainService, State
+
+
+class SlowFakeChatModel(BaseChatModel):
+    """Chat model that waits a fixed latency before answering.
+
+    It only implements the blocking ``_generate``, like ChatBedrockConverse, so
+    LangchainService calls it in its model thread pool.
+    """
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+class AsyncSlowFakeChatModel(SlowFakeChatModel):
+    """SlowFakeChatModel with native async support."""
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+def build_legacy_graph(model: BaseChatModel):
+    """Build the graph as it was before the async node: a sync ``invoke`` node."""
+
+    def call_model(state: State):
+        prompt_template = generate_health_anxiety_prompt(state.get("user_context"))
+        formatted_prompt = prompt_template.invoke({"messages": state["messages"]})
+        return {"messages": [model.invoke(formatted_prompt)]}
+
+    workflow = StateGraph(state_schema=State)
+    workflow.add_edge(START, "model")
+    workflow.add_node("model", call_model)
+    workflow.add_edge("model", END)
+    return workflow.compile(checkpointer=MemorySaver())
+
+
+def build_async_graph(model: BaseChatModel, max_concurrency: int):
+    """Build the graph through LangchainService with its async model node."""
+    LangchainService.instance = None
+    service = LangchainService()
+    service._model = model
+    service.checkpointer = MemorySaver()
+    service.graph = None
+    service.initialize_concurrency_limit(max_concurrency)
+    service.initialize_graph()
+    return service.graph
+
+
+async def run_turns(graph, concurrency: int, total: int) -> float:
+    """Run ``total`` single-turn conversations, ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def turn():
+        async with semaphore:
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            await graph.ainvoke(
+                {"messages": [HumanMessage(content="Is it a tumor?")]}, config=config
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(turn() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32, 64, 128, 256]
+    )
+    args = parser.parse_args()
+
+    scenarios = {
+        "before (sync node)": lambda: build_legacy_graph(
+            SlowFakeChatModel(latency=args.latency)
+        ),
+        "after (blocking model)": lambda: build_async_graph(
+            SlowFakeChatModel(latency=args.latency), args.max_concurrency
+        ),
+        "after (async model)": lambda: build_async_graph(
+            AsyncSlowFakeChatModel(latency=args.latency),
+            args.max_concurrency,
+        ),
+    }
+
+    print(f"model latency {args.latency}s, {args.requests} turns per run (turns/s)")
+    print(f"{'concurrency':>12}" + "".join(f"{name:>26}" for name in scenarios))
+    for concurrency in args.concurrency:
+        row = f"{concurrency:>12}"
+        for build in scenarios.values():
+
+            async def run(build=build, concurrency=concurrency):
+                return await run_turns(build(), concurrency, args.requests)
+
+            row += f"{asyncio.run(run()):>26.1f}"
+        print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
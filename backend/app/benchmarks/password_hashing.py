@@ -0,0 +1,106 @@
+"""
+Event loop latency benchmark for concurrent logins.
+
+Runs a burst of concurrent password verifications while a ticker coroutine
+measures how late the event loop wakes it up, which is the delay every chat
+stream in the same worker would see. Compares verifying on the event loop, as
+the synchronous verify_password does, with the thread and process pools behind
+verify_password_async.
+
+Usage (from the backend directory):
+    python -m app.benchmarks.password_hashing --logins 64 --workers 2
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core import security
+from app.core.security import (
+    get_password_executor,
+    get_password_hash,
+    shutdown_password_executor,
+    verify_password,
+    verify_password_async,
+)
+
+TICK = 0.01
+
+
+async def measure_lag(stop: asyncio.Event) -> list[float]:
+    """Sleep for TICK in a loop and record how late each wake-up is, in ms."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - start - TICK) * 1000)
+    return lags
+
+
+async def run_logins(verify, hashed: str, logins: int) -> tuple[float, list[float]]:
+    """Verify ``logins`` passwords concurrently while measuring event loop lag."""
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(TICK * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("password", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return logins / elapsed, await ticker
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, the blocked loop only records a few samples."""
+    ordered = sorted(values)
+    return ordered[max(0, round(q / 100 * len(ordered)) - 1)]
+
+
+async def verify_on_loop(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=None)
+    args = parser.parse_args()
+
+    security.settings.PASSWORD_HASH_WORKERS = args.workers
+    if args.rounds is not None:
+        security.pwd_context.update(sha256_crypt__default_rounds=args.rounds)
+    hashed = get_password_hash("password")
+
+    scenarios = {
+        "before (on loop)": ("thread", verify_on_loop),
+        "thread pool": ("thread", verify_password_async),
+        "process pool": ("process", verify_password_async),
+    }
+
+    print(
+        f"{args.logins} concurrent logins, {args.workers} workers, "
+        f"{security.pwd_context.handler().from_string(hashed).rounds} rounds"
+    )
+    print(
+        f"{'scenario':>18}{'logins/s':>12}{'lag p50 ms':>12}"
+        f"{'lag p99 ms':>12}{'lag max ms':>12}"
+    )
+    for name, (executor, verify) in scenarios.items():
+        shutdown_password_executor()
+        security.settings.PASSWORD_HASH_EXECUTOR = executor
+        # Start the pool before measuring, process workers take a while to spawn
+        get_password_executor().submit(verify_password, "password", hashed).result()
+
+        rate, lags = asyncio.run(run_logins(verify, hashed, args.logins))
+        print(
+            f"{name:>18}{rate:>12.1f}{percentile(lags, 50):>12.1f}"
+            f"{percentile(lags, 99):>12.1f}{max(lags):>12.1f}",
+            flush=True,
+        )
+    shutdown_password_executor()
+
+
+if __name__ == "__main__":
+    main()
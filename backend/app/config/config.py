@@ -1,7 +1,8 @@
 import os
-from typing import Optional
+import secrets
+from typing import Literal, Optional
 
-from pydantic import PostgresDsn, computed_field
+from pydantic import PostgresDsn, computed_field, model_validator
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings
 
@@ -37,6 +38,64 @@ class Settings(BaseSettings):
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.3
     TOP_P: float = 0.4
+    # Maximum number of model calls in flight per worker
+    LLM_MAX_CONCURRENCY: int = 128
+    # Model calls beyond the concurrency limit wait in a queue of at most
+    # LLM_MAX_QUEUE calls for up to LLM_QUEUE_TIMEOUT_SECONDS, after which the
+    # request is rejected with a 429
+    LLM_MAX_QUEUE: int = 256
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30
+    # Throttled and transiently failing model calls (server errors, model not
+    # ready, timeouts) are retried with jittered exponential backoff
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_SECONDS: float = 8
+    # Provisioned model quota of this worker, 0 disables the limit
+    LLM_REQUESTS_PER_MINUTE: int = 0
+    LLM_TOKENS_PER_MINUTE: int = 0
+    # Reuse the answer to the first turn of a conversation without user context
+    # for the same question, and with a similarity threshold above 0 (e.g. 0.9)
+    # for similar questions too
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600
+    RESPONSE_CACHE_MAX_SIZE: int = 1000
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0.0
+    # Chat turns posted to /v1/conversations/async run in TURN_WORKERS background
+    # tasks per worker. The in-process queue holds at most TURN_QUEUE_MAX_SIZE
+    # turns. The postgres queue is shared by all workers, which poll it every
+    # TURN_POLL_INTERVAL_SECONDS and take over turns left running for longer
+    # than TURN_STALE_SECONDS. Turns of the in-process queue are marked failed
+    # when their worker shuts down, or after a crash, once older than
+    # TURN_STALE_SECONDS, when another turn is queued in their conversation
+    TURN_QUEUE: Literal["memory", "postgres"] = "memory"
+    TURN_WORKERS: int = 16
+    TURN_QUEUE_MAX_SIZE: int = 1000
+    TURN_POLL_INTERVAL_SECONDS: float = 1.0
+    TURN_STALE_SECONDS: float = 600
+    # Turns running at once on a /v1/ws conversation channel
+    WS_MAX_TURNS_PER_CONNECTION: int = 4
+    # GET /v1/sync/conversations only returns conversations updated more than
+    # this many seconds ago. updated_at is stamped before its transaction
+    # commits, so a more recent update may still become visible with an earlier
+    # timestamp than the cursor. Keep it above the longest such transaction
+    # plus the clock skew between workers
+    SYNC_SAFETY_WINDOW_SECONDS: float = 5
+    # Where conversation history comes from: the LangGraph checkpointer, or the
+    # messages table as the single source of truth (no checkpoints are written)
+    CONVERSATION_HISTORY_SOURCE: Literal["checkpointer", "messages"] = "checkpointer"
+    # How much history is sent to the model each turn: all of it, the last
+    # HISTORY_MAX_TURNS turns, the latest turns fitting in HISTORY_MAX_TOKENS, or
+    # the last HISTORY_MAX_TURNS turns plus a rolling summary of older ones, which
+    # is updated every HISTORY_SUMMARY_BATCH_TURNS turns
+    HISTORY_POLICY: Literal["full", "last_turns", "token_budget", "summary"] = "full"
+    HISTORY_MAX_TURNS: int = 20
+    HISTORY_MAX_TOKENS: int = 8000
+    HISTORY_SUMMARY_BATCH_TURNS: int = 10
+    # Bedrock prompt caching: a cache point after the static system prompt, and
+    # optionally after the previous turn of the history. Only enable it for
+    # models that support prompt caching (e.g. Claude 3.5 Sonnet v2 and newer)
+    BEDROCK_PROMPT_CACHING: bool = False
+    BEDROCK_CACHE_HISTORY: bool = False
 
     # Database settings
     DB_HOST: str = "localhost"
@@ -48,6 +107,46 @@ class Settings(BaseSettings):
     DB_SUPERUSER_PASSWORD: str | None = None
     DB_SUPERUSER_EMAIL: str | None = None
 
+    # Postgres connections all workers may hold together, to keep below the
+    # server's max_connections. Each of the WEB_CONCURRENCY worker processes
+    # (the variable gunicorn and uvicorn read their worker count from) opens one
+    # pool, used by both the checkpointer and the async engine, of at most
+    # DB_POOL_MAX_SIZE connections: by default its equal share of the budget
+    DB_CONNECTION_BUDGET: int = 40
+    WEB_CONCURRENCY: int = 1
+    DB_POOL_MAX_SIZE: int | None = None
+    # Connections opened at startup and kept open, up to the maximum
+    DB_POOL_MIN_SIZE: int = 4
+    # How long a request waits for a connection before failing, how long idle
+    # connections above the minimum are kept, and after how long connections
+    # are replaced
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_MAX_IDLE_SECONDS: float = 60
+    DB_POOL_MAX_LIFETIME_SECONDS: float = 3600
+    # Check connections are alive before handing them out, at the cost of a
+    # round trip per checkout. Off by default: max_idle and max_lifetime
+    # already retire connections before the server or a proxy drops them
+    DB_POOL_CHECK_CONNECTIONS: bool = False
+    # Server-side prepared statements: psycopg prepares a query once it has run
+    # DB_PREPARE_THRESHOLD times on a connection (0 prepares it on its first
+    # run). Disable them behind a transaction-mode PgBouncer
+    DB_PREPARED_STATEMENTS: bool = True
+    DB_PREPARE_THRESHOLD: int = 0
+
+    @model_validator(mode="after")
+    def check_connection_budget(self) -> "Settings":
+        if self.WEB_CONCURRENCY < 1:
+            raise ValueError("WEB_CONCURRENCY must be at least 1")
+        share = self.DB_CONNECTION_BUDGET // self.WEB_CONCURRENCY
+        if self.DB_POOL_MAX_SIZE is None:
+            self.DB_POOL_MAX_SIZE = share
+        if not 1 <= self.DB_POOL_MAX_SIZE <= share:
+            raise ValueError(
+                "DB_POOL_MAX_SIZE must be between 1 and the worker's share of "
+                f"DB_CONNECTION_BUDGET ({share})"
+            )
+        return self
+
     # Direct database URL (used in production)
     DATABASE_URL: str | None = None
 
@@ -72,6 +171,56 @@ class Settings(BaseSettings):
         )
         return str(base_url)
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def PSYCOPG_CONNINFO(self) -> str:  # noqa: N802
+        # psycopg expects a plain postgresql:// URL or a key/value conninfo string
+        if self.DATABASE_URL:
+            return self.DATABASE_URL.replace(
+                "postgresql+psycopg://", "postgresql://", 1
+            )
+
+        return (
+            f"dbname={self.DB_NAME} "
+            f"user={self.DB_USERNAME} "
+            f"password={self.DB_PASSWORD} "
+            f"host={self.DB_HOST} "
+            f"port={self.DB_PORT}"
+        )
+
+    # Checkpoint retention: interval of the background compaction task (0 disables
+    # it) and how long a thread without a conversation is kept before deletion
+    CHECKPOINT_COMPACTION_INTERVAL_SECONDS: int = 0
+    CHECKPOINT_ORPHAN_GRACE_SECONDS: int = 3600
+
+    # In-process cache of user and conversation lookups: entries expire after the
+    # TTL (0 disables the cache) and the least recently used are evicted once
+    # the cache is full
+    LOOKUP_CACHE_TTL_SECONDS: float = 60
+    LOOKUP_CACHE_MAX_SIZE: int = 10_000
+
+    # Password hashing: sha256_crypt rounds of new hashes (existing hashes keep
+    # their own) and the bounded pool that runs hashing off the event loop
+    PASSWORD_HASH_ROUNDS: int = 535_000
+    PASSWORD_HASH_EXECUTOR: Literal["process", "thread"] = "process"
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # Access tokens issued by POST /v1/token. SECRET_KEY is required outside of
+    # dev and test, where the default key is random per process so tokens do
+    # not survive restarts nor work across workers
+    SECRET_KEY: str | None = None
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Verified tokens cached per worker, so repeated requests skip the signature
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
+    @model_validator(mode="after")
+    def check_secret_key(self) -> "Settings":
+        if self.SECRET_KEY is None:
+            if self.ENVIRONMENT not in ("dev", "test"):
+                raise ValueError("SECRET_KEY must be set outside of dev and test")
+            self.SECRET_KEY = secrets.token_urlsafe(32)
+        return self
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
@@ -1,11 +1,22 @@
 import logging
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator
+from uuid import UUID
 
-from fastapi import HTTPException
+import jwt
+from fastapi import Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config.config import settings
+from app.core.security import verify_access_token
+from app.db.lookup_cache import check_user_exists
+from app.db.pool import discard_shared_pool, get_pooled_connection
 from app.services.llm import LangchainService  # Import the service class
+from app.services.turn_queue import TurnQueue
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +36,9 @@ async def get_langchain_service() -> LangchainService:
         ) from e
 
 
-# Use the database URL from your settings
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True)
+# Use the database URL from your settings. The sync engine only runs the setup
+# at startup, so it keeps no connections open.
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
 
 
 # Create a configured "Session" class
@@ -41,3 +53,125 @@ def get_session() -> Generator[Session, None, None]:
             yield session
         finally:
             pass
+
+
+# Async engine for the request path; psycopg 3 serves both sync and async drivers.
+# Connections are borrowed from the worker's pool, shared with the checkpointer,
+# and given back when SQLAlchemy closes them, so the engine does not pool them.
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    async_creator=get_pooled_connection,
+    poolclass=NullPool,
+    # Turns off the autocommit the checkpointer opens the connections with
+    isolation_level="READ COMMITTED",
+)
+
+
+def new_async_session() -> AsyncSession:
+    """
+    Open an async SQLModel session.
+    Objects are not expired on commit so they can be serialised without
+    triggering implicit IO outside of an awaited call.
+    """
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function that yields an async SQLModel session.
+    """
+    async with new_async_session() as session:
+        yield session
+
+
+def get_session_factory() -> Callable[[], AsyncSession]:
+    """
+    Dependency function that provides a factory of async sessions, for work
+    that outlives a single request or runs concurrently within one.
+    """
+    return new_async_session
+
+
+def reset_after_fork() -> None:
+    """
+    Drop the database connections and pool inherited from the parent process,
+    for servers that import the app before forking workers (gunicorn --preload).
+    Each worker then opens its own on first use.
+    """
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    discard_shared_pool()
+
+
+def get_turn_queue(request: Request) -> TurnQueue:
+    """
+    Dependency function that provides the queue running background chat turns,
+    created by the app's lifespan.
+    """
+    return request.app.state.turn_queue
+
+
+# Tokens are optional for now, requests without one keep passing user_id
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="v1/token", auto_error=False)
+
+
+async def get_current_user_id(
+    user_id: UUID | None = Query(default=None),
+    token: str | None = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
+) -> UUID:
+    """
+    Dependency function that resolves the user making the request.
+
+    A bearer token is verified locally, without a database query. Requests
+    without a token must pass user_id as before, which is checked against the
+    database through the lookup cache.
+    """
+    if token is None and user_id is None:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "missing",
+                    "loc": ("query", "user_id"),
+                    "msg": "Field required",
+                    "input": None,
+                }
+            ]
+        )
+    return await resolve_user_id(user_id=user_id, token=token, session=session)
+
+
+async def resolve_user_id(
+    *, user_id: UUID | None, token: str | None, session: AsyncSession
+) -> UUID:
+    """
+    Resolve a user from an access token, or else from their ID.
+
+    Args:
+        user_id (Optional[UUID]): The ID of the user, required without a token.
+        token (Optional[str]): An access token.
+        session (AsyncSession): The async SQLModel session.
+
+    Returns:
+        UUID: The ID of the user.
+
+    Raises:
+        HTTPException: 401 for an invalid token, 403 when user_id is not the
+            token's user and 404 when the user does not exist.
+    """
+    if token is not None:
+        try:
+            token_user_id = verify_access_token(token)
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            ) from e
+        if user_id is not None and user_id != token_user_id:
+            raise HTTPException(status_code=403, detail="Token is for another user")
+        return token_user_id
+
+    if user_id is None or not await check_user_exists(session=session, user_id=user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_id
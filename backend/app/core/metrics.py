@@ -0,0 +1,131 @@
+"""Prometheus metrics, served by GET /metrics.
+
+Every HTTP request is timed per route template, from the request until its
+last response byte, so streamed responses count their whole stream. Chat turns
+also time their stages, to tell apart time spent in Bedrock, in Postgres and
+in the app:
+
+- ownership_check: looking up the conversation of a turn
+- messages_insert: saving both messages of a synchronous or streamed turn
+- user_message_insert, assistant_message_insert: saving the messages of a
+  background turn, at the request and once the model has answered
+- llm_call: each call to the model
+- llm_first_token: from the start of a streamed turn to its first token
+- checkpoint_write: each write of the LangGraph checkpointer
+- response_serialization: building the response of a turn
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so that each worker's /metrics reports the totals of all workers.
+"""
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from langchain_core.messages import BaseMessage
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Model calls and streamed turns take up to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve HTTP requests, until the end of the response body.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TURN_STAGE_LATENCY = Histogram(
+    "chat_turn_stage_duration_seconds",
+    "Time spent in each stage of a chat turn.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens reported in the usage metadata of model responses.",
+    ["kind"],
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Record the time spent in a stage of a chat turn, even when it fails."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TURN_STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    TURN_STAGE_LATENCY.labels(stage).observe(seconds)
+
+
+def record_llm_tokens(message: BaseMessage) -> None:
+    """Count the tokens in the usage metadata of a model response."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    details = usage.get("input_token_details") or {}
+    LLM_TOKENS.labels("input").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels("output").inc(usage.get("output_tokens", 0))
+    LLM_TOKENS.labels("cache_read").inc(details.get("cache_read", 0))
+    LLM_TOKENS.labels("cache_write").inc(details.get("cache_creation", 0))
+
+
+class RequestLatencyMiddleware:
+    """Time HTTP requests per method, route template and status code."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            # The route template, so IDs in paths do not add labels
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    """Render the metrics of this worker, or of all workers in multiprocess mode."""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop the live metrics files of a worker that exited, in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
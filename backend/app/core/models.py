@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime
-from enum import Enum
+from enum import Enum, StrEnum
 from typing import Any, Optional  # Use standard typing
 
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy import func
+from sqlalchemy import Index, func, text
 from sqlalchemy.dialects.postgresql import JSONB  # Keep this for JSONB type
 from sqlmodel import Column, Field, Relationship, SQLModel
 
@@ -37,6 +37,14 @@ class User(UserBase, table=True):
     conversations: list["Conversation"] = Relationship(back_populates="user")
 
 
+class Token(SQLModel):
+    """An access token issued by POST /v1/token."""
+
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int  # Seconds
+
+
 class MessageRole(str, Enum):
     user = "user"
     assistant = "assistant"
@@ -53,8 +61,18 @@ class MessageBase(SQLModel):
     )
 
 
-class MessageCreate(MessageBase):
-    message_data: dict[str, Any] | None = None
+class MessageStats(SQLModel):
+    """Compact model metadata of an assistant message, kept on the messages row."""
+
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    latency_ms: int | None = None
+    stop_reason: str | None = Field(default=None, max_length=50)
+    model_id: str | None = Field(default=None, max_length=200)
+
+
+class MessageCreate(MessageBase, MessageStats):
+    message_data: dict[str, Any] | None = None  # Saved to message_metadata
 
 
 class MessagePublic(MessageBase):
@@ -62,14 +80,20 @@ class MessagePublic(MessageBase):
     created_at: datetime
 
 
-class Message(MessageBase, table=True):
+class Message(MessageBase, MessageStats, table=True):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves reading a conversation's messages in order and by page
+        Index(
+            "ix_messages_conversation_id_created_at",
+            "conversation_id",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    conversation_id: uuid.UUID = Field(foreign_key="conversations.id", index=True)
-    message_data: dict[str, Any] | None = Field(
-        default=None, sa_column=Column(JSONB, nullable=True)
-    )
+    conversation_id: uuid.UUID = Field(foreign_key="conversations.id")
     created_at: datetime = Field(
         default_factory=datetime.utcnow,  # Use default_factory for non-SQL defaults
         sa_column_kwargs={
@@ -78,6 +102,26 @@ class Message(MessageBase, table=True):
     )
 
     conversation: "Conversation" = Relationship(back_populates="messages")
+    message_metadata: Optional["MessageMetadata"] = Relationship(
+        back_populates="message",
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        },
+    )  # Raw model metadata, only loaded when accessed
+
+
+class MessageMetadata(SQLModel, table=True):
+    """The full serialised model response of a message, kept out of messages."""
+
+    __tablename__ = "message_metadata"
+
+    message_id: uuid.UUID = Field(
+        foreign_key="messages.id", primary_key=True, ondelete="CASCADE"
+    )
+    data: dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))
+
+    message: Message = Relationship(back_populates="message_metadata")
 
 
 class ConversationBase(SQLModel):
@@ -95,19 +139,136 @@ class ConversationPublic(ConversationBase):
     messages: list[MessagePublic] = []  # Include messages in the public representation
 
 
+class ConversationSummary(ConversationBase):
+    """A conversation without its messages, for listing a user's conversations."""
+
+    id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+    user_id: uuid.UUID
+
+
+class ChannelTurn(SQLModel):
+    """A turn sent over the /v1/ws conversation channel."""
+
+    ref: str = Field(min_length=1, max_length=100)  # Echoed on the turn's events
+    conversation_id: uuid.UUID | None = None  # None starts a new conversation
+    content: str
+
+
+class ConversationSync(SQLModel):
+    """Conversations updated since a sync cursor, oldest update first."""
+
+    conversations: list[ConversationSummary]
+    cursor: str | None = None  # Pass back to get the updates after this page
+    has_more: bool = False
+
+
+class MessageSync(SQLModel):
+    """Messages of a conversation created after a given message, oldest first."""
+
+    messages: list[MessagePublic]
+    has_more: bool = False
+
+
 class Conversation(ConversationBase, table=True):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Serves keyset pagination of a user's conversations, newest first
+        Index(
+            "ix_conversations_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        # Serves syncing the conversations a user updated since a cursor
+        Index(
+            "ix_conversations_user_id_updated_at",
+            "user_id",
+            "updated_at",
+            "id",
+        ),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="users.id", index=True)
+    user_id: uuid.UUID = Field(foreign_key="users.id")
     created_at: datetime = Field(
         default_factory=datetime.utcnow,  # Use default_factory for non-SQL defaults
         sa_column_kwargs={
             "server_default": func.now()
         },  # Keep server_default via sa_column_kwargs
     )
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,  # Bumped whenever a turn is saved
+        sa_column_kwargs={"server_default": func.now()},
+    )
     user: User = Relationship(back_populates="conversations")
     messages: list[Message] = Relationship(
         back_populates="conversation",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"},
-    )  # Cascade delete for messages
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "order_by": "Message.created_at",
+        },
+    )  # Cascade delete for messages, oldest first
+
+
+class TurnStatus(StrEnum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ChatTurnPublic(SQLModel):
+    """A chat turn generated in the background, polled from GET /v1/turns/{id}."""
+
+    id: uuid.UUID
+    conversation_id: uuid.UUID
+    status: TurnStatus
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+    messages: list[MessagePublic] = []  # The user message, then the AI response
+
+
+class ChatTurn(SQLModel, table=True):
+    """A chat turn queued for background generation."""
+
+    __tablename__ = "chat_turns"
+    __table_args__ = (
+        # At most one unfinished turn per conversation, so turns cannot interleave
+        Index(
+            "ux_chat_turns_conversation_id_unfinished",
+            "conversation_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        # Serves claiming the oldest pending turn
+        Index(
+            "ix_chat_turns_unfinished_created_at",
+            "created_at",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    conversation_id: uuid.UUID = Field(
+        foreign_key="conversations.id", ondelete="CASCADE"
+    )
+    user_message_id: uuid.UUID = Field(foreign_key="messages.id", ondelete="CASCADE")
+    assistant_message_id: uuid.UUID | None = Field(
+        default=None, foreign_key="messages.id", ondelete="CASCADE"
+    )
+    status: TurnStatus = Field(
+        default=TurnStatus.pending,
+        sa_column=Column(SQLAlchemyEnum(TurnStatus), nullable=False),
+    )
+    error: str | None = Field(default=None, max_length=500)
+    # The worker process that queued the turn, or claimed it last
+    worker_id: str | None = Field(default=None, max_length=255)
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column_kwargs={"server_default": func.now()},
+    )
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
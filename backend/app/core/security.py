@@ -1,9 +1,35 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import jwt
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+from app.config.config import settings
+from app.core.cache import TTLCache
+
+pwd_context = CryptContext(
+    schemes=["sha256_crypt"],
+    deprecated="auto",
+    sha256_crypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 
+# Verified access tokens -> (user ID, expiry timestamp), so a token is only
+# decoded and its signature checked once per worker
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# Hashing takes tens of milliseconds of CPU, so the async wrappers run it in a
+# bounded pool instead of on the event loop
+_password_executor: Executor | None = None
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -11,3 +37,106 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def get_password_executor() -> Executor:
+    """
+    Get the pool password hashing runs in, creating it on first use.
+
+    A process pool keeps hashing from competing with the event loop for the
+    GIL. Its workers are spawned rather than forked, since forking a process
+    that already runs threads is unsafe.
+    """
+    global _password_executor  # noqa: PLW0603
+    if _password_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _password_executor
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor  # noqa: PLW0603
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_password_executor(), verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_password_executor(), get_password_hash, password
+    )
+
+
+def create_access_token(user_id: UUID, expires_delta: timedelta | None = None) -> str:
+    """
+    Issue a signed access token for a user.
+
+    Args:
+        user_id (UUID): The ID of the user, saved as the token subject.
+        expires_delta (Optional[timedelta]): How long the token is valid for.
+            Defaults to ACCESS_TOKEN_EXPIRE_MINUTES.
+
+    Returns:
+        str: The encoded token.
+    """
+    expires_delta = expires_delta or timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    payload = {"sub": str(user_id), "exp": datetime.now(UTC) + expires_delta}
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_access_token(token: str) -> UUID:
+    """
+    Verify an access token locally and return the ID of its user.
+
+    Tokens already verified by this worker are served from the token cache
+    until they expire.
+
+    Args:
+        token (str): The encoded token.
+
+    Returns:
+        UUID: The ID of the user the token was issued to.
+
+    Raises:
+        jwt.InvalidTokenError: The token is malformed, forged or expired.
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at > time.time():
+            return user_id
+        token_cache.invalidate(token)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    payload = jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=[ALGORITHM],
+        options={"require": ["exp", "sub"]},
+    )
+    try:
+        user_id = UUID(payload["sub"])
+    except ValueError as e:
+        raise jwt.InvalidTokenError("Subject must be a user ID") from e
+    token_cache.set(token, (user_id, payload["exp"]))
+    return user_id
@@ -0,0 +1,532 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, exists, insert, or_, tuple_, update
+from sqlalchemy.orm import load_only
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.models import (
+    ChatTurn,
+    Conversation,
+    ConversationCreate,
+    Message,
+    MessageCreate,
+    MessageMetadata,
+    TurnStatus,
+    User,
+    UserCreate,
+)
+from app.core.security import get_password_hash_async
+
+
+async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User:
+    password_hash = await get_password_hash_async(user_create.password)
+    user_db = User.model_validate(user_create, update={"password_hash": password_hash})
+    session.add(user_db)
+    await session.commit()
+    await session.refresh(user_db)
+    return user_db
+
+
+async def create_conversation(
+    *,
+    session: AsyncSession,
+    conversation_create: ConversationCreate,
+    user_id: uuid.UUID,
+) -> Conversation:
+    conversation_db = Conversation.model_validate(
+        conversation_create, update={"user_id": user_id}
+    )
+    session.add(conversation_db)
+    await session.commit()
+    await session.refresh(conversation_db)
+    return conversation_db
+
+
+def touch_conversation(conversation_id: uuid.UUID) -> Any:
+    """Statement bumping a conversation's updated_at so incremental sync sees it."""
+    return (
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(updated_at=datetime.utcnow())
+    )
+
+
+def add_message(
+    session: AsyncSession, message_create: MessageCreate, conversation_id: uuid.UUID
+) -> Message:
+    message_db = Message.model_validate(
+        message_create, update={"conversation_id": conversation_id}
+    )
+    session.add(message_db)
+    if message_create.message_data is not None:
+        session.add(
+            MessageMetadata(message_id=message_db.id, data=message_create.message_data)
+        )
+    return message_db
+
+
+async def create_message(
+    *, session: AsyncSession, message_create: MessageCreate, conversation_id: uuid.UUID
+) -> Message:
+    message_db = add_message(session, message_create, conversation_id)
+    await session.commit()
+    await session.refresh(message_db)
+    return message_db
+
+
+async def create_chat_turn(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    user_message: MessageCreate,
+    assistant_message: MessageCreate,
+    conversation: Conversation | None = None,
+) -> tuple[Message, Message]:
+    """
+    Persist both messages of a chat turn in a single transaction.
+
+    The messages are written with one multi-row INSERT ... RETURNING instead of
+    an INSERT, COMMIT and refresh per message. A new conversation passed in is
+    flushed in the same transaction, otherwise the existing conversation's
+    updated_at is bumped so incremental sync picks it up. Raw message_data is
+    written to message_metadata in the same transaction.
+    """
+    if conversation is not None:
+        # Stamped as it is inserted, not when it was built before the model call
+        conversation.updated_at = datetime.utcnow()
+        session.add(conversation)
+    else:
+        await session.exec(touch_conversation(conversation_id))
+    rows = [
+        Message.model_validate(
+            message_create, update={"conversation_id": conversation_id}
+        ).model_dump()
+        for message_create in (user_message, assistant_message)
+    ]
+    result = await session.exec(
+        insert(Message).returning(Message, sort_by_parameter_order=True), params=rows
+    )
+    user_db, assistant_db = result.scalars().all()
+    metadata_rows = [
+        {"message_id": message_db.id, "data": message_create.message_data}
+        for message_db, message_create in (
+            (user_db, user_message),
+            (assistant_db, assistant_message),
+        )
+        if message_create.message_data is not None
+    ]
+    if metadata_rows:
+        await session.exec(insert(MessageMetadata), params=metadata_rows)
+    await session.commit()
+    return user_db, assistant_db
+
+
+async def create_pending_turn(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    user_message: MessageCreate,
+    worker_id: str | None = None,
+) -> tuple[ChatTurn, Message]:
+    """
+    Persist the user message of a turn and queue the turn, in one transaction.
+
+    Raises:
+        IntegrityError: The conversation already has an unfinished turn.
+    """
+    await session.exec(touch_conversation(conversation_id))
+    message_db = add_message(session, user_message, conversation_id)
+    await session.flush()
+    turn = ChatTurn(
+        conversation_id=conversation_id,
+        user_message_id=message_db.id,
+        worker_id=worker_id,
+    )
+    session.add(turn)
+    await session.commit()
+    return turn, message_db
+
+
+async def claim_chat_turn(
+    *,
+    session: AsyncSession,
+    turn_id: uuid.UUID | None = None,
+    stale_after: float | None = None,
+    worker_id: str | None = None,
+) -> ChatTurn | None:
+    """
+    Mark a pending turn as running and return it.
+
+    Without a turn ID the oldest pending turn is claimed. Turns locked by another
+    worker are skipped, so several workers can share the chat_turns table as a
+    queue. With ``stale_after``, turns left running for longer than that many
+    seconds, by a worker that has stopped, are claimed again. The turn records
+    ``worker_id`` as the worker running it.
+    """
+    claimable = ChatTurn.status == TurnStatus.pending
+    if stale_after is not None:
+        claimable = or_(
+            claimable,
+            and_(
+                ChatTurn.status == TurnStatus.running,
+                ChatTurn.started_at
+                < datetime.utcnow() - timedelta(seconds=stale_after),
+            ),
+        )
+    candidate = select(ChatTurn.id).where(claimable)
+    if turn_id is not None:
+        candidate = candidate.where(ChatTurn.id == turn_id)
+    candidate = (
+        candidate.order_by(ChatTurn.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(ChatTurn)
+        .where(ChatTurn.id == candidate.scalar_subquery())
+        .values(
+            status=TurnStatus.running,
+            started_at=datetime.utcnow(),
+            worker_id=worker_id,
+        )
+        .returning(ChatTurn)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.exec(statement)
+    turn = result.scalars().first()
+    await session.commit()
+    return turn
+
+
+async def complete_chat_turn(
+    *, session: AsyncSession, turn: ChatTurn, assistant_message: MessageCreate
+) -> Message | None:
+    """
+    Save the AI response of a running turn and mark the turn completed.
+
+    The turn is only completed while it is still running under the claim it was
+    run for. When it was failed or claimed again meanwhile, nothing is saved.
+
+    Returns:
+        Optional[Message]: The saved AI message, or None when the turn is no
+        longer held by this claim.
+    """
+    await session.exec(touch_conversation(turn.conversation_id))
+    message_db = add_message(session, assistant_message, turn.conversation_id)
+    await session.flush()
+    result = await session.exec(
+        update(ChatTurn)
+        .where(
+            ChatTurn.id == turn.id,
+            ChatTurn.status == TurnStatus.running,
+            ChatTurn.started_at == turn.started_at,
+        )
+        .values(
+            status=TurnStatus.completed,
+            assistant_message_id=message_db.id,
+            finished_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        await session.rollback()
+        return None
+    await session.commit()
+    return message_db
+
+
+async def fail_chat_turn(
+    *,
+    session: AsyncSession,
+    turn_id: uuid.UUID,
+    error: str,
+    started_at: datetime | None = None,
+) -> None:
+    """
+    Mark an unfinished turn failed with an error.
+
+    With ``started_at``, only while the turn is held by the claim started then.
+    """
+    statement = update(ChatTurn).where(
+        ChatTurn.id == turn_id,
+        ChatTurn.status.in_((TurnStatus.pending, TurnStatus.running)),
+    )
+    if started_at is not None:
+        statement = statement.where(ChatTurn.started_at == started_at)
+    await session.exec(
+        statement.values(
+            status=TurnStatus.failed,
+            error=error[:500],
+            finished_at=datetime.utcnow(),
+        ).execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def fail_stale_chat_turns(
+    *,
+    session: AsyncSession,
+    stale_after: float,
+    conversation_id: uuid.UUID | None = None,
+) -> int:
+    """
+    Mark turns left pending or running for longer than ``stale_after`` seconds
+    as failed, since the worker that queued them has stopped.
+
+    Returns:
+        int: The number of turns marked failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    stale = or_(
+        and_(ChatTurn.status == TurnStatus.pending, ChatTurn.created_at < cutoff),
+        and_(ChatTurn.status == TurnStatus.running, ChatTurn.started_at < cutoff),
+    )
+    statement = update(ChatTurn).where(stale)
+    if conversation_id is not None:
+        statement = statement.where(ChatTurn.conversation_id == conversation_id)
+    result = await session.exec(
+        statement.values(
+            status=TurnStatus.failed,
+            error="The turn was lost when its worker stopped",
+            finished_at=datetime.utcnow(),
+        ).execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def fail_worker_chat_turns(*, session: AsyncSession, worker_id: str) -> int:
+    """
+    Mark the unfinished turns of a worker as failed, when the worker stops.
+
+    Returns:
+        int: The number of turns marked failed.
+    """
+    result = await session.exec(
+        update(ChatTurn)
+        .where(
+            ChatTurn.worker_id == worker_id,
+            ChatTurn.status.in_((TurnStatus.pending, TurnStatus.running)),
+        )
+        .values(
+            status=TurnStatus.failed,
+            error="The turn was lost when its worker stopped",
+            finished_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def get_chat_turn(
+    *, session: AsyncSession, turn_id: uuid.UUID
+) -> ChatTurn | None:
+    """Get a turn by its ID, reading its current status from the database."""
+    return await session.get(ChatTurn, turn_id, populate_existing=True)
+
+
+async def get_turn_messages(*, session: AsyncSession, turn: ChatTurn) -> list[Message]:
+    """Get the user message and, once saved, the AI response of a turn."""
+    message_ids = [turn.user_message_id]
+    if turn.assistant_message_id is not None:
+        message_ids.append(turn.assistant_message_id)
+    statement = (
+        select(Message).where(Message.id.in_(message_ids)).order_by(Message.created_at)
+    )
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def get_conversation_by_id(
+    *, session: AsyncSession, conversation_id: uuid.UUID
+) -> Conversation | None:
+    """Get a conversation by its ID, without its messages.
+
+    A conversation already loaded by this session is returned without a query.
+    """
+    return await session.get(Conversation, conversation_id)
+
+
+async def get_message_page(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    limit: int,
+    before: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Message]:
+    """Get a page of a conversation's messages newest first.
+
+    ``before`` is the (created_at, id) of the oldest message of the previous
+    page, so pages are read from the (conversation_id, created_at, id) index.
+    """
+    statement = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .options(
+            load_only(Message.id, Message.role, Message.content, Message.created_at)
+        )
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit)
+    )
+    if before is not None:
+        statement = statement.where(
+            tuple_(Message.created_at, Message.id) < tuple_(*before)
+        )
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def get_messages_by_conversation_id(
+    *, session: AsyncSession, conversation_id: uuid.UUID
+) -> list[Message]:
+    """Get the role and content of a conversation's messages, oldest first."""
+    statement = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .options(load_only(Message.role, Message.content))
+        .order_by(Message.created_at)
+    )
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def get_conversations_by_user_id(
+    *,
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int | None = None,
+    before: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Conversation]:
+    """Get a user's conversations newest first, without their messages.
+
+    ``before`` is the (created_at, id) of the last conversation of the previous
+    page, so pages are read from the (user_id, created_at, id) index.
+    """
+    statement = (
+        select(Conversation)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc())
+    )
+    if before is not None:
+        statement = statement.where(
+            tuple_(Conversation.created_at, Conversation.id) < tuple_(*before)
+        )
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def get_messages_after(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    limit: int,
+    after: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Message]:
+    """Get a conversation's messages created after a position, oldest first."""
+    statement = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .options(
+            load_only(Message.id, Message.role, Message.content, Message.created_at)
+        )
+        .order_by(Message.created_at, Message.id)
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(
+            tuple_(Message.created_at, Message.id) > tuple_(*after)
+        )
+    result = await session.exec(statement)
+    return result.all()
+
+
+async def get_message_position(
+    *, session: AsyncSession, conversation_id: uuid.UUID, message_id: uuid.UUID
+) -> tuple[datetime, uuid.UUID] | None:
+    """Get the (created_at, id) of a message of a conversation."""
+    statement = select(Message.created_at, Message.id).where(
+        Message.id == message_id, Message.conversation_id == conversation_id
+    )
+    result = await session.exec(statement)
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def get_conversations_updated_since(
+    *,
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    since: tuple[datetime, uuid.UUID] | None = None,
+    until: datetime | None = None,
+) -> list[Conversation]:
+    """Get a user's conversations updated after a position, and before
+    ``until`` if given, oldest update first."""
+    statement = (
+        select(Conversation)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.updated_at, Conversation.id)
+        .limit(limit)
+    )
+    if since is not None:
+        statement = statement.where(
+            tuple_(Conversation.updated_at, Conversation.id) > tuple_(*since)
+        )
+    if until is not None:
+        statement = statement.where(Conversation.updated_at < until)
+    result = await session.exec(statement)
+    return result.all()
+
+
+def get_loaded(session: AsyncSession, model: type[Any], ident: uuid.UUID) -> Any | None:
+    """Get an object this session has already loaded, without a query.
+
+    A session lives for a single request, so its identity map serves as a
+    request-scoped cache of the rows the request has already read or written.
+    """
+    return session.identity_map.get(session.identity_key(model, ident))
+
+
+async def check_conversation_exists(
+    *, session: AsyncSession, conversation_id: uuid.UUID
+) -> bool:
+    """Check if a conversation exists by its ID."""
+    if get_loaded(session, Conversation, conversation_id) is not None:
+        return True
+    statement = select(exists().where(Conversation.id == conversation_id))
+    result = await session.exec(statement)
+    return result.one()
+
+
+async def get_conversation_owner(
+    *, session: AsyncSession, conversation_id: uuid.UUID
+) -> uuid.UUID | None:
+    """Get the ID of the user a conversation belongs to, if it exists."""
+    conversation = get_loaded(session, Conversation, conversation_id)
+    if conversation is not None:
+        return conversation.user_id
+    statement = select(Conversation.user_id).where(Conversation.id == conversation_id)
+    result = await session.exec(statement)
+    return result.first()
+
+
+async def check_user_exists(*, session: AsyncSession, user_id: uuid.UUID) -> bool:
+    """Check if a user exists by its ID."""
+    if get_loaded(session, User, user_id) is not None:
+        return True
+    statement = select(exists().where(User.id == user_id))
+    result = await session.exec(statement)
+    return result.one()
+
+
+async def get_user_name(*, session: AsyncSession, user_name: str) -> User | None:
+    """Get a user by their username."""
+    statement = select(User).where(User.username == user_name)
+    result = await session.exec(statement)
+    return result.first()
@@ -1,6 +1,7 @@
 import uuid
 
 # Removed unused import of List from typing
+from sqlalchemy import exists
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
@@ -9,6 +10,7 @@ from app.core.models import (
     ConversationCreate,
     Message,
     MessageCreate,
+    MessageMetadata,
     User,
     UserCreate,
 )
@@ -45,6 +47,10 @@ def create_message(
     )
     print(message_db)
     session.add(message_db)
+    if message_create.message_data is not None:
+        session.add(
+            MessageMetadata(message_id=message_db.id, data=message_create.message_data)
+        )
     session.commit()
     session.refresh(message_db)
     return message_db
@@ -73,14 +79,14 @@ def get_conversations_by_user_id(
 
 def check_conversation_exists(*, session: Session, conversation_id: uuid.UUID) -> bool:
     """Check if a conversation exists by its ID."""
-    statement = select(Conversation).where(Conversation.id == conversation_id)
-    return session.exec(statement).first() is not None
+    statement = select(exists().where(Conversation.id == conversation_id))
+    return session.exec(statement).one()
 
 
 def check_user_exists(*, session: Session, user_id: uuid.UUID) -> bool:
     """Check if a user exists by its ID."""
-    statement = select(User).where(User.id == user_id)
-    return session.exec(statement).first() is not None
+    statement = select(exists().where(User.id == user_id))
+    return session.exec(statement).one()
 
 
 def get_user_name(*, session: Session, user_name: str) -> User:
@@ -0,0 +1,91 @@
+"""In-process cache in front of the user and conversation lookups.
+
+Every chat request checks that its user or conversation exists, and those rows
+are created but never changed. Lookups that found a row are cached per worker
+for LOOKUP_CACHE_TTL_SECONDS. Misses are not cached, so a new row is seen
+straight away. Entries are never invalidated: a row deleted outside the app
+can be reported as existing until its entry expires.
+
+Password hashes are never cached, logins read them from the database.
+"""
+
+import uuid
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config.config import settings
+from app.core.cache import TTLCache
+from app.core.models import UserPublic
+from app.db import async_crud
+
+
+def build_cache() -> TTLCache:
+    return TTLCache(
+        maxsize=settings.LOOKUP_CACHE_MAX_SIZE, ttl=settings.LOOKUP_CACHE_TTL_SECONDS
+    )
+
+
+user_cache = build_cache()  # user ID -> True
+user_name_cache = build_cache()  # username -> public fields of the user
+conversation_cache = build_cache()  # conversation ID -> owner's user ID
+
+LOOKUP_CACHES = {
+    "users": user_cache,
+    "user_names": user_name_cache,
+    "conversations": conversation_cache,
+}
+
+
+def lookup_cache_stats() -> dict[str, dict[str, Any]]:
+    """Hit and miss counters of each lookup cache, for GET /v1/metrics."""
+    return {name: cache.stats() for name, cache in LOOKUP_CACHES.items()}
+
+
+def clear_lookup_caches() -> None:
+    for cache in LOOKUP_CACHES.values():
+        cache.clear()
+
+
+async def check_user_exists(*, session: AsyncSession, user_id: uuid.UUID) -> bool:
+    """Check if a user exists by its ID, through the lookup cache."""
+    if user_cache.get(user_id, False):
+        return True
+    exists = await async_crud.check_user_exists(session=session, user_id=user_id)
+    if exists:
+        user_cache.set(user_id, True)
+    return exists
+
+
+async def get_conversation_owner(
+    *, session: AsyncSession, conversation_id: uuid.UUID
+) -> uuid.UUID | None:
+    """Get the ID of the user a conversation belongs to, through the lookup cache."""
+    owner = conversation_cache.get(conversation_id)
+    if owner is not None:
+        return owner
+    owner = await async_crud.get_conversation_owner(
+        session=session, conversation_id=conversation_id
+    )
+    if owner is not None:
+        conversation_cache.set(conversation_id, owner)
+    return owner
+
+
+async def get_user_name(*, session: AsyncSession, user_name: str) -> UserPublic | None:
+    """Get the public fields of a user by their username, through the lookup
+    cache.
+
+    The cache holds the public fields rather than the ORM object, so the
+    password hash is never cached and each hit returns a new UserPublic.
+    """
+    data = user_name_cache.get(user_name)
+    if data is not None:
+        return UserPublic.model_validate(data)
+    user = await async_crud.get_user_name(session=session, user_name=user_name)
+    if user is None:
+        return None
+    public = UserPublic.model_validate(user)
+    user_name_cache.set(user_name, public.model_dump())
+    user_cache.set(user.id, True)
+    return public
@@ -0,0 +1,123 @@
+"""The psycopg connection pool of a worker process.
+
+Each worker opens a single pool, of at most DB_POOL_MAX_SIZE connections, by
+default its share of DB_CONNECTION_BUDGET. The LangGraph checkpointer and the async SQLModel engine both take their
+connections from it, so all workers together hold at most DB_CONNECTION_BUDGET
+connections. The pool is created on first use in the worker, never at import,
+so servers that import the app before forking workers (gunicorn --preload) do
+not share sockets between processes.
+"""
+
+import logging
+from typing import Any
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+_shared_pool: AsyncConnectionPool | None = None
+
+
+async def reset_connection(conn: AsyncConnection) -> None:
+    """Turn autocommit back on for connections returned by SQLAlchemy."""
+    if not conn.autocommit:
+        await conn.set_autocommit(True)
+
+
+def connection_kwargs() -> dict[str, Any]:
+    return {
+        # The checkpointer commits every statement on its own
+        "autocommit": True,
+        "prepare_threshold": (
+            settings.DB_PREPARE_THRESHOLD if settings.DB_PREPARED_STATEMENTS else None
+        ),
+    }
+
+
+def get_shared_pool() -> AsyncConnectionPool:
+    """The pool of this worker, created closed on first use."""
+    global _shared_pool  # noqa: PLW0603
+    if _shared_pool is None:
+        _shared_pool = AsyncConnectionPool(
+            conninfo=settings.PSYCOPG_CONNINFO,
+            min_size=min(settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE),
+            max_size=settings.DB_POOL_MAX_SIZE,
+            timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            max_idle=settings.DB_POOL_MAX_IDLE_SECONDS,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+            check=(
+                AsyncConnectionPool.check_connection
+                if settings.DB_POOL_CHECK_CONNECTIONS
+                else None
+            ),
+            open=False,
+            kwargs=connection_kwargs(),
+            reset=reset_connection,
+            # SQLAlchemy hands a connection back by closing it
+            close_returns=True,
+        )
+    return _shared_pool
+
+
+async def open_shared_pool() -> AsyncConnectionPool:
+    """Open the pool of this worker, unless it is open already."""
+    pool = get_shared_pool()
+    if pool.closed:
+        logger.info(
+            f"Opening database pool of {pool.min_size} to {pool.max_size} "
+            "connections..."
+        )
+    await pool.open()
+    return pool
+
+
+async def get_pooled_connection() -> AsyncConnection:
+    """
+    Borrow a connection from the pool of this worker, for the async engine.
+
+    Returns:
+        AsyncConnection: A connection, returned to the pool when closed.
+    """
+    pool = await open_shared_pool()
+    return await pool.getconn()
+
+
+async def close_shared_pool() -> None:
+    global _shared_pool
+    if _shared_pool is not None:
+        pool, _shared_pool = _shared_pool, None
+        await pool.close()
+        logger.info("Database pool closed.")
+
+
+def pool_stats() -> dict[str, Any] | None:
+    """
+    Get the usage counters of the pool of this worker.
+
+    Returns:
+        Optional[dict[str, Any]]: psycopg's pool statistics, such as the
+        connections in the pool and available, the requests waiting and the
+        total time spent waiting (requests_wait_ms) and using connections
+        (usage_ms), with the connections in use and the average wait per
+        request, or None when the pool is not open.
+    """
+    if _shared_pool is None or _shared_pool.closed:
+        return None
+    stats = _shared_pool.get_stats()
+    requests = stats.get("requests_num", 0)
+    return {
+        **stats,
+        "connections_in_use": stats["pool_size"] - stats["pool_available"],
+        "requests_wait_ms_avg": (
+            stats.get("requests_wait_ms", 0) / requests if requests else 0.0
+        ),
+    }
+
+
+def discard_shared_pool() -> None:
+    """Forget a pool inherited from a parent process, leaving its sockets alone."""
+    global _shared_pool  # noqa: PLW0603
+    _shared_pool = None
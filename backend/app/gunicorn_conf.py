@@ -0,0 +1,39 @@
+"""Gunicorn settings for running the API in several worker processes.
+
+From the backend directory (/app in the Docker image):
+
+    gunicorn app.main:app -c app/gunicorn_conf.py
+
+Every worker runs its own event loop, LangchainService and database pool, the
+pool sized to DB_CONNECTION_BUDGET divided by WEB_CONCURRENCY. The app is
+imported once in the master process and forked. Nothing connects to the
+database at import, each worker opens its pool in its lifespan, and post_fork
+drops any connection the master opened all the same.
+
+Set PROMETHEUS_MULTIPROC_DIR to an empty directory, cleared on every start, for
+/metrics to report the totals of all workers.
+"""
+
+from app.config.config import settings
+
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Answers are streamed for as long as the model takes
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    from app.core.dependencies import reset_after_fork  # noqa: PLC0415
+
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    from app.core.metrics import mark_worker_dead  # noqa: PLC0415
+
+    mark_worker_dead(worker.pid)
@@ -1,13 +1,23 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import router
+from app.api.utils import NEXT_CURSOR_HEADER, overloaded_response, run_chat_turn
 from app.config.config import settings
+from app.core.dependencies import async_engine, new_async_session
+from app.core.metrics import RequestLatencyMiddleware, metrics_response
+from app.core.security import shutdown_password_executor
+from app.db.async_crud import fail_worker_chat_turns
 from app.db.initial_setup import init_db
-from app.services.llm import LangchainService
+from app.db.pool import close_shared_pool
+from app.services.checkpoint_compaction import run_periodic_compaction
+from app.services.llm import LangchainService, ServiceOverloadedError
+from app.services.turn_queue import TurnQueue, worker_id
 
 logging.basicConfig(
     level=settings.LOG_LEVEL.upper(),  # Use level from your config
@@ -28,21 +38,68 @@ async def lifespan(app: FastAPI):
 
     try:
         # Initialize singleton instance
-        await LangchainService.get_instance()
+        instance = await LangchainService.get_instance()
         logger.info("Langchain singleton initialized successfully.")
     except Exception as e:
         logger.error(f"Error during Langchain initialization: {e}")
         raise
 
+    compaction_task = None
+    if settings.CHECKPOINT_COMPACTION_INTERVAL_SECONDS > 0 and instance.db_pool:
+        compaction_task = asyncio.create_task(
+            run_periodic_compaction(
+                instance.db_pool, settings.CHECKPOINT_COMPACTION_INTERVAL_SECONDS
+            )
+        )
+        logger.info("Checkpoint compaction task started.")
+
+    shared_queue = settings.TURN_QUEUE == "postgres"
+    app.state.turn_queue = TurnQueue(
+        partial(
+            run_chat_turn,
+            service=instance,
+            session_factory=new_async_session,
+            stale_after=settings.TURN_STALE_SECONDS if shared_queue else None,
+        ),
+        workers=settings.TURN_WORKERS,
+        max_size=settings.TURN_QUEUE_MAX_SIZE,
+        poll_interval=settings.TURN_POLL_INTERVAL_SECONDS,
+        shared=shared_queue,
+    )
+    if shared_queue:
+        # Pick up turns queued by other workers, or before a restart
+        app.state.turn_queue.start()
+
     yield
 
+    await app.state.turn_queue.stop()
+    if not shared_queue:
+        # Turns still queued in memory are lost, fail them so their
+        # conversations accept new turns
+        async with new_async_session() as db:
+            failed = await fail_worker_chat_turns(session=db, worker_id=worker_id())
+        if failed:
+            logger.warning(f"Marked {failed} chat turns lost on shutdown as failed.")
+
+    if compaction_task is not None:
+        compaction_task.cancel()
+        try:
+            await compaction_task
+        except asyncio.CancelledError:
+            pass
+
     # Cleanup singleton resources
     try:
         instance = await LangchainService.get_instance()
         await instance.close_pool()
+        instance.shutdown_model_executor()
     except Exception as e:
         logger.error(f"Error during Langchain cleanup: {e}")
 
+    await async_engine.dispose()
+    await close_shared_pool()
+    shutdown_password_executor()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -61,12 +118,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(RequestLatencyMiddleware)
+
+
+@app.exception_handler(ServiceOverloadedError)
+async def service_overloaded_handler(request: Request, exc: ServiceOverloadedError):
+    return overloaded_response(exc)
 
 
 # Include the router
 app.include_router(router)
 
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """Prometheus metrics: request latency per route, chat turn stage timings
+    and model token counters."""
+    return metrics_response()
+
+
 if __name__ == "__main__":
     import uvicorn
 
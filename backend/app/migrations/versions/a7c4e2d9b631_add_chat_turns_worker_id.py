@@ -0,0 +1,35 @@
+"""Add worker_id to chat_turns
+
+Revision ID: a7c4e2d9b631
+Revises: f3a9c61d2b84
+Create Date: 2026-10-18 21:12:05.318467
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c4e2d9b631"
+down_revision: str | None = "f3a9c61d2b84"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "chat_turns",
+        sa.Column(
+            "worker_id", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chat_turns", "worker_id")
@@ -0,0 +1,39 @@
+"""Add index for keyset pagination of a user's conversations
+
+Revision ID: b7e3c1d92f4a
+Revises: 4ac07ba2174a
+Create Date: 2026-10-18 09:12:40.118230
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3c1d92f4a"
+down_revision: str | None = "4ac07ba2174a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_conversations_user_id_created_at",
+        "conversations",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+    # The composite index starts with user_id, so it replaces the single column one
+    op.drop_index(op.f("ix_conversations_user_id"), table_name="conversations")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        op.f("ix_conversations_user_id"), "conversations", ["user_id"], unique=False
+    )
+    op.drop_index("ix_conversations_user_id_created_at", table_name="conversations")
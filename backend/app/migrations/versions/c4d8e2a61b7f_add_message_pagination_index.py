@@ -0,0 +1,42 @@
+"""Add index for reading a conversation's messages by page
+
+Revision ID: c4d8e2a61b7f
+Revises: b7e3c1d92f4a
+Create Date: 2026-10-18 10:03:11.527604
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d8e2a61b7f"
+down_revision: str | None = "b7e3c1d92f4a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_messages_conversation_id_created_at",
+        "messages",
+        ["conversation_id", "created_at", "id"],
+        unique=False,
+    )
+    # The composite index starts with conversation_id, so it replaces the single
+    # column one
+    op.drop_index(op.f("ix_messages_conversation_id"), table_name="messages")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        op.f("ix_messages_conversation_id"),
+        "messages",
+        ["conversation_id"],
+        unique=False,
+    )
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
@@ -0,0 +1,49 @@
+"""Add updated_at to conversations for incremental sync
+
+Revision ID: d91f5a3c7e20
+Revises: c4d8e2a61b7f
+Create Date: 2026-10-18 11:20:37.604118
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d91f5a3c7e20"
+down_revision: str | None = "c4d8e2a61b7f"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "conversations",
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    # Existing conversations were last updated by their latest message
+    op.execute("""
+        UPDATE conversations c
+        SET updated_at = coalesce(
+            (SELECT max(m.created_at) FROM messages m WHERE m.conversation_id = c.id),
+            c.created_at
+        )
+        """)
+    op.create_index(
+        "ix_conversations_user_id_updated_at",
+        "conversations",
+        ["user_id", "updated_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_conversations_user_id_updated_at", table_name="conversations")
+    op.drop_column("conversations", "updated_at")
@@ -0,0 +1,99 @@
+"""Move message_data to message_metadata and add compact message columns
+
+Revision ID: e6b2f7a4c815
+Revises: d91f5a3c7e20
+Create Date: 2026-10-18 13:02:14.218530
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e6b2f7a4c815"
+down_revision: str | None = "d91f5a3c7e20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_metadata",
+        sa.Column("message_id", sa.Uuid(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("message_id"),
+    )
+    op.add_column("messages", sa.Column("input_tokens", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("output_tokens", sa.Integer(), nullable=True))
+    op.add_column("messages", sa.Column("latency_ms", sa.Integer(), nullable=True))
+    op.add_column(
+        "messages",
+        sa.Column(
+            "stop_reason", sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True
+        ),
+    )
+    op.add_column(
+        "messages",
+        sa.Column(
+            "model_id", sqlmodel.sql.sqltypes.AutoString(length=200), nullable=True
+        ),
+    )
+    op.execute("""
+        INSERT INTO message_metadata (message_id, data)
+        SELECT id, message_data FROM messages WHERE message_data IS NOT NULL
+        """)
+    # Same fields as extract_message_stats, latencyMs is a list for streamed turns
+    op.execute("""
+        UPDATE messages m
+        SET input_tokens = (d.usage->>'input_tokens')::int,
+            output_tokens = (d.usage->>'output_tokens')::int,
+            latency_ms = CASE jsonb_typeof(d.meta->'metrics'->'latencyMs')
+                WHEN 'number' THEN (d.meta->'metrics'->>'latencyMs')::int
+                WHEN 'array' THEN (
+                    SELECT sum(value::int)
+                    FROM jsonb_array_elements_text(d.meta->'metrics'->'latencyMs')
+                )
+            END,
+            stop_reason = left(
+                coalesce(d.meta->>'stopReason', d.meta->>'finish_reason'), 50
+            ),
+            model_id = left(coalesce(d.meta->>'model_name', d.meta->>'model_id'), 200)
+        FROM (
+            SELECT id,
+                message_data->'usage_metadata' AS usage,
+                message_data->'response_metadata' AS meta
+            FROM messages
+            WHERE message_data IS NOT NULL
+        ) d
+        WHERE m.id = d.id
+        """)
+    op.drop_column("messages", "message_data")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "messages",
+        sa.Column(
+            "message_data", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.execute("""
+        UPDATE messages m
+        SET message_data = mm.data
+        FROM message_metadata mm
+        WHERE mm.message_id = m.id
+        """)
+    op.drop_column("messages", "model_id")
+    op.drop_column("messages", "stop_reason")
+    op.drop_column("messages", "latency_ms")
+    op.drop_column("messages", "output_tokens")
+    op.drop_column("messages", "input_tokens")
+    op.drop_table("message_metadata")
@@ -0,0 +1,71 @@
+"""Add chat_turns for chat turns generated in the background
+
+Revision ID: f3a9c61d2b84
+Revises: e6b2f7a4c815
+Create Date: 2026-10-18 16:41:37.502916
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a9c61d2b84"
+down_revision: str | None = "e6b2f7a4c815"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+turn_status = sa.Enum("pending", "running", "completed", "failed", name="turnstatus")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chat_turns",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("conversation_id", sa.Uuid(), nullable=False),
+        sa.Column("user_message_id", sa.Uuid(), nullable=False),
+        sa.Column("assistant_message_id", sa.Uuid(), nullable=True),
+        sa.Column("status", turn_status, nullable=False),
+        sa.Column("error", sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["conversation_id"], ["conversations.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_message_id"], ["messages.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["assistant_message_id"], ["messages.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ux_chat_turns_conversation_id_unfinished",
+        "chat_turns",
+        ["conversation_id"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+    op.create_index(
+        "ix_chat_turns_unfinished_created_at",
+        "chat_turns",
+        ["created_at"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_chat_turns_unfinished_created_at", table_name="chat_turns")
+    op.drop_index("ux_chat_turns_conversation_id_unfinished", table_name="chat_turns")
+    op.drop_table("chat_turns")
+    turn_status.drop(op.get_bind())
@@ -0,0 +1,18 @@
+"""
+Prompt used to fold older turns of long conversations into a rolling summary.
+"""
+
+CONVERSATION_SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and a health
+anxiety support assistant. The summary replaces the older turns of the
+conversation, so keep every detail the assistant needs to continue helping:
+
+- Symptoms the user described, with their duration, severity and changes
+- Medical history, medications and professional advice the user mentioned
+- Recurring worries and anxiety patterns the user showed
+- Suggestions the assistant already made and how the user responded
+
+Write in the third person, in plain prose, in at most 300 words. Update the
+existing summary with the new turns instead of starting over, and only return
+the updated summary.
+"""
@@ -1,9 +1,46 @@
+from collections.abc import Sequence
+from functools import lru_cache
 from typing import Optional
 
+from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from app.prompts.conversation_summary_prompt_template import (
+    CONVERSATION_SUMMARY_PROMPT,
+)
 from app.prompts.health_anxiety_prompt_template import HEALTH_ANXIETY_BASE_PROMPT
 
+DEFAULT_USER_CONTEXT = "No additional context provided."
+
+# The static part of the system prompt comes first so providers can cache it,
+# followed by the part that changes with the user context
+HEALTH_ANXIETY_STATIC_PROMPT = f"""
+            {HEALTH_ANXIETY_BASE_PROMPT}
+"""
+HEALTH_ANXIETY_CONTEXT_PROMPT = """    - User Context: {user_context}
+    """
+HEALTH_ANXIETY_SYSTEM_PROMPT = (
+    HEALTH_ANXIETY_STATIC_PROMPT + HEALTH_ANXIETY_CONTEXT_PROMPT
+)
+
+# Bedrock Converse content block marking the end of a cacheable prompt prefix
+BEDROCK_CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+# Built once at import, user_context is filled in when the prompt is rendered
+HEALTH_ANXIETY_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        ("system", HEALTH_ANXIETY_SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="messages"),
+    ]
+)
+
+CONVERSATION_SUMMARY_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        ("system", CONVERSATION_SUMMARY_PROMPT),
+        ("human", "Existing summary:\n{summary}\n\nNew turns:\n{transcript}"),
+    ]
+)
+
 
 def generate_health_anxiety_prompt(user_context: str | None = None):
     """
@@ -16,17 +53,94 @@ def generate_health_anxiety_prompt(user_context: str | None = None):
     Returns:
         The generated health anxiety prompt.
     """
-    prompt_template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                f"""
-            {HEALTH_ANXIETY_BASE_PROMPT}
-    - User Context: {user_context or "No additional context provided."}
-    """,
-            ),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
+    return HEALTH_ANXIETY_PROMPT_TEMPLATE.partial(
+        user_context=user_context or DEFAULT_USER_CONTEXT
+    )
+
+
+@lru_cache(maxsize=256)
+def render_health_anxiety_system_prompt(user_context: str | None = None) -> str:
+    """
+    Render the health anxiety system prompt for a user context.
+
+    Most turns share the same few contexts, so rendered prompts are cached.
+
+    Args:
+        user_context: Additional context provided by the user.
+
+    Returns:
+        The rendered system prompt.
+    """
+    return HEALTH_ANXIETY_SYSTEM_PROMPT.format(
+        user_context=user_context or DEFAULT_USER_CONTEXT
+    )
+
+
+def render_health_anxiety_context(user_context: str | None = None) -> str:
+    """
+    Render the part of the system prompt that depends on the user context.
+
+    Args:
+        user_context: Additional context provided by the user.
+
+    Returns:
+        The rendered user context section.
+    """
+    return HEALTH_ANXIETY_CONTEXT_PROMPT.format(
+        user_context=user_context or DEFAULT_USER_CONTEXT
     )
 
-    return prompt_template
+
+def with_cache_point(message: BaseMessage) -> BaseMessage:
+    """
+    Copy a message with a Bedrock cache point appended to its content.
+
+    Args:
+        message: The last message of the prefix to cache.
+
+    Returns:
+        The message with a cache point as its last content block.
+    """
+    content = message.content
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    return message.model_copy(update={"content": [*content, BEDROCK_CACHE_POINT]})
+
+
+def format_health_anxiety_messages(
+    messages: Sequence[BaseMessage],
+    user_context: str | None = None,
+    cache_prompt: bool = False,
+    cache_history: bool = False,
+) -> list[BaseMessage]:
+    """
+    Build the messages sent to the model: the system prompt, then the history.
+
+    Args:
+        messages: The conversation messages, ending with the current user message.
+        user_context: Additional context provided by the user.
+        cache_prompt: Add a Bedrock cache point after the static system prompt,
+            before the user context.
+        cache_history: Add a Bedrock cache point after the previous turn, so the
+            history up to the current user message is cached as well.
+
+    Returns:
+        The messages to send to the model.
+    """
+    if cache_prompt:
+        system_message = SystemMessage(
+            content=[
+                {"type": "text", "text": HEALTH_ANXIETY_STATIC_PROMPT},
+                BEDROCK_CACHE_POINT,
+                {"type": "text", "text": render_health_anxiety_context(user_context)},
+            ]
+        )
+    else:
+        system_message = SystemMessage(
+            content=render_health_anxiety_system_prompt(user_context)
+        )
+
+    messages = list(messages)
+    if cache_history and len(messages) > 1:
+        messages[-2] = with_cache_point(messages[-2])
+    return [system_message, *messages]
@@ -0,0 +1,261 @@
+"""Retention for the LangGraph checkpoint tables.
+
+The AsyncPostgresSaver stores a checkpoint for every step of every turn and a
+blob for every channel version, so the tables grow with each message even
+though only the latest checkpoint of a thread is needed to resume it.
+Compaction keeps the latest checkpoint of each thread and namespace, removes
+the writes and blobs it no longer references, and deletes every row of
+threads whose conversation no longer exists.
+
+Run once with ``python -m app.services.checkpoint_compaction`` from the backend
+directory, or periodically from the app by setting
+``CHECKPOINT_COMPACTION_INTERVAL_SECONDS``.
+"""
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from psycopg import AsyncConnection
+from psycopg.rows import tuple_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLES = ("checkpoint_writes", "checkpoint_blobs", "checkpoints")
+
+# Arbitrary key for the transaction-level advisory lock so that only one worker
+# compacts at a time
+COMPACTION_LOCK_ID = 7_316_425_001
+
+# Threads without a conversation whose latest checkpoint is older than the grace
+# period. New conversations are only inserted once the first turn completes, so
+# recent threads are left alone. Thread IDs are cast to match the primary key
+# of conversations, threads not named after a UUID are orphans.
+ORPHAN_THREADS_SQL = """
+SELECT c.thread_id
+FROM checkpoints c
+WHERE NOT EXISTS (
+    SELECT 1 FROM conversations v
+    WHERE v.id = CASE
+        WHEN c.thread_id ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$'
+        THEN c.thread_id::uuid
+    END
+)
+GROUP BY c.thread_id
+HAVING max((c.checkpoint->>'ts')::timestamptz)
+    < now() - make_interval(secs => %(grace_seconds)s)
+"""
+
+DELETE_THREADS_SQL = """
+WITH deleted AS (
+    DELETE FROM {table} t
+    WHERE t.thread_id = ANY(%(thread_ids)s)
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), coalesce(sum(size), 0) FROM deleted
+"""
+
+# Writes and blobs are only deleted when they are older than what the latest
+# checkpoint references, so rows written by a turn in progress are kept.
+DELETE_SUPERSEDED_WRITES_SQL = """
+WITH latest AS (
+    SELECT thread_id, checkpoint_ns, max(checkpoint_id) AS checkpoint_id
+    FROM checkpoints
+    GROUP BY thread_id, checkpoint_ns
+), deleted AS (
+    DELETE FROM checkpoint_writes w
+    USING latest l
+    WHERE w.thread_id = l.thread_id
+        AND w.checkpoint_ns = l.checkpoint_ns
+        AND w.checkpoint_id < l.checkpoint_id
+    RETURNING pg_column_size(w.*) AS size
+)
+SELECT count(*), coalesce(sum(size), 0) FROM deleted
+"""
+
+DELETE_SUPERSEDED_BLOBS_SQL = """
+WITH latest AS (
+    SELECT DISTINCT ON (thread_id, checkpoint_ns)
+        thread_id, checkpoint_ns, checkpoint->'channel_versions' AS versions
+    FROM checkpoints
+    ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC
+), deleted AS (
+    DELETE FROM checkpoint_blobs b
+    USING latest l
+    WHERE b.thread_id = l.thread_id
+        AND b.checkpoint_ns = l.checkpoint_ns
+        AND l.versions ? b.channel
+        AND b.version < l.versions->>b.channel
+    RETURNING pg_column_size(b.*) AS size
+)
+SELECT count(*), coalesce(sum(size), 0) FROM deleted
+"""
+
+DELETE_SUPERSEDED_CHECKPOINTS_SQL = """
+WITH latest AS (
+    SELECT thread_id, checkpoint_ns, max(checkpoint_id) AS checkpoint_id
+    FROM checkpoints
+    GROUP BY thread_id, checkpoint_ns
+), deleted AS (
+    DELETE FROM checkpoints c
+    USING latest l
+    WHERE c.thread_id = l.thread_id
+        AND c.checkpoint_ns = l.checkpoint_ns
+        AND c.checkpoint_id < l.checkpoint_id
+    RETURNING pg_column_size(c.*) AS size
+)
+SELECT count(*), coalesce(sum(size), 0) FROM deleted
+"""
+
+
+@dataclass
+class CompactionReport:
+    """Rows and bytes deleted by a compaction run, per checkpoint table.
+
+    Bytes are the size of the deleted rows. The space is reusable by Postgres
+    once the rows are vacuumed, which autovacuum takes care of.
+    """
+
+    orphaned_threads: int = 0
+    rows_deleted: dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(CHECKPOINT_TABLES, 0)
+    )
+    bytes_reclaimed: dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(CHECKPOINT_TABLES, 0)
+    )
+    skipped: bool = False
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows_deleted.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes_reclaimed.values())
+
+    def add(self, table: str, rows: int, size: int) -> None:
+        self.rows_deleted[table] += rows
+        self.bytes_reclaimed[table] += size
+
+    def summary(self) -> str:
+        if self.skipped:
+            return "Checkpoint compaction skipped, another run is in progress"
+        tables = ", ".join(
+            f"{table}: {self.rows_deleted[table]} rows / "
+            f"{self.bytes_reclaimed[table]} bytes"
+            for table in CHECKPOINT_TABLES
+        )
+        return (
+            f"Checkpoint compaction deleted {self.total_rows} rows "
+            f"({self.total_bytes} bytes) and {self.orphaned_threads} orphaned "
+            f"threads [{tables}]"
+        )
+
+
+async def compact_checkpoints(
+    conn: AsyncConnection,
+    orphan_grace_seconds: int | None = None,
+    dry_run: bool = False,
+) -> CompactionReport:
+    """
+    Compact the checkpoint tables in a single transaction.
+
+    Args:
+        conn (AsyncConnection): A psycopg connection to the checkpoint database.
+        orphan_grace_seconds (Optional[int]): How long a thread without a
+            conversation is kept. Defaults to CHECKPOINT_ORPHAN_GRACE_SECONDS.
+        dry_run (bool): Report what would be deleted and roll back.
+
+    Returns:
+        CompactionReport: The rows and bytes deleted per table.
+    """
+    if orphan_grace_seconds is None:
+        orphan_grace_seconds = settings.CHECKPOINT_ORPHAN_GRACE_SECONDS
+
+    report = CompactionReport()
+    async with (
+        conn.transaction(force_rollback=dry_run),
+        conn.cursor(row_factory=tuple_row) as cursor,
+    ):
+        await cursor.execute(
+            "SELECT pg_try_advisory_xact_lock(%s)", (COMPACTION_LOCK_ID,)
+        )
+        if not (await cursor.fetchone())[0]:
+            report.skipped = True
+            return report
+
+        await cursor.execute(
+            ORPHAN_THREADS_SQL, {"grace_seconds": orphan_grace_seconds}
+        )
+        thread_ids = [row[0] for row in await cursor.fetchall()]
+        report.orphaned_threads = len(thread_ids)
+        if thread_ids:
+            for table in CHECKPOINT_TABLES:
+                await cursor.execute(
+                    DELETE_THREADS_SQL.format(table=table), {"thread_ids": thread_ids}
+                )
+                report.add(table, *await cursor.fetchone())
+
+        for table, query in (
+            ("checkpoint_writes", DELETE_SUPERSEDED_WRITES_SQL),
+            ("checkpoint_blobs", DELETE_SUPERSEDED_BLOBS_SQL),
+            ("checkpoints", DELETE_SUPERSEDED_CHECKPOINTS_SQL),
+        ):
+            await cursor.execute(query)
+            report.add(table, *await cursor.fetchone())
+
+    logger.info(("[dry run] " if dry_run else "") + report.summary())
+    return report
+
+
+async def run_periodic_compaction(pool: AsyncConnectionPool, interval: float) -> None:
+    """
+    Compact the checkpoint tables every interval seconds until cancelled.
+
+    Args:
+        pool (AsyncConnectionPool): The pool used by the checkpointer.
+        interval (float): Seconds to wait between runs.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with pool.connection() as conn:
+                await compact_checkpoints(conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Checkpoint compaction failed: {e}", exc_info=True)
+
+
+async def main(argv: list[str] | None = None) -> CompactionReport:
+    parser = argparse.ArgumentParser(
+        description="Compact the LangGraph checkpoint tables."
+    )
+    parser.add_argument(
+        "--orphan-grace-seconds",
+        type=int,
+        default=settings.CHECKPOINT_ORPHAN_GRACE_SECONDS,
+        help="Keep threads without a conversation for this long",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be deleted without deleting it",
+    )
+    args = parser.parse_args(argv)
+
+    async with await AsyncConnection.connect(settings.PSYCOPG_CONNINFO) as conn:
+        report = await compact_checkpoints(
+            conn, orphan_grace_seconds=args.orphan_grace_seconds, dry_run=args.dry_run
+        )
+    print(("[dry run] " if args.dry_run else "") + report.summary())
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL.upper())
+    asyncio.run(main())
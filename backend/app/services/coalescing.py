@@ -0,0 +1,94 @@
+"""Coalescing of duplicate conversation turns and serialization per thread.
+
+Double submits from the frontend and client retries can run the same turn
+twice at once, and any two turns of a conversation running together would
+interleave their writes to the thread's LangGraph checkpoint. Identical
+concurrent calls share one in-flight call, and the turns of a thread run one
+at a time. Both only hold within a worker.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its result with duplicates."""
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await the in-flight call for a key, or start one.
+
+        The call runs in its own task, so it still completes for the other
+        callers when the one that started it is cancelled.
+
+        Args:
+            key (Hashable): Identifies duplicate calls.
+            call (Callable[[], Awaitable[T]]): Starts the call.
+
+        Returns:
+            T: The result of the shared call.
+        """
+        task = self.calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(call())
+            self.calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self.forget(key, done))
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            # Mark the error as retrieved when every caller has gone away
+            task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.calls),
+        }
+
+
+class KeyedLocks:
+    """One lock per key, dropped once no caller holds or awaits it."""
+
+    def __init__(self):
+        self.locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+        self.contended = 0
+
+    def __len__(self) -> int:
+        return len(self.locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        lock, users = self.locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        elif lock.locked():
+            self.contended += 1
+        self.locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self.locks[key]
+            if users == 1:
+                del self.locks[key]
+            else:
+                self.locks[key] = (lock, users - 1)
+
+    def stats(self) -> dict[str, Any]:
+        return {"held": len(self.locks), "contended": self.contended}
@@ -1,11 +1,32 @@
 import asyncio
+import hashlib
 import logging
-from collections.abc import Sequence
-from typing import Annotated, Any, Optional
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import copy_context
+from dataclasses import asdict, dataclass
+from typing import Annotated, Any, Optional, TypeVar
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ConnectionError as BotocoreConnectionError
+from botocore.exceptions import HTTPClientError
 from langchain.chat_models import init_chat_model
-from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    get_buffer_string,
+)
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langchain_core.runnables.config import run_in_executor
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
@@ -13,16 +34,369 @@ from psycopg_pool import AsyncConnectionPool
 from typing_extensions import TypedDict
 
 from app.config.config import settings
-from app.prompts.prompt_utils import generate_health_anxiety_prompt
+from app.core.metrics import observe_stage, record_llm_tokens, time_stage
+from app.db.pool import close_shared_pool, open_shared_pool
+from app.prompts.prompt_utils import (
+    CONVERSATION_SUMMARY_PROMPT_TEMPLATE,
+    format_health_anxiety_messages,
+)
+from app.services.coalescing import KeyedLocks, SingleFlight
+from app.services.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Error codes returned by Bedrock when a call is over quota or the model is busy
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+}
+# Error codes of Bedrock failures that a later attempt may not hit
+TRANSIENT_ERROR_CODES = {
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+# Connection failures and timeouts reaching Bedrock
+TRANSIENT_NETWORK_ERRORS = (BotocoreConnectionError, HTTPClientError)
+
 
 class State(TypedDict):
     """State for Langchain service"""
 
     messages: Annotated[Sequence[BaseMessage], add_messages]
     user_context: str | None
+    summary: str | None
+
+
+@dataclass
+class TokenUsage:
+    """Running totals of the token usage reported by the model."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def record(self, message: BaseMessage) -> None:
+        """Add the usage metadata of a model response to the totals."""
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+        details = usage.get("input_token_details") or {}
+        self.calls += 1
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+        self.cache_read_tokens += details.get("cache_read", 0)
+        self.cache_write_tokens += details.get("cache_creation", 0)
+
+    @property
+    def cache_read_ratio(self) -> float:
+        """Share of cached prompt tokens that were read rather than written."""
+        cached = self.cache_read_tokens + self.cache_write_tokens
+        return self.cache_read_tokens / cached if cached else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "cache_read_ratio": self.cache_read_ratio}
+
+
+class ServiceOverloadedError(Exception):
+    """A model call was not admitted, or stayed throttled after every retry."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def error_chain(error: BaseException | None) -> Iterator[BaseException]:
+    """Yield an error and the errors it was raised from."""
+    while error is not None:
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def error_code(error: BaseException) -> str | None:
+    """The code of a botocore ClientError, None for other errors."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return None
+    details = response.get("Error")
+    return details.get("Code") if isinstance(details, dict) else None
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Check whether an error, or an error it was raised from, is a throttle."""
+    return any(
+        error_code(e) in THROTTLING_ERROR_CODES
+        or type(e).__name__ in THROTTLING_ERROR_CODES
+        for e in error_chain(error)
+    )
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Check whether an error, or an error it was raised from, is a server or
+    network failure that a retry may not hit."""
+    return any(
+        error_code(e) in TRANSIENT_ERROR_CODES
+        or type(e).__name__ in TRANSIENT_ERROR_CODES
+        or isinstance(e, TRANSIENT_NETWORK_ERRORS)
+        for e in error_chain(error)
+    )
+
+
+class TokenBucket:
+    """Rate limit refilled continuously at a per-minute rate.
+
+    Reservations may take the bucket below zero, the caller then waits for the
+    returned delay, so calls are spread out rather than rejected.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.clock = clock
+        self.updated = clock()
+
+    def refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return how long to wait for it."""
+        self.refill()
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount: float) -> None:
+        self.refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class SchedulerStats:
+    """Counters of the model call scheduler."""
+
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    throttled: int = 0
+    transient_errors: int = 0
+    retries: int = 0
+    rate_limited_seconds: float = 0.0
+
+
+class ModelScheduler:
+    """Admission control and retries of throttled and failed model calls.
+
+    At most ``max_concurrency`` calls run at once. Calls beyond that queue for a
+    slot for up to ``max_wait`` seconds, and are rejected straight away once
+    ``max_queue`` calls are waiting. A call that holds a slot first waits for
+    the provisioned requests and tokens per minute, then is retried with
+    jittered exponential backoff while the provider throttles it or fails
+    transiently (server errors, model not ready, timeouts). The slot is kept
+    during the backoff so a throttled worker does not add load.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait: float,
+        max_retries: int = 0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.stats = SchedulerStats()
+        self.in_flight = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def check_capacity(self) -> None:
+        """Reject up front when the queue is already full."""
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.stats.rejected += 1
+            raise ServiceOverloadedError(
+                "Too many requests are waiting for the model",
+                retry_after=self.max_wait,
+            )
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a model call slot, waiting in the queue for one if needed."""
+        self.check_capacity()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except TimeoutError as e:
+            self.stats.timed_out += 1
+            raise ServiceOverloadedError(
+                "Timed out waiting for the model", retry_after=self.max_wait
+            ) from e
+        finally:
+            self.waiting -= 1
+        self.stats.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def wait_for_quota(self, estimated_tokens: int) -> None:
+        """Wait until the provisioned quota allows another call."""
+        buckets = [(self.requests, 1), (self.tokens, estimated_tokens)]
+        reserved = [(bucket, amount) for bucket, amount in buckets if bucket]
+        delay = max((bucket.reserve(amount) for bucket, amount in reserved), default=0)
+        if delay > self.max_wait:
+            for bucket, amount in reserved:
+                bucket.refund(amount)
+            self.stats.rejected += 1
+            raise ServiceOverloadedError(
+                "Provisioned model quota exhausted", retry_after=delay
+            )
+        if delay > 0:
+            self.stats.rate_limited_seconds += delay
+            await asyncio.sleep(delay)
+
+    async def run(
+        self, call: Callable[[], Awaitable[T]], estimated_tokens: int = 0
+    ) -> T:
+        """
+        Run a model call under admission control, retrying throttled calls and
+        transient failures.
+
+        Args:
+            call: Makes the model call, called again for each retry.
+            estimated_tokens: Input and output tokens the call may use, taken
+                from the tokens per minute quota.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            ServiceOverloadedError: The call was not admitted, or was still
+                throttled after the last retry.
+            Exception: The error of the call when it is neither a throttle nor
+                transient, or still failing transiently after the last retry.
+        """
+        async with self.admit():
+            attempt = 0
+            while True:
+                await self.wait_for_quota(estimated_tokens)
+                try:
+                    return await call()
+                except Exception as e:
+                    throttled = is_throttling_error(e)
+                    if not throttled and not is_transient_error(e):
+                        raise
+                    if throttled:
+                        self.stats.throttled += 1
+                    else:
+                        self.stats.transient_errors += 1
+                    delay = self.backoff(attempt)
+                    if attempt >= self.max_retries:
+                        if not throttled:
+                            raise
+                        raise ServiceOverloadedError(
+                            "The model is throttling requests",
+                            retry_after=max(delay, self.backoff_base),
+                        ) from e
+                    attempt += 1
+                    reason = "throttled" if throttled else f"failed: {e!s}"
+                    logger.warning(
+                        f"Model call {reason}, retrying in {delay:.2f}s "
+                        f"(attempt {attempt} of {self.max_retries})"
+                    )
+                    self.stats.retries += 1
+                    await asyncio.sleep(delay)
+
+    def settle_tokens(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Return the unused part of a token reservation once usage is known."""
+        if self.tokens and used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+
+def has_native_async(model: BaseChatModel) -> bool:
+    """Check whether a chat model implements async calls rather than running its
+    sync calls in an executor."""
+    return type(model)._agenerate is not BaseChatModel._agenerate
+
+
+def turn_starts(messages: Sequence[BaseMessage]) -> list[int]:
+    """Return the index of the user message starting each turn."""
+    return [
+        i for i, message in enumerate(messages) if isinstance(message, HumanMessage)
+    ]
+
+
+def select_last_turns(
+    messages: Sequence[BaseMessage], max_turns: int
+) -> list[BaseMessage]:
+    """Keep the messages of the last ``max_turns`` turns."""
+    starts = turn_starts(messages)
+    if max_turns <= 0 or len(starts) <= max_turns:
+        return list(messages)
+    return list(messages[starts[-max_turns] :])
+
+
+def select_token_budget(
+    messages: Sequence[BaseMessage], max_tokens: int
+) -> list[BaseMessage]:
+    """Keep the latest whole turns whose approximate token count fits the budget.
+
+    The current user message is always kept, even when it exceeds the budget.
+    """
+    if max_tokens <= 0 or not messages:
+        return list(messages)
+    trimmed = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+    )
+    return trimmed or [messages[-1]]
+
+
+class TimedPostgresSaver(AsyncPostgresSaver):
+    """Postgres checkpointer recording how long its writes take."""
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with time_stage("checkpoint_write"):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with time_stage("checkpoint_write"):
+            return await super().aput_writes(config, writes, task_id, task_path)
 
 
 class LangchainService:
@@ -32,6 +406,12 @@ class LangchainService:
     db_pool: AsyncConnectionPool | None = None
     model_id: str | None = None
     model_provider: str | None = None
+    model_scheduler: ModelScheduler | None = None
+    model_executor: ThreadPoolExecutor | None = None
+    response_cache: ResponseCache | None = None
+    token_usage: TokenUsage | None = None
+    turn_coalescer: SingleFlight | None = None
+    thread_locks: KeyedLocks | None = None
     initialized: bool = False
     instance: Optional["LangchainService"] = None
     creation_lock = asyncio.Lock()
@@ -49,6 +429,11 @@ class LangchainService:
             self._model = None
             self.db_pool = None
             self.initialized = False
+        if self.token_usage is None:
+            self.token_usage = TokenUsage()
+        if self.turn_coalescer is None:
+            self.turn_coalescer = SingleFlight()
+            self.thread_locks = KeyedLocks()
         LangchainService.initialize_bedrock_client()
 
     @classmethod
@@ -67,8 +452,99 @@ class LangchainService:
                     self.initialized = True
 
     async def conversation(
-        self, conversation_id: str, user_input: str, user_context: str | None = None
+        self,
+        conversation_id: str,
+        user_input: str,
+        user_context: str | None = None,
+        history: Sequence[BaseMessage] | None = None,
     ):
+        """Run a conversation turn and return the model response.
+
+        Identical concurrent turns of a conversation, such as a double submit,
+        share a single run and response. Different turns of a conversation run
+        one after the other.
+        """
+        turn_key = hashlib.sha256(f"{user_input}\0{user_context}".encode()).digest()
+        return await self.turn_coalescer.do(
+            (conversation_id, turn_key),
+            lambda: self.run_turn(conversation_id, user_input, user_context, history),
+        )
+
+    async def run_turn(
+        self,
+        conversation_id: str,
+        user_input: str,
+        user_context: str | None = None,
+        history: Sequence[BaseMessage] | None = None,
+    ) -> BaseMessage:
+        """Run a turn through the graph while holding its thread's lock."""
+        async with self.thread_locks.hold(conversation_id):
+            config = await self.get_thread_config(conversation_id)
+            response = await self.graph.ainvoke(
+                self.build_input(user_input, user_context, history), config=config
+            )
+        return response["messages"][-1]
+
+    async def stream_conversation(
+        self,
+        conversation_id: str,
+        user_input: str,
+        user_context: str | None = None,
+        history: Sequence[BaseMessage] | None = None,
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Stream the model response for a conversation turn token by token.
+
+        Yields the AIMessageChunk objects emitted by the model node as they arrive.
+        Adding the chunks together gives the complete response, which LangGraph
+        also persists in the checkpoint once the stream is exhausted. The
+        thread's lock is held until then, so other turns of the conversation
+        wait for the stream.
+        """
+        start = time.perf_counter()
+        async with self.thread_locks.hold(conversation_id):
+            config = await self.get_thread_config(conversation_id)
+            streamed = False
+            async for message, metadata in self.graph.astream(
+                self.build_input(user_input, user_context, history),
+                config=config,
+                stream_mode="messages",
+            ):
+                if metadata.get("langgraph_node") != "model":
+                    continue
+                if isinstance(message, AIMessageChunk):
+                    chunk = message
+                elif isinstance(message, AIMessage) and not streamed:
+                    # Answered without streaming tokens, e.g. from the response cache
+                    chunk = AIMessageChunk(
+                        content=message.content,
+                        id=message.id,
+                        response_metadata=message.response_metadata,
+                    )
+                else:
+                    continue
+                if not streamed:
+                    observe_stage("llm_first_token", time.perf_counter() - start)
+                    streamed = True
+                yield chunk
+
+    def build_input(
+        self,
+        user_input: str,
+        user_context: str | None,
+        history: Sequence[BaseMessage] | None,
+    ) -> dict[str, Any]:
+        """Build the graph input for a turn.
+
+        With a checkpointer the previous messages are restored from the thread's
+        checkpoint, so ``history`` is only prepended when running without one.
+        """
+        input_messages: list[BaseMessage] = [HumanMessage(content=user_input)]
+        if self.checkpointer is None and history:
+            input_messages = [*history, *input_messages]
+        return {"messages": input_messages, "user_context": user_context}
+
+    async def get_thread_config(self, conversation_id: str) -> dict[str, Any]:
+        """Ensure the graph is ready and build the run config for a conversation."""
         # Ensure singleton is initialized
         await self.ensure_initialized()
 
@@ -78,22 +554,25 @@ class LangchainService:
         # Check if checkpointer exists and log its type for debugging
         if self.checkpointer:
             logger.debug(f"Using checkpointer: {type(self.checkpointer)}")
-        else:
+        elif settings.CONVERSATION_HISTORY_SOURCE == "checkpointer":
             logger.error("Checkpointer is None during conversation call.")
             raise Exception("Checkpointer not available.")
 
-        config = {"configurable": {"thread_id": conversation_id}}
-        input_messages = [HumanMessage(content=user_input)]
-        response = await self.graph.ainvoke(
-            {"messages": input_messages, "user_context": user_context}, config=config
-        )
-        return response["messages"][-1]
+        return {"configurable": {"thread_id": conversation_id}}
 
     async def initialize_all_resources(self):
         try:
+            self.initialize_concurrency_limit()
+            self.initialize_response_cache()
             self.initialize_model()
-            await self.initialize_pool()
-            await self.initialize_checkpointer()
+            if settings.CONVERSATION_HISTORY_SOURCE == "checkpointer":
+                await self.initialize_pool()
+                await self.initialize_checkpointer()
+            else:
+                logger.info(
+                    "Conversation history is read from the messages table, "
+                    "skipping the checkpointer."
+                )
             self.initialize_graph()
         except Exception as e:
             logger.error(f"Error initializing Langchain components: {e!s}")
@@ -107,8 +586,18 @@ class LangchainService:
         self.model_provider = model_provider or settings.MODEL_PROVIDER
         try:
             self.initialize_bedrock_client()
+            model_kwargs = {}
+            if self.model_provider.startswith("bedrock"):
+                # boto3 keeps 10 pooled connections by default, which would cap
+                # concurrent Bedrock calls well below LLM_MAX_CONCURRENCY. Its
+                # own retries are off, the ModelScheduler retries throttled calls
+                # and transient failures
+                model_kwargs["config"] = Config(
+                    max_pool_connections=settings.LLM_MAX_CONCURRENCY,
+                    retries={"total_max_attempts": 1},
+                )
             self._model = init_chat_model(
-                model=self.model_id, model_provider=self.model_provider
+                model=self.model_id, model_provider=self.model_provider, **model_kwargs
             )
             logger.info(
                 f"Model initialized: {self.model_id} with provider: {self.model_provider}"
@@ -117,36 +606,54 @@ class LangchainService:
             logger.error(f"Error initializing model: {e!s}")
             raise
 
+    def initialize_concurrency_limit(self, max_concurrency: int | None = None):
+        """Bound the number of in-flight model calls for this worker.
+
+        Calls go through a ModelScheduler which queues, rate limits and retries
+        them. Chat models without native async support (such as
+        ChatBedrockConverse, which wraps boto3) are called in a thread pool of
+        their own sized to match the limit, leaving the event loop's default
+        executor to the rest of the app.
+        """
+        limit = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.model_scheduler = ModelScheduler(
+            max_concurrency=limit,
+            max_queue=settings.LLM_MAX_QUEUE,
+            max_wait=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base=settings.LLM_RETRY_BASE_SECONDS,
+            backoff_max=settings.LLM_RETRY_MAX_SECONDS,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        )
+        self.shutdown_model_executor()
+        self.model_executor = ThreadPoolExecutor(
+            max_workers=limit, thread_name_prefix="llm"
+        )
+        logger.info(f"Model concurrency limit set to {limit}")
+
+    def shutdown_model_executor(self):
+        """Stop the threads calling models without native async support."""
+        if self.model_executor is not None:
+            self.model_executor.shutdown(wait=False, cancel_futures=True)
+            self.model_executor = None
+
+    def initialize_response_cache(self):
+        """Create the first-turn response cache when it is enabled."""
+        if settings.RESPONSE_CACHE_ENABLED and self.response_cache is None:
+            self.response_cache = ResponseCache(
+                maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+                ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+                similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+            )
+            logger.info("First-turn response cache enabled.")
+
     async def initialize_pool(self):
         if self.db_pool is None:
             logger.info("Initializing database pool...")
             try:
-                connection_kwargs = {
-                    "autocommit": True,
-                    "prepare_threshold": 0,
-                }
-                # Use DATABASE_URL if available (production), otherwise build from components (local dev)
-                if settings.DATABASE_URL:
-                    # Convert postgresql+psycopg:// back to plain postgresql:// for psycopg3
-                    conninfo_str = settings.DATABASE_URL.replace(
-                        "postgresql+psycopg://", "postgresql://", 1
-                    )
-                else:
-                    conninfo_str = (
-                        f"dbname={settings.DB_NAME} "
-                        f"user={settings.DB_USERNAME} "
-                        f"password={settings.DB_PASSWORD} "
-                        f"host={settings.DB_HOST} "
-                        f"port={settings.DB_PORT}"
-                    )
-                self.db_pool = AsyncConnectionPool(
-                    conninfo=conninfo_str,
-                    max_size=20,
-                    max_idle=60,
-                    open=False,
-                    kwargs=connection_kwargs,
-                )
-                await self.db_pool.open()
+                # Shared with the async SQLModel engine of this worker
+                self.db_pool = await open_shared_pool()
                 logger.info("Database pool initialized.")
             except Exception as e:
                 logger.error(f"Error initializing database pool: {e!s}")
@@ -156,9 +663,8 @@ class LangchainService:
     async def close_pool(self):
         if self.db_pool:
             try:
-                await self.db_pool.close()
+                await close_shared_pool()
                 self.db_pool = None
-                logger.info("Database pool closed.")
             except Exception as e:
                 logger.error(f"Error closing database pool: {e!s}")
         else:
@@ -168,7 +674,7 @@ class LangchainService:
         if self.checkpointer is None and self.db_pool is not None:
             logger.info("Initializing checkpointer...")
             try:
-                self.checkpointer = AsyncPostgresSaver(self.db_pool)
+                self.checkpointer = TimedPostgresSaver(self.db_pool)
                 await self.checkpointer.setup()
                 logger.info("Checkpointer initialized.")
             except Exception as e:
@@ -176,12 +682,48 @@ class LangchainService:
                 self.checkpointer = None
                 raise
 
+    async def delete_conversation_state(self, conversation_id: str):
+        """Delete every checkpoint stored for a conversation's thread."""
+        if self.checkpointer is not None:
+            await self.checkpointer.adelete_thread(conversation_id)
+            logger.info(f"Deleted checkpoints for thread: {conversation_id}")
+
+    def uses_prompt_caching(self) -> bool:
+        """Whether Bedrock cache points are added to the prompt."""
+        return settings.BEDROCK_PROMPT_CACHING and (
+            self.model_provider or ""
+        ).startswith("bedrock")
+
+    def summarizes_history(self) -> bool:
+        """Whether older turns are folded into a rolling summary.
+
+        The summary lives in the thread's checkpoint, so without a checkpointer
+        the summary policy falls back to sending the last turns only.
+        """
+        return settings.HISTORY_POLICY == "summary" and self.checkpointer is not None
+
+    def select_history(self, messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+        """Apply the configured history policy to the messages sent to the model."""
+        policy = settings.HISTORY_POLICY
+        if policy == "last_turns" or (
+            policy == "summary" and not self.summarizes_history()
+        ):
+            return select_last_turns(messages, settings.HISTORY_MAX_TURNS)
+        if policy == "token_budget":
+            return select_token_budget(messages, settings.HISTORY_MAX_TOKENS)
+        return list(messages)
+
     def initialize_graph(self):
         """Initialize graph for singleton instance."""
         if self.graph is None:
             logger.info("Initializing graph...")
             workflow = StateGraph(state_schema=State)
-            workflow.add_edge(START, "model")
+            if self.summarizes_history():
+                workflow.add_node("summarize", self.summarize_history)
+                workflow.add_edge(START, "summarize")
+                workflow.add_edge("summarize", "model")
+            else:
+                workflow.add_edge(START, "model")
             workflow.add_node("model", self.call_model)
             workflow.add_edge("model", END)
             self.graph = workflow.compile(checkpointer=self.checkpointer)
@@ -189,20 +731,122 @@ class LangchainService:
         else:
             logger.info("Graph already initialized.")
 
-    def call_model(self, state: State):
-        """Call the model with the current state."""
+    def check_capacity(self) -> None:
+        """Raise ServiceOverloadedError when no more model calls can be queued.
+
+        Lets endpoints shed load before doing any work for the request.
+        """
+        if self.model_scheduler is not None:
+            self.model_scheduler.check_capacity()
+
+    async def invoke_model(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        """Call the model through the scheduler and record its token usage.
+
+        The tokens per minute quota is reserved for the prompt plus the maximum
+        response length, and the unused part is returned once usage is known.
+        """
+        estimated_tokens = count_tokens_approximately(messages) + settings.MAX_TOKENS
+
+        async def call() -> BaseMessage:
+            with time_stage("llm_call"):
+                if has_native_async(self._model):
+                    return await self._model.ainvoke(messages)
+                # The copied context carries the graph's callbacks to the thread
+                return await run_in_executor(
+                    self.model_executor,
+                    copy_context().run,
+                    self._model.invoke,
+                    messages,
+                )
+
+        response = await self.model_scheduler.run(call, estimated_tokens)
+        usage = getattr(response, "usage_metadata", None) or {}
+        self.model_scheduler.settle_tokens(
+            estimated_tokens, usage.get("total_tokens", estimated_tokens)
+        )
+        self.token_usage.record(response)
+        record_llm_tokens(response)
+        return response
+
+    def cacheable_question(self, state: State) -> str | None:
+        """Return the user's question when the turn can use the response cache.
+
+        Only the first turn of a conversation without user context qualifies,
+        since its answer depends on nothing but the question.
+        """
         messages = state["messages"]
+        if (
+            self.response_cache is None
+            or state.get("user_context")
+            or state.get("summary")
+            or len(messages) != 1
+            or not isinstance(messages[0], HumanMessage)
+        ):
+            return None
+        return messages[0].text()
+
+    async def call_model(self, state: State):
+        """Call the model with the current state."""
+        question = self.cacheable_question(state)
+        if question is not None:
+            cached = self.response_cache.get(question, self.model_id)
+            if cached is not None:
+                logger.info("Answered the first turn from the response cache")
+                return {"messages": [cached]}
+
+        messages = self.select_history(state["messages"])
+        if summary := state.get("summary"):
+            messages = [
+                SystemMessage(
+                    content=f"Summary of the earlier conversation:\n{summary}"
+                ),
+                *messages,
+            ]
         user_context = state.get("user_context", None)
-        prompt_template = generate_health_anxiety_prompt(user_context)
 
-        # Invoke the prompt template with the state to get a formatted prompt
-        formatted_prompt = prompt_template.invoke({"messages": messages})
+        # The system prompt is rendered once per user context and cached
+        caching = self.uses_prompt_caching()
+        formatted_prompt = format_health_anxiety_messages(
+            messages,
+            user_context,
+            cache_prompt=caching,
+            cache_history=caching and settings.BEDROCK_CACHE_HISTORY,
+        )
 
-        # Now pass the formatted prompt to the model
-        response = self._model.invoke(formatted_prompt)
+        # Now pass the formatted prompt to the model, waiting for a free slot
+        response = await self.invoke_model(formatted_prompt)
         logger.info(f"Model response: {response}")
+        if question is not None:
+            self.response_cache.put(question, self.model_id, response)
         return {"messages": [response]}
 
+    async def summarize_history(self, state: State):
+        """Fold the turns older than the history window into the rolling summary.
+
+        Older turns are only folded once HISTORY_SUMMARY_BATCH_TURNS of them have
+        accumulated, so the summary is updated once per batch rather than every
+        turn. Folded messages are removed from the state and the checkpoint.
+        """
+        messages = state["messages"]
+        starts = turn_starts(messages)
+        excess = len(starts) - max(settings.HISTORY_MAX_TURNS, 1)
+        if excess < max(settings.HISTORY_SUMMARY_BATCH_TURNS, 1):
+            return {}
+
+        folded = messages[: starts[excess]]
+        prompt = await CONVERSATION_SUMMARY_PROMPT_TEMPLATE.ainvoke(
+            {
+                "summary": state.get("summary") or "None yet.",
+                "transcript": get_buffer_string(folded),
+            }
+        )
+        response = await self.invoke_model(prompt.to_messages())
+        logger.info(f"Summarized {len(folded)} messages of the conversation")
+        return {
+            "summary": response.text(),
+            "messages": [RemoveMessage(id=message.id) for message in folded],
+        }
+
     @staticmethod
     def initialize_bedrock_client():
         try:
@@ -0,0 +1,170 @@
+"""Cache of model answers to the first turn of new conversations.
+
+Many conversations open with nearly the same question and no user context, and
+the answer to such a turn depends on nothing but the question and the model.
+Answers are cached per worker under a hash of the normalized question and the
+model ID, for RESPONSE_CACHE_TTL_SECONDS. With a
+RESPONSE_CACHE_SIMILARITY_THRESHOLD above 0, a question without an exact match
+also reuses the answer to the most similar cached question when the cosine
+similarity of their bag-of-words vectors reaches the threshold.
+"""
+
+import copy
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.core.cache import TTLCache
+
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+# Truncated or filtered answers are not worth repeating
+CACHEABLE_STOP_REASONS = {None, "end_turn", "stop"}
+
+# Response metadata kept with a cached answer. Latency and request IDs belong to
+# the original call only.
+CACHED_METADATA_KEYS = ("stopReason", "finish_reason", "model_name", "model_id")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase the words of a question, dropping punctuation and extra spaces."""
+    return " ".join(WORD_PATTERN.findall(text.casefold()))
+
+
+def embed(question: str) -> dict[str, float]:
+    """Unit length bag-of-words vector of a normalized question."""
+    counts = Counter(question.split())
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    return {word: count / norm for word, count in counts.items()}
+
+
+def cosine_similarity(a: dict[str, float], b: dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(word, 0.0) for word, weight in a.items())
+
+
+@dataclass
+class CachedResponse:
+    model_id: str | None
+    vector: dict[str, float]
+    content: str | list[Any]
+    response_metadata: dict[str, Any]
+
+
+class ResponseCache:
+    """Bounded TTL cache of first-turn answers, looked up by question."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        similarity_threshold: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.similarity_threshold = similarity_threshold
+        self.similar_hits = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def key(question: str, model_id: str | None) -> str:
+        return hashlib.sha256(f"{model_id}\0{question}".encode()).hexdigest()
+
+    def get(self, user_input: str, model_id: str | None) -> AIMessage | None:
+        """
+        Look up the cached answer to a question.
+
+        Args:
+            user_input (str): The content of the user's message.
+            model_id (Optional[str]): The model the answer must come from.
+
+        Returns:
+            Optional[AIMessage]: A new copy of the cached answer, or None.
+        """
+        question = normalize_question(user_input)
+        if not question:
+            return None
+        entry = self.entries.get(self.key(question, model_id))
+        if entry is None and self.similarity_threshold > 0:
+            entry = self.find_similar(embed(question), model_id)
+            if entry is not None:
+                self.similar_hits += 1
+        if entry is None:
+            return None
+        return AIMessage(
+            content=copy.deepcopy(entry.content),
+            response_metadata={**entry.response_metadata, "response_cache": "hit"},
+        )
+
+    def find_similar(
+        self, vector: dict[str, float], model_id: str | None
+    ) -> CachedResponse | None:
+        """Find the most similar cached question reaching the threshold."""
+        best, best_similarity = None, self.similarity_threshold
+        for entry in self.entries.values():
+            if entry.model_id != model_id:
+                continue
+            similarity = cosine_similarity(vector, entry.vector)
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        return best
+
+    def put(self, user_input: str, model_id: str | None, response: BaseMessage) -> None:
+        """
+        Cache the answer to a question, unless it was cut short or is empty.
+
+        Args:
+            user_input (str): The content of the user's message.
+            model_id (Optional[str]): The model that answered.
+            response (BaseMessage): The answer of the model.
+        """
+        question = normalize_question(user_input)
+        metadata = response.response_metadata or {}
+        stop_reason = metadata.get("stopReason") or metadata.get("finish_reason")
+        if (
+            not question
+            or not response.text().strip()
+            or stop_reason not in CACHEABLE_STOP_REASONS
+        ):
+            return
+        self.entries.set(
+            self.key(question, model_id),
+            CachedResponse(
+                model_id=model_id,
+                vector=embed(question),
+                content=copy.deepcopy(response.content),
+                response_metadata={
+                    key: metadata[key]
+                    for key in CACHED_METADATA_KEYS
+                    if key in metadata
+                },
+            ),
+        )
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.similar_hits = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit and miss counters, counting similar matches as hits."""
+        stats = self.entries.stats()
+        hits = stats["hits"] + self.similar_hits
+        misses = stats["misses"] - self.similar_hits
+        lookups = hits + misses
+        return {
+            **stats,
+            "hits": hits,
+            "misses": misses,
+            "similar_hits": self.similar_hits,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
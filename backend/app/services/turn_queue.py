@@ -0,0 +1,140 @@
+"""Background generation of chat turns queued by POST /v1/conversations/async.
+
+Worker tasks of this process run the queued turns, so no HTTP connection is
+held open while the model answers. With the in-process queue a worker only runs
+the turns queued through it, and turns still queued when it stops are lost:
+they are marked failed as the worker shuts down, by its worker ID.
+With TURN_QUEUE=postgres the chat_turns table is the queue: every worker claims
+the oldest pending turn with SELECT ... FOR UPDATE SKIP LOCKED, whichever
+worker queued it, and re-claims turns whose worker stopped mid-way.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.services.llm import ServiceOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Claims and runs the given turn, or the oldest pending one when None, and
+# returns the ID of the turn it ran, if any
+TurnProcessor = Callable[[uuid.UUID | None], Awaitable[uuid.UUID | None]]
+
+
+def worker_id() -> str:
+    """Identify this worker process, read on each call since workers are forked."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TurnQueue:
+    """Runs queued chat turns in worker tasks and wakes clients waiting on them."""
+
+    def __init__(
+        self,
+        process: TurnProcessor,
+        *,
+        workers: int,
+        max_size: int,
+        poll_interval: float,
+        shared: bool = False,
+    ):
+        self.process = process
+        self.workers = workers
+        self.max_size = max_size
+        self.poll_interval = poll_interval
+        self.shared = shared
+        self.pending: asyncio.Queue[uuid.UUID] = asyncio.Queue()
+        self.wake = asyncio.Event()
+        self.waiters: dict[uuid.UUID, set[asyncio.Event]] = {}
+        self.tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.processed = 0
+
+    def start(self) -> None:
+        """Start the worker tasks, unless they are already running."""
+        if not self.tasks:
+            work = self.claim_shared if self.shared else self.take_queued
+            self.tasks = [asyncio.create_task(work()) for _ in range(self.workers)]
+            logger.info(f"Started {self.workers} chat turn workers.")
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def check_capacity(self) -> None:
+        """Reject a new turn up front when the in-process queue is full."""
+        if not self.shared and self.pending.qsize() >= self.max_size:
+            raise ServiceOverloadedError(
+                "Too many chat turns are queued", retry_after=self.poll_interval
+            )
+
+    def enqueue(self, turn_id: uuid.UUID) -> None:
+        """Hand a turn, already saved as pending, to the workers."""
+        self.start()
+        if self.shared:
+            self.wake.set()
+        else:
+            self.pending.put_nowait(turn_id)
+
+    async def take_queued(self) -> None:
+        while True:
+            turn_id = await self.pending.get()
+            await self.run(turn_id)
+
+    async def claim_shared(self) -> None:
+        while True:
+            self.wake.clear()
+            if await self.run(None) is None:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    async def run(self, turn_id: uuid.UUID | None) -> uuid.UUID | None:
+        self.running += 1
+        try:
+            turn_id = await self.process(turn_id)
+        except Exception as e:
+            logger.error(f"Error running chat turn: {e}", exc_info=True)
+            return None
+        finally:
+            self.running -= 1
+        if turn_id is not None:
+            self.processed += 1
+            self.notify(turn_id)
+        return turn_id
+
+    def notify(self, turn_id: uuid.UUID) -> None:
+        for event in self.waiters.pop(turn_id, ()):
+            event.set()
+
+    async def wait(self, turn_id: uuid.UUID, timeout: float) -> None:
+        """Wait until this process finishes a turn, or for at most ``timeout``."""
+        event = asyncio.Event()
+        self.waiters.setdefault(turn_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+        finally:
+            waiters = self.waiters.get(turn_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self.waiters[turn_id]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self.tasks),
+            "queued": self.pending.qsize(),
+            "running": self.running,
+            "processed": self.processed,
+            "waiting_clients": sum(len(events) for events in self.waiters.values()),
+        }
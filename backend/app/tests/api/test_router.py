@@ -1,12 +1,32 @@
+import asyncio
+import json
 import uuid
-from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
 
-from fastapi import status
+import pytest
+from fastapi import WebSocketDisconnect, status
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from sqlmodel import Session, select
+
+from app.config.config import settings
+from app.core.dependencies import new_async_session
 
 # Import your models and schemas
-from app.core.models import Conversation, Message, MessageRole, User
+from app.core.models import (
+    ChatTurn,
+    Conversation,
+    Message,
+    MessageRole,
+    TurnStatus,
+    User,
+)
+from app.core.security import create_access_token
+from app.db.async_crud import fail_worker_chat_turns
+from app.services.llm import ServiceOverloadedError
+from app.services.turn_queue import TurnQueue, worker_id
 
 
 def test_start_conversation(
@@ -111,8 +131,8 @@ def test_start_conversation(
         db_conversation.messages[1].content == expected_ai_response["content"]
     ), f"Expected assistant message content {expected_ai_response['content']}, got {db_conversation.messages[1].content}"
     assert (
-        db_conversation.messages[1].message_data == message_data
-    ), f"Expected assistant message data {message_data}, got {db_conversation.messages[1].message_data}"
+        db_conversation.messages[1].message_metadata.data == message_data
+    ), f"Expected assistant message data {message_data}, got {db_conversation.messages[1].message_metadata.data}"
     print("Test passed: Response contains the expected conversation")
 
 
@@ -252,7 +272,7 @@ def test_continue_conversation(
     response = client.post(
         "/v1/conversations",
         json=request_data,
-        params={"conversation_id": conversation_id},
+        params={"conversation_id": conversation_id, "user_id": test_user.id},
     )
 
     # Assert
@@ -271,21 +291,21 @@ def test_continue_conversation(
     ), f"Expected title {conversation.title}, got {response_data['title']}"
     assert "messages" in response_data, "Expected messages in response"
     assert (
-        len(response_data["messages"]) == 3  # noqa: PLR2004
-    ), f"Expected 3 messages, got {len(response_data['messages'])}"
+        len(response_data["messages"]) == 2  # noqa: PLR2004
+    ), f"Expected only the 2 new messages, got {len(response_data['messages'])}"
 
     # Check user message details
-    assert response_data["messages"][1]["role"] == "user", "Expected user message role"
+    assert response_data["messages"][0]["role"] == "user", "Expected user message role"
     assert (
-        response_data["messages"][1]["content"] == request_data["content"]
-    ), f"Expected user message content {request_data['content']}, got {response_data['messages'][2]['content']}"
+        response_data["messages"][0]["content"] == request_data["content"]
+    ), f"Expected user message content {request_data['content']}, got {response_data['messages'][0]['content']}"
 
     # Check AI message details
     assert (
-        response_data["messages"][2]["role"] == "assistant"
+        response_data["messages"][1]["role"] == "assistant"
     ), "Expected assistant message role"
     assert (
-        response_data["messages"][2]["content"] == expected_ai_response["content"]
+        response_data["messages"][1]["content"] == expected_ai_response["content"]
     ), f"Expected assistant message content {expected_ai_response['content']}, got {response_data['messages'][1]['content']}"
 
     mock_langchain_service.conversation.assert_awaited_once()
@@ -320,7 +340,7 @@ def test_continue_conversation(
         db_conversation.messages[1].content == request_data["content"]
     ), f"Expected user message content {request_data['content']}, got {db_conversation.messages[0].content}"
     assert (
-        db_conversation.messages[1].message_data is None
+        db_conversation.messages[1].message_metadata is None
     ), "Expected user message data to be None"
     assert (
         db_conversation.messages[2].role == "assistant"
@@ -329,8 +349,9 @@ def test_continue_conversation(
         db_conversation.messages[2].content == expected_ai_response["content"]
     ), f"Expected assistant message content {expected_ai_response['content']}, got {db_conversation.messages[1].content}"
     assert (
-        db_conversation.messages[2].message_data == expected_ai_response_metadata
-    ), f"Expected assistant message data {expected_ai_response_metadata}, got {db_conversation.messages[2].message_data}"
+        db_conversation.messages[2].message_metadata.data
+        == expected_ai_response_metadata
+    ), f"Expected assistant message data {expected_ai_response_metadata}, got {db_conversation.messages[2].message_metadata.data}"
     print("Test passed: Response contains the expected conversation")
 
 
@@ -349,7 +370,9 @@ def test_continue_conversation_missing_conversation_id(
     request_data = {"content": user_content, "role": user_role}
 
     # Act
-    response = client.post("/v1/conversations", json=request_data)
+    response = client.post(
+        "/v1/conversations", json=request_data, params={"user_id": test_user.id}
+    )
 
     # Assert
     assert (
@@ -408,7 +431,7 @@ def test_continue_conversation_invalid_conversation_id(
     response = client.post(
         "/v1/conversations",
         json=request_data,
-        params={"conversation_id": invalid_conversation_id},
+        params={"conversation_id": invalid_conversation_id, "user_id": test_user.id},
     )
 
     # Assert
@@ -500,6 +523,133 @@ def test_get_conversations_no_conversations(
     print("Test passed: Response contains the expected 'no conversations found' error")
 
 
+def test_get_conversations_paginated(
+    client: TestClient, session: Session, test_user: User
+):
+    """
+    Test the /v1/conversations endpoint pages through conversations newest first.
+    """
+    # Arrange
+    created = datetime(2025, 1, 1)
+    conversations = [
+        Conversation(
+            user_id=test_user.id,
+            title=f"Conversation {i}",
+            created_at=created + timedelta(minutes=i // 2),
+        )
+        for i in range(5)
+    ]
+    session.add_all(conversations)
+    session.commit()
+    expected = sorted(conversations, key=lambda c: (c.created_at, c.id), reverse=True)
+
+    # Act
+    pages = []
+    cursor = None
+    while True:
+        params = {"user_id": test_user.id, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/v1/conversations", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    # Assert
+    assert [len(page) for page in pages] == [2, 2, 1]
+    ids = [item["id"] for page in pages for item in page]
+    assert ids == [str(c.id) for c in expected]
+    assert "messages" not in pages[0][0]
+
+
+def test_get_conversations_invalid_cursor(
+    client: TestClient, session: Session, test_user: User
+):
+    """
+    Test the /v1/conversations endpoint rejects a malformed cursor.
+    """
+    # Act
+    response = client.get(
+        "/v1/conversations", params={"user_id": test_user.id, "cursor": "not-a-cursor"}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_get_messages_paginated(client: TestClient, session: Session, test_user: User):
+    """
+    Test the /v1/messages endpoint pages through messages newest first.
+    """
+    # Arrange
+    conversation = Conversation(user_id=test_user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+    created = datetime(2025, 1, 1)
+    messages = [
+        Message(
+            conversation_id=conversation.id,
+            content=f"Message {i}",
+            role="user" if i % 2 == 0 else "assistant",
+            created_at=created + timedelta(seconds=i),
+        )
+        for i in range(5)
+    ]
+    session.add_all(messages)
+    session.commit()
+
+    # Act
+    first = client.get(
+        "/v1/messages",
+        params={
+            "conversation_id": conversation.id,
+            "user_id": test_user.id,
+            "limit": 3,
+        },
+    )
+    second = client.get(
+        "/v1/messages",
+        params={
+            "conversation_id": conversation.id,
+            "user_id": test_user.id,
+            "limit": 3,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+    )
+
+    # Assert
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert [m["content"] for m in first.json()] == [
+        "Message 4",
+        "Message 3",
+        "Message 2",
+    ]
+    assert [m["content"] for m in second.json()] == ["Message 1", "Message 0"]
+    assert "X-Next-Cursor" not in second.headers
+    assert "message_data" not in first.json()[0]
+
+
+def test_get_messages_conversation_not_found(
+    client: TestClient, session: Session, test_user: User
+):
+    """
+    Test the /v1/messages endpoint with a conversation that does not exist.
+    """
+    # Act
+    response = client.get(
+        "/v1/messages",
+        params={"conversation_id": uuid.uuid4(), "user_id": test_user.id},
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Conversation not found"
+
+
 def test_get_conversations_missing_user_id(client: TestClient, session: Session):
     """
     Test the /v1/conversations endpoint with a missing user_id parameter.
@@ -701,7 +851,7 @@ def test_continue_conversation_invalid_json_payload(
     response = client.post(
         "/v1/conversations",
         json=invalid_payload,
-        params={"conversation_id": conversation_id},
+        params={"conversation_id": conversation_id, "user_id": test_user.id},
     )
 
     # Assert
@@ -895,3 +1045,1097 @@ def test_start_conversation_langchain_not_initialized(
     print(
         "Test passed: Response contains the expected Langchain service error when not initialized"
     )
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Parse a server-sent event stream into (event, data) pairs."""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_start_conversation_stream(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """
+    Test the /v1/new/stream endpoint streams tokens and saves the AI response.
+    """
+    # Arrange
+    user_content = "Hello, how are you?"
+    request_data = {"content": user_content, "role": MessageRole.user}
+    expected_ai_content = f"AI response to:{user_content}"
+
+    # Act
+    response = client.post(
+        "/v1/new/stream", json=request_data, params={"user_id": test_user.id}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == [
+        "conversation",
+        "token",
+        "token",
+        "message",
+        "message",
+    ], f"Unexpected event sequence {events}"
+
+    conversation_data = events[0][1]
+    assert conversation_data["user_id"] == str(test_user.id)
+    assert conversation_data["title"] == user_content[:20]
+
+    tokens = "".join(data["content"] for event, data in events if event == "token")
+    assert tokens == expected_ai_content
+    assert events[-2][1]["role"] == "user"
+    assert events[-2][1]["content"] == user_content
+    assert events[-1][1]["role"] == "assistant"
+    assert events[-1][1]["content"] == expected_ai_content
+
+    mock_langchain_service.stream_conversation.assert_called_once()
+    call_args = mock_langchain_service.stream_conversation.call_args
+    assert call_args[0][0] == conversation_data["id"]
+    assert call_args[0][1] == user_content
+
+    db_conversation = session.get(Conversation, conversation_data["id"])
+    assert db_conversation is not None
+    assert len(db_conversation.messages) == 2  # noqa: PLR2004
+    assert db_conversation.messages[1].content == expected_ai_content
+    assert db_conversation.messages[1].message_metadata.data["type"] == "ai"
+
+
+def test_continue_conversation_stream(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """
+    Test the /v1/conversations/stream endpoint continues an existing conversation.
+    """
+    # Arrange
+    conversation = Conversation(user_id=test_user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    user_content = "Hello, I want to continue the conversation."
+    request_data = {"content": user_content, "role": "user"}
+
+    # Act
+    response = client.post(
+        "/v1/conversations/stream",
+        json=request_data,
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["token", "token", "message", "message"]
+    assert events[-2][1]["content"] == user_content
+    assert events[-1][1]["content"] == f"AI response to:{user_content}"
+
+    session.refresh(conversation)
+    assert [message.role for message in conversation.messages] == [
+        "user",
+        "assistant",
+    ]
+
+
+def test_continue_conversation_stream_invalid_conversation_id(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """
+    Test the /v1/conversations/stream endpoint rejects unknown conversations.
+    """
+    # Act
+    response = client.post(
+        "/v1/conversations/stream",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": str(uuid.uuid4()), "user_id": test_user.id},
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Conversation not found"
+    mock_langchain_service.stream_conversation.assert_not_called()
+
+
+def post_concurrently(client: TestClient, *requests: dict) -> list:
+    """Send POST requests to the app at the same time."""
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [executor.submit(client.post, **request) for request in requests]
+        return [future.result() for future in futures]
+
+
+def test_duplicate_turns_save_messages_once(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test identical concurrent turns share one response and one message pair."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    answer = mock_langchain_service.conversation.side_effect
+
+    async def slow_answer(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        return await answer(*args, **kwargs)
+
+    mock_langchain_service.conversation.side_effect = slow_answer
+    request = {
+        "url": "/v1/conversations",
+        "json": {"content": "Hello", "role": "user"},
+        "params": {"conversation_id": conversation.id, "user_id": test_user.id},
+    }
+
+    # Act
+    responses = post_concurrently(client, request, request)
+
+    # Assert
+    assert [response.status_code for response in responses] == [200, 200]
+    first, second = (response.json()["messages"] for response in responses)
+    assert first == second
+    mock_langchain_service.conversation.assert_awaited_once()
+    session.refresh(conversation)
+    assert len(conversation.messages) == 2  # noqa: PLR2004
+
+
+def test_duplicate_new_conversations_save_once(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test identical concurrent requests starting a conversation start one."""
+    # Arrange
+    answer = mock_langchain_service.conversation.side_effect
+
+    async def slow_answer(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        return await answer(*args, **kwargs)
+
+    mock_langchain_service.conversation.side_effect = slow_answer
+    request = {
+        "url": "/v1/new",
+        "json": {"content": "Hello", "role": "user"},
+        "params": {"user_id": test_user.id},
+    }
+
+    # Act
+    responses = post_concurrently(client, request, request)
+
+    # Assert
+    first, second = (response.json() for response in responses)
+    assert first["id"] == second["id"]
+    conversations = session.exec(
+        select(Conversation).where(Conversation.user_id == test_user.id)
+    ).all()
+    assert len(conversations) == 1
+    assert len(conversations[0].messages) == 2  # noqa: PLR2004
+
+
+def test_duplicate_streamed_turns_save_messages_once(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test a duplicate of a streaming turn gets the messages saved by the first."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+
+    async def slow_stream(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        yield AIMessageChunk(content="AI response")
+
+    mock_langchain_service.stream_conversation.side_effect = slow_stream
+    request = {
+        "url": "/v1/conversations/stream",
+        "json": {"content": "Hello", "role": "user"},
+        "params": {"conversation_id": conversation.id, "user_id": test_user.id},
+    }
+
+    # Act
+    responses = post_concurrently(client, request, request)
+
+    # Assert
+    streams = sorted(
+        ([event for event, _ in parse_sse(response.text)] for response in responses),
+        key=len,
+    )
+    assert streams == [["message", "message"], ["token", "message", "message"]]
+    mock_langchain_service.stream_conversation.assert_called_once()
+    session.refresh(conversation)
+    assert len(conversation.messages) == 2  # noqa: PLR2004
+
+
+def test_start_conversation_stream_langchain_error(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """
+    Test the /v1/new/stream endpoint reports errors in-band and saves nothing.
+    """
+
+    # Arrange
+    async def mock_stream_error(*args, **kwargs):
+        yield AIMessageChunk(content="partial")
+        raise Exception("Langchain service error")
+
+    mock_langchain_service.stream_conversation.side_effect = mock_stream_error
+
+    # Act
+    response = client.post(
+        "/v1/new/stream",
+        json={"content": "Hello, how are you?", "role": "user"},
+        params={"user_id": test_user.id},
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["conversation", "token", "error"]
+    assert "Langchain service error" in events[-1][1]["detail"]
+
+    conversation_id = events[0][1]["id"]
+    session.expire_all()
+    assert (
+        session.get(Conversation, conversation_id) is None
+    ), "Expected failed conversation not to be saved"
+
+
+def test_continue_conversation_history_from_messages(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+    monkeypatch,
+):
+    """
+    Test history is rehydrated from the messages table when it is the source of
+    truth, for both the regular and the streaming endpoint.
+    """
+    # Arrange
+    monkeypatch.setattr(settings, "CONVERSATION_HISTORY_SOURCE", "messages")
+    conversation = Conversation(user_id=test_user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    session.add(
+        Message(
+            conversation_id=conversation.id, content="Hello, how are you?", role="user"
+        )
+    )
+    session.commit()
+    request_data = {"content": "Tell me more", "role": "user"}
+
+    # Act
+    response = client.post(
+        "/v1/conversations",
+        json=request_data,
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+    stream_response = client.post(
+        "/v1/conversations/stream",
+        json=request_data,
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert stream_response.status_code == status.HTTP_200_OK
+    history = mock_langchain_service.conversation.call_args.kwargs["history"]
+    assert history == [HumanMessage(content="Hello, how are you?")]
+
+    stream_history = mock_langchain_service.stream_conversation.call_args.kwargs[
+        "history"
+    ]
+    assert [message.type for message in stream_history] == ["human", "human", "ai"]
+    assert stream_history[-1].content == "AI response to:Tell me more"
+
+
+def test_get_metrics(client: TestClient, mock_langchain_service: MagicMock):
+    """Test the metrics endpoint reports the model token usage."""
+    # Arrange
+    mock_langchain_service.token_usage.cache_read_tokens = 90
+    mock_langchain_service.token_usage.cache_write_tokens = 10
+
+    # Act
+    response = client.get("/v1/metrics")
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    llm_tokens = response.json()["llm_tokens"]
+    assert llm_tokens["cache_read_tokens"] == 90  # noqa: PLR2004
+    assert llm_tokens["cache_read_ratio"] == 0.9  # noqa: PLR2004
+
+
+def test_get_metrics_lookup_cache(
+    client: TestClient, session: Session, test_user: User
+):
+    """Test repeated lookups are served from the lookup cache and counted."""
+    # Arrange
+    conversation = Conversation(user_id=test_user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+
+    # Act
+    for _ in range(3):
+        client.get(
+            "/v1/messages",
+            params={"conversation_id": conversation.id, "user_id": test_user.id},
+        )
+    client.get(
+        "/v1/messages",
+        params={"conversation_id": uuid.uuid4(), "user_id": test_user.id},
+    )
+    response = client.get("/v1/metrics")
+
+    # Assert
+    conversations = response.json()["lookup_cache"]["conversations"]
+    assert conversations["hits"] == 2  # noqa: PLR2004
+    assert conversations["misses"] == 2  # noqa: PLR2004
+    assert conversations["size"] == 1
+
+
+def test_sync_messages_after_id(client: TestClient, session: Session, test_user: User):
+    """Test the sync endpoint only returns messages after the given message."""
+    # Arrange
+    conversation = Conversation(user_id=test_user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+    created = datetime(2025, 1, 1)
+    messages = [
+        Message(
+            conversation_id=conversation.id,
+            content=f"Message {i}",
+            role="user" if i % 2 == 0 else "assistant",
+            created_at=created + timedelta(seconds=i),
+        )
+        for i in range(4)
+    ]
+    session.add_all(messages)
+    session.commit()
+
+    # Act
+    response = client.get(
+        "/v1/sync/messages",
+        params={
+            "conversation_id": conversation.id,
+            "user_id": test_user.id,
+            "after_id": messages[1].id,
+        },
+    )
+    up_to_date = client.get(
+        "/v1/sync/messages",
+        params={
+            "conversation_id": conversation.id,
+            "user_id": test_user.id,
+            "after_id": messages[3].id,
+        },
+    )
+    unknown = client.get(
+        "/v1/sync/messages",
+        params={
+            "conversation_id": conversation.id,
+            "user_id": test_user.id,
+            "after_id": uuid.uuid4(),
+        },
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert [m["content"] for m in response.json()["messages"]] == [
+        "Message 2",
+        "Message 3",
+    ]
+    assert response.json()["has_more"] is False
+    assert up_to_date.json()["messages"] == []
+    assert unknown.status_code == status.HTTP_404_NOT_FOUND
+
+
+@patch.object(settings, "SYNC_SAFETY_WINDOW_SECONDS", 0)
+def test_sync_conversations_since_cursor(
+    client: TestClient, session: Session, test_user: User
+):
+    """Test the sync cursor only returns conversations updated since the last sync."""
+    # Arrange
+    updated = datetime(2025, 1, 1)
+    conversations = [
+        Conversation(
+            user_id=test_user.id,
+            title=f"Conversation {i}",
+            updated_at=updated + timedelta(minutes=i),
+        )
+        for i in range(3)
+    ]
+    session.add_all(conversations)
+    session.commit()
+    first_sync = client.get(
+        "/v1/sync/conversations", params={"user_id": test_user.id, "limit": 2}
+    ).json()
+    second_sync = client.get(
+        "/v1/sync/conversations",
+        params={"user_id": test_user.id, "cursor": first_sync["cursor"]},
+    ).json()
+
+    # Act
+    client.post(
+        "/v1/conversations",
+        json={"content": "Any news?", "role": "user"},
+        params={"conversation_id": conversations[0].id, "user_id": test_user.id},
+    )
+    third_sync = client.get(
+        "/v1/sync/conversations",
+        params={"user_id": test_user.id, "cursor": second_sync["cursor"]},
+    ).json()
+    idle_sync = client.get(
+        "/v1/sync/conversations",
+        params={"user_id": test_user.id, "cursor": third_sync["cursor"]},
+    ).json()
+
+    # Assert
+    assert [c["title"] for c in first_sync["conversations"]] == [
+        "Conversation 0",
+        "Conversation 1",
+    ]
+    assert first_sync["has_more"] is True
+    assert [c["title"] for c in second_sync["conversations"]] == ["Conversation 2"]
+    assert [c["title"] for c in third_sync["conversations"]] == ["Conversation 0"]
+    assert idle_sync["conversations"] == []
+    assert idle_sync["cursor"] == third_sync["cursor"]
+
+
+def test_sync_conversations_keeps_late_commits(
+    client: TestClient, session: Session, test_user: User
+):
+    """Test an update committed after a sync, with an earlier updated_at than
+    the newest update seen by that sync, is still returned by the next one."""
+    # Arrange
+    now = datetime.utcnow()
+    settled = Conversation(
+        user_id=test_user.id, title="Settled", updated_at=now - timedelta(minutes=1)
+    )
+    recent = Conversation(
+        user_id=test_user.id, title="Recent", updated_at=now - timedelta(seconds=1)
+    )
+    session.add_all([settled, recent])
+    session.commit()
+    params = {"user_id": test_user.id}
+    first_sync = client.get("/v1/sync/conversations", params=params).json()
+
+    # Act
+    late = Conversation(
+        user_id=test_user.id, title="Late", updated_at=now - timedelta(seconds=2)
+    )
+    session.add(late)
+    session.commit()
+    with patch.object(settings, "SYNC_SAFETY_WINDOW_SECONDS", 0):
+        second_sync = client.get(
+            "/v1/sync/conversations",
+            params={**params, "cursor": first_sync["cursor"]},
+        ).json()
+
+    # Assert
+    assert [c["title"] for c in first_sync["conversations"]] == ["Settled"]
+    assert [c["title"] for c in second_sync["conversations"]] == ["Late", "Recent"]
+
+
+def test_access_token_authenticates_without_user_lookup(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test a bearer token replaces user_id and skips the user lookup."""
+    # Arrange
+    login = client.post(
+        "/v1/token", data={"username": "testuser", "password": "hashedpassword"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Act
+    with patch("app.core.dependencies.check_user_exists") as mock_check:
+        response = client.post(
+            "/v1/new", json={"content": "Hello", "role": "user"}, headers=headers
+        )
+        conversations = client.get("/v1/conversations", headers=headers)
+
+    # Assert
+    assert login.status_code == status.HTTP_200_OK
+    assert login.json()["token_type"] == "bearer"
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["user_id"] == str(test_user.id)
+    assert [c["id"] for c in conversations.json()] == [response.json()["id"]]
+    mock_check.assert_not_called()
+
+
+def test_access_token_rejected(client: TestClient, session: Session, test_user: User):
+    """Test bad credentials, invalid tokens and another user's ID are rejected."""
+    # Arrange
+    token = create_access_token(test_user.id)
+
+    # Act
+    wrong_password = client.post(
+        "/v1/token", data={"username": "testuser", "password": "wrong"}
+    )
+    invalid_token = client.get(
+        "/v1/conversations", headers={"Authorization": "Bearer not-a-token"}
+    )
+    other_user = client.get(
+        "/v1/conversations",
+        params={"user_id": uuid.uuid4()},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    # Assert
+    assert wrong_password.status_code == status.HTTP_401_UNAUTHORIZED
+    assert invalid_token.status_code == status.HTTP_401_UNAUTHORIZED
+    assert invalid_token.headers["WWW-Authenticate"] == "Bearer"
+    assert other_user.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_overloaded_model_returns_429(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test requests the model scheduler rejects get a 429 with Retry-After."""
+    # Arrange
+    mock_langchain_service.conversation.side_effect = ServiceOverloadedError(
+        "The model is throttling requests", retry_after=2.5
+    )
+    request_data = {"content": "Hello", "role": "user"}
+
+    # Act
+    response = client.post(
+        "/v1/new", json=request_data, params={"user_id": test_user.id}
+    )
+    mock_langchain_service.check_capacity.side_effect = ServiceOverloadedError(
+        "Too many requests are waiting for the model", retry_after=30
+    )
+    stream = client.post(
+        "/v1/new/stream", json=request_data, params={"user_id": test_user.id}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "3"
+    assert "throttling" in response.json()["detail"]
+    assert stream.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert stream.headers["Retry-After"] == "30"
+    assert session.exec(select(Conversation)).all() == []
+
+
+def create_conversation(session: Session, user: User) -> Conversation:
+    conversation = Conversation(user_id=user.id, title="Test Conversation")
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    return conversation
+
+
+@pytest.mark.parametrize(
+    "turn_queue", [False, True], ids=["memory", "postgres"], indirect=True
+)
+def test_queue_conversation_turn(
+    client: TestClient,
+    session: Session,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a queued turn returns 202 at once and completes in the background."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    user_content = "Is it a tumor?"
+
+    # Act
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": user_content, "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+    turn = response.json()
+    polled = client.get(
+        response.headers["Location"], params={"wait": 5, "user_id": test_user.id}
+    )
+
+    # Assert
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.headers["Location"] == f"/v1/turns/{turn['id']}"
+    assert turn["status"] == TurnStatus.pending
+    assert [message["content"] for message in turn["messages"]] == [user_content]
+
+    assert polled.status_code == status.HTTP_200_OK
+    completed = polled.json()
+    assert completed["status"] == TurnStatus.completed
+    assert completed["finished_at"] is not None
+    assert [message["content"] for message in completed["messages"]] == [
+        user_content,
+        f"AI response to:{user_content}",
+    ]
+    session.refresh(conversation)
+    assert [message.role for message in conversation.messages] == [
+        "user",
+        "assistant",
+    ]
+    assert turn_queue.stats()["processed"] == 1
+
+
+def test_queue_conversation_turn_one_at_a_time(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a conversation rejects a new turn while one is in progress."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    request_data = {"content": "Hello", "role": "user"}
+    params = {"conversation_id": conversation.id, "user_id": test_user.id}
+    answer = mock_langchain_service.conversation.side_effect
+
+    async def slow_conversation(*args, **kwargs):
+        await asyncio.sleep(0.2)
+        return await answer(*args, **kwargs)
+
+    mock_langchain_service.conversation.side_effect = slow_conversation
+
+    # Act
+    first = client.post("/v1/conversations/async", json=request_data, params=params)
+    second = client.post("/v1/conversations/async", json=request_data, params=params)
+    polled = client.get(
+        f"/v1/turns/{first.json()['id']}", params={"wait": 5, "user_id": test_user.id}
+    )
+    third = client.post("/v1/conversations/async", json=request_data, params=params)
+
+    # Assert
+    assert first.status_code == status.HTTP_202_ACCEPTED
+    assert second.status_code == status.HTTP_409_CONFLICT
+    assert polled.json()["status"] == TurnStatus.completed
+    assert third.status_code == status.HTTP_202_ACCEPTED
+
+
+def test_queued_turn_failure(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a turn whose AI response fails is reported as failed when polled."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    mock_langchain_service.conversation.side_effect = Exception("Model unavailable")
+
+    # Act
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+    polled = client.get(
+        f"/v1/turns/{response.json()['id']}",
+        params={"wait": 5, "user_id": test_user.id},
+    )
+
+    # Assert
+    failed = polled.json()
+    assert failed["status"] == TurnStatus.failed
+    assert "Model unavailable" in failed["error"]
+    assert [message["role"] for message in failed["messages"]] == ["user"]
+
+
+def wait_for_turn_status(
+    client: TestClient, turn_url: str, user: User, turn_status: str
+) -> dict:
+    """Poll a turn for up to 5 seconds until it has the given status."""
+    for _ in range(500):
+        turn = client.get(turn_url, params={"user_id": user.id}).json()
+        if turn["status"] == turn_status:
+            return turn
+        client.portal.call(asyncio.sleep, 0.01)
+    pytest.fail(f"The turn is still {turn['status']}, not {turn_status}")
+
+
+def test_stopped_worker_fails_running_turn(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a turn cancelled by a stopping worker is failed, not left running."""
+
+    # Arrange
+    async def never_answer(*args, **kwargs):
+        await asyncio.Event().wait()
+
+    conversation = create_conversation(session, test_user)
+    mock_langchain_service.conversation.side_effect = never_answer
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+    turn_url = f"/v1/turns/{response.json()['id']}"
+    wait_for_turn_status(client, turn_url, test_user, TurnStatus.running)
+
+    # Act
+    client.portal.call(turn_queue.stop)
+    polled = client.get(turn_url, params={"user_id": test_user.id})
+
+    # Assert
+    assert polled.json()["status"] == TurnStatus.failed
+    assert "cancelled" in polled.json()["error"]
+
+
+def test_response_of_failed_turn_is_discarded(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a response arriving after its turn was failed is not saved."""
+    # Arrange
+    release: dict[str, asyncio.Event] = {}
+    answer = mock_langchain_service.conversation.side_effect
+
+    async def slow_answer(*args, **kwargs):
+        release["event"] = asyncio.Event()
+        await release["event"].wait()
+        return await answer(*args, **kwargs)
+
+    conversation = create_conversation(session, test_user)
+    mock_langchain_service.conversation.side_effect = slow_answer
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+    turn_url = f"/v1/turns/{response.json()['id']}"
+    wait_for_turn_status(client, turn_url, test_user, TurnStatus.running)
+    turn = session.get(ChatTurn, uuid.UUID(response.json()["id"]))
+    turn.status = TurnStatus.failed
+    session.add(turn)
+    session.commit()
+
+    # Act
+    client.portal.call(release["event"].set)
+    for _ in range(500):
+        if turn_queue.stats()["processed"]:
+            break
+        client.portal.call(asyncio.sleep, 0.01)
+
+    # Assert
+    messages = client.get(
+        "/v1/messages",
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    ).json()
+    assert (
+        client.get(turn_url, params={"user_id": test_user.id}).json()["status"]
+        == TurnStatus.failed
+    )
+    assert [message["role"] for message in messages] == [MessageRole.user]
+
+
+def test_stopping_worker_fails_its_queued_turns(
+    client: TestClient,
+    session: Session,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test the in-process turns of a worker are failed when it shuts down."""
+
+    # Arrange
+    async def fail_own_turns() -> int:
+        async with new_async_session() as db:
+            return await fail_worker_chat_turns(session=db, worker_id=worker_id())
+
+    conversation = create_conversation(session, test_user)
+    turn_queue.workers = 0  # Nothing runs the queued turn
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+
+    # Act
+    failed = client.portal.call(fail_own_turns)
+
+    # Assert
+    assert failed == 1
+    polled = client.get(
+        f"/v1/turns/{response.json()['id']}", params={"user_id": test_user.id}
+    ).json()
+    assert polled["status"] == TurnStatus.failed
+    assert polled["error"] == "The turn was lost when its worker stopped"
+
+
+def test_queue_turn_after_lost_turn(
+    client: TestClient,
+    session: Session,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a turn lost with the in-process queue of a stopped worker is failed
+    once stale, instead of blocking its conversation."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    turn_queue.workers = 0  # Nothing runs the queued turns
+    request_data = {"content": "Hello", "role": "user"}
+    params = {"conversation_id": conversation.id, "user_id": test_user.id}
+    lost = client.post("/v1/conversations/async", json=request_data, params=params)
+    turn = session.get(ChatTurn, uuid.UUID(lost.json()["id"]))
+
+    # Act
+    blocked = client.post("/v1/conversations/async", json=request_data, params=params)
+    turn.created_at -= timedelta(seconds=settings.TURN_STALE_SECONDS + 1)
+    session.add(turn)
+    session.commit()
+    queued = client.post("/v1/conversations/async", json=request_data, params=params)
+
+    # Assert
+    assert blocked.status_code == status.HTTP_409_CONFLICT
+    assert queued.status_code == status.HTTP_202_ACCEPTED
+    assert (
+        client.get(f"/v1/turns/{turn.id}", params={"user_id": test_user.id}).json()[
+            "status"
+        ]
+        == TurnStatus.failed
+    )
+
+
+def test_conversations_of_other_users_are_not_found(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test a user cannot read, continue or poll another user's conversation."""
+    # Arrange
+    other_user = User(username="other", email="other-email", password_hash="hash")
+    session.add(other_user)
+    session.commit()
+    foreign = create_conversation(session, other_user)
+    turn_queue.workers = 0  # Nothing runs the queued turn
+    turn = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": foreign.id, "user_id": other_user.id},
+    ).json()
+    params = {"conversation_id": foreign.id, "user_id": test_user.id}
+    message = {"content": "Hello", "role": "user"}
+
+    # Act
+    responses = [
+        client.post("/v1/conversations", json=message, params=params),
+        client.post("/v1/conversations/stream", json=message, params=params),
+        client.post("/v1/conversations/async", json=message, params=params),
+        client.get("/v1/messages", params=params),
+        client.get("/v1/sync/messages", params=params),
+        client.get(f"/v1/turns/{turn['id']}", params={"user_id": test_user.id}),
+    ]
+
+    # Assert
+    assert [response.status_code for response in responses] == [404] * 6
+    mock_langchain_service.conversation.assert_not_called()
+    owned = client.get(f"/v1/turns/{turn['id']}", params={"user_id": other_user.id})
+    assert owned.status_code == status.HTTP_200_OK
+
+
+def test_get_turn_without_wait(
+    client: TestClient,
+    session: Session,
+    turn_queue: TurnQueue,
+    test_user: User,
+):
+    """Test polling without wait returns the turn as it is, and 404 for unknown turns."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+    turn_queue.workers = 0  # Nothing runs the queued turn
+    response = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": conversation.id, "user_id": test_user.id},
+    )
+
+    # Act
+    polled = client.get(
+        f"/v1/turns/{response.json()['id']}", params={"user_id": test_user.id}
+    )
+    waited = client.get(
+        f"/v1/turns/{response.json()['id']}",
+        params={"wait": 0.1, "user_id": test_user.id},
+    )
+    missing = client.get(f"/v1/turns/{uuid.uuid4()}", params={"user_id": test_user.id})
+    unknown_conversation = client.post(
+        "/v1/conversations/async",
+        json={"content": "Hello", "role": "user"},
+        params={"conversation_id": uuid.uuid4(), "user_id": test_user.id},
+    )
+
+    # Assert
+    assert polled.json()["status"] == TurnStatus.pending
+    assert waited.json()["status"] == TurnStatus.pending
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    assert unknown_conversation.status_code == status.HTTP_404_NOT_FOUND
+
+
+def receive_turn(websocket, frames: dict[str, list[dict]], ref: str) -> list[dict]:
+    """Receive frames of any turn until turn ``ref`` has saved its messages."""
+    turn_frames = frames.setdefault(ref, [])
+    saved_messages = 2  # The user's message and the answer
+    while [frame["type"] for frame in turn_frames].count("message") < saved_messages:
+        frame = websocket.receive_json()
+        frames.setdefault(frame["ref"], []).append(frame)
+        if frame["ref"] == ref and frame["type"] == "error":
+            break
+    return turn_frames
+
+
+def test_conversation_channel(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test turns for new and existing conversations over one WebSocket."""
+    # Arrange
+    token = create_access_token(test_user.id)
+    frames = {}
+
+    with client.websocket_connect(f"/v1/ws?token={token}") as websocket:
+        # Act
+        websocket.send_json({"ref": "1", "conversation_id": None, "content": "Hi"})
+        first = receive_turn(websocket, frames, "1")
+        conversation_id = first[0]["data"]["id"]
+        websocket.send_json(
+            {"ref": "2", "conversation_id": conversation_id, "content": "And then?"}
+        )
+        websocket.send_json({"ref": "3", "conversation_id": None, "content": "Other"})
+        second = receive_turn(websocket, frames, "2")
+        third = receive_turn(websocket, frames, "3")
+
+    # Assert
+    assert [frame["type"] for frame in first] == [
+        "conversation",
+        "token",
+        "token",
+        "message",
+        "message",
+    ]
+    assert first[-1]["data"]["content"] == "AI response to:Hi"
+    assert [frame["type"] for frame in second] == [
+        "token",
+        "token",
+        "message",
+        "message",
+    ]
+    assert second[-2]["data"]["content"] == "And then?"
+    assert third[0]["data"]["id"] != conversation_id
+    conversation = session.get(Conversation, uuid.UUID(conversation_id))
+    assert [message.content for message in conversation.messages] == [
+        "Hi",
+        "AI response to:Hi",
+        "And then?",
+        "AI response to:And then?",
+    ]
+    assert mock_langchain_service.stream_conversation.call_count == 3  # noqa: PLR2004
+
+
+def test_conversation_channel_errors(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test bad turns get error frames on the channel without closing it."""
+    # Arrange
+    other_user = User(username="other", email="other-email", password_hash="hash")
+    session.add(other_user)
+    session.commit()
+    foreign = create_conversation(session, other_user)
+
+    with client.websocket_connect(f"/v1/ws?user_id={test_user.id}") as websocket:
+        # Act
+        websocket.send_text("not json")
+        invalid = websocket.receive_json()
+        websocket.send_json({"ref": "1", "conversation_id": None, "content": ""})
+        empty = websocket.receive_json()
+        websocket.send_json(
+            {"ref": "2", "conversation_id": str(foreign.id), "content": "Hi"}
+        )
+        not_owned = websocket.receive_json()
+
+    # Assert
+    assert invalid["type"] == "error"
+    assert invalid["ref"] is None
+    assert empty == {
+        "type": "error",
+        "ref": "1",
+        "data": {"detail": "Message content cannot be empty", "status": 400},
+    }
+    assert not_owned["data"]["status"] == status.HTTP_404_NOT_FOUND
+    mock_langchain_service.stream_conversation.assert_not_called()
+
+
+def test_conversation_channel_unexpected_error(
+    client: TestClient,
+    session: Session,
+    mock_langchain_service: MagicMock,
+    test_user: User,
+):
+    """Test a turn failing unexpectedly gets an error frame with its ref."""
+    # Arrange
+    conversation = create_conversation(session, test_user)
+
+    with (
+        patch(
+            "app.api.websocket.get_conversation_history",
+            side_effect=RuntimeError("Database is gone"),
+        ),
+        client.websocket_connect(f"/v1/ws?user_id={test_user.id}") as websocket,
+    ):
+        # Act
+        websocket.send_json(
+            {"ref": "1", "conversation_id": str(conversation.id), "content": "Hi"}
+        )
+        failed = websocket.receive_json()
+
+    # Assert
+    assert failed == {
+        "type": "error",
+        "ref": "1",
+        "data": {"detail": "Error running turn: Database is gone", "status": 500},
+    }
+    mock_langchain_service.stream_conversation.assert_not_called()
+
+
+def test_conversation_channel_requires_user(client: TestClient, session: Session):
+    """Test the channel is closed without a valid token or user."""
+    # Act & Assert
+    for url in ["/v1/ws", "/v1/ws?token=invalid", f"/v1/ws?user_id={uuid.uuid4()}"]:
+        with (
+            pytest.raises(WebSocketDisconnect) as exc_info,
+            client.websocket_connect(url) as websocket,
+        ):
+            websocket.receive_json()
+        assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
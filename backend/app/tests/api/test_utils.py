@@ -3,17 +3,20 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException, status
-from sqlmodel import Session
+from langchain_core.messages import AIMessage, HumanMessage
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.utils import (
-    cleanup_conversation,
     create_title,
-    get_and_save_ai_response,
-    save_conversation,
-    save_message,
+    extract_message_stats,
+    get_ai_response,
+    save_chat_turn,
     serialise_message_data,
+    to_langchain_messages,
+    validate_message_content,
 )
 from app.core.models import Conversation, Message, MessageRole
+from app.db.lookup_cache import conversation_cache
 from app.services.llm import LangchainService
 
 
@@ -22,14 +25,13 @@ class TestUtils:
 
     def setup_method(self):
         """Setup common test resources."""
-        self.mock_db = MagicMock(spec=Session)
+        self.mock_db = MagicMock(spec=AsyncSession)
         self.user_id = uuid.uuid4()
         self.conversation_id = uuid.uuid4()
         self.message_content = "Test message content"
 
     def teardown_method(self):
         """Clean up resources after each test."""
-        self.mock_db.close()
         self.mock_db = None
         print("Test resources cleaned up.")
 
@@ -45,101 +47,33 @@ class TestUtils:
         assert create_title(long_content) == "This is a very long "
         assert len(create_title(long_content)) == title_length
 
-    def test_save_conversation_success(self):
-        """Test saveConversation with valid inputs."""
+    def test_to_langchain_messages(self):
+        """Test saved messages are converted to LangChain messages in order."""
         # Arrange
-        title = "Test Conversation"
-        mock_conversation = MagicMock(spec=Conversation)
-        mock_conversation.id = self.conversation_id
-        self.mock_db.add.return_value = None
-        self.mock_db.commit.return_value = None
-        self.mock_db.refresh.return_value = None
-
-        with patch(
-            "app.api.utils.create_conversation", return_value=mock_conversation
-        ) as mock_create:
-            # Act
-            result = save_conversation(
-                db=self.mock_db, user_id=self.user_id, title=title
-            )
-
-            # Assert
-            mock_create.assert_called_once()
-            assert result.id == self.conversation_id
-
-    def test_save_conversation_failure(self):
-        """Test saveConversation when create_conversation fails."""
-        # Arrange
-        title = "Test Conversation"
-
-        with patch("app.api.utils.create_conversation", return_value=None):
-            # Act & Assert
-            with pytest.raises(HTTPException) as exc_info:
-                save_conversation(db=self.mock_db, user_id=self.user_id, title=title)
+        messages = [
+            Message(content="Question", role=MessageRole.user),
+            Message(content="Answer", role=MessageRole.assistant),
+            Message(content="Instructions", role=MessageRole.system),
+        ]
 
-            assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-            assert "Failed to create conversation" in str(exc_info.value.detail)
-
-    def test_save_message_success(self):
-        """Test saveMessage with valid inputs."""
-        # Arrange
-        content = "Test message"
-        role = MessageRole.user
-        mock_message = MagicMock(spec=Message)
-        mock_message.id = uuid.uuid4()
-
-        with patch(
-            "app.api.utils.create_message", return_value=mock_message
-        ) as mock_create:
-            # Act
-            result = save_message(
-                db=self.mock_db,
-                conversation_id=self.conversation_id,
-                content=content,
-                role=role,
-            )
-
-            # Assert
-            mock_create.assert_called_once()
-            assert result == mock_message
+        # Act
+        result = to_langchain_messages(messages)
 
-    def test_save_message_empty_content(self):
-        """Test saveMessage with empty content."""
-        # Arrange
-        content = ""
-        role = MessageRole.user
+        # Assert
+        assert result == [
+            HumanMessage(content="Question"),
+            AIMessage(content="Answer"),
+        ]
 
+    def test_validate_message_content(self):
+        """Test empty message content is rejected."""
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            save_message(
-                db=self.mock_db,
-                conversation_id=self.conversation_id,
-                content=content,
-                role=role,
-            )
+            validate_message_content("")
 
         assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
         assert "Message content cannot be empty" in str(exc_info.value.detail)
 
-    def test_save_message_creation_fails(self):
-        """Test saveMessage when create_message fails."""
-        # Arrange
-        content = "Test message"
-        role = MessageRole.user
-
-        with patch("app.api.utils.create_message", return_value=None):
-            # Act & Assert
-            with pytest.raises(HTTPException) as exc_info:
-                save_message(
-                    db=self.mock_db,
-                    conversation_id=self.conversation_id,
-                    content=content,
-                    role=role,
-                )
-
-            assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-            assert "Failed to create message" in str(exc_info.value.detail)
-
     def test_serialise_message_data_with_model_dump(self):
         """Test serialising message data with model_dump method."""
         # Arrange
@@ -189,82 +123,30 @@ class TestUtils:
             assert result["error"] == "Serialization failed"
             assert result["content"] == "Test content"
 
-    def test_cleanup_conversation_success(self):
-        """Test successful conversation cleanup."""
-        # Arrange
-        mock_conversation = MagicMock(spec=Conversation)
-        self.mock_db.get.return_value = mock_conversation
-
-        # Act
-        cleanup_conversation(db=self.mock_db, conversation_id=self.conversation_id)
-
-        # Assert
-        self.mock_db.get.assert_called_once_with(Conversation, self.conversation_id)
-        self.mock_db.delete.assert_called_once_with(mock_conversation)
-        self.mock_db.commit.assert_called_once()
-
-    def test_cleanup_conversation_not_found(self):
-        """Test cleanup when conversation is not found."""
-        # Arrange
-        self.mock_db.get.return_value = None
-
-        # Act & Assert
-        with pytest.raises(HTTPException) as exc_info:
-            cleanup_conversation(db=self.mock_db, conversation_id=self.conversation_id)
-
-        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
-        assert "Conversation not found" in str(exc_info.value.detail)
-
-    def test_cleanup_conversation_exception(self):
-        """Test cleanup with database exception."""
-        # Arrange
-        mock_conversation = MagicMock(spec=Conversation)
-        self.mock_db.get.return_value = mock_conversation
-        self.mock_db.delete.side_effect = Exception("Database error")
-
-        # Act & Assert
-        with pytest.raises(HTTPException) as exc_info:
-            cleanup_conversation(db=self.mock_db, conversation_id=self.conversation_id)
-
-        assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-        assert "Failed to delete conversation" in str(exc_info.value.detail)
-        self.mock_db.rollback.assert_called_once()
-
     @pytest.mark.asyncio
-    async def test_get_and_save_ai_response_success(self):
-        """Test successful AI response generation and saving."""
+    async def test_get_ai_response_success(self):
+        """Test successful AI response generation."""
         # Arrange
         mock_service = AsyncMock(spec=LangchainService)
         mock_response = MagicMock()
         mock_response.content = "AI generated response"
         mock_service.conversation.return_value = mock_response
-        mock_message = MagicMock(spec=Message)
 
-        with patch(
-            "app.api.utils.serialise_message_data",
-            return_value={"content": "AI generated response"},
-        ) as mock_serialize:
-            with patch(
-                "app.api.utils.save_message", return_value=mock_message
-            ) as mock_save:
-                # Act
-                result = await get_and_save_ai_response(
-                    conversation_id=self.conversation_id,
-                    user_content=self.message_content,
-                    service=mock_service,
-                    db=self.mock_db,
-                )
+        # Act
+        result = await get_ai_response(
+            conversation_id=self.conversation_id,
+            user_content=self.message_content,
+            service=mock_service,
+        )
 
-                # Assert
-                mock_service.conversation.assert_awaited_once_with(
-                    str(self.conversation_id), self.message_content
-                )
-                mock_serialize.assert_called_once_with(mock_response)
-                mock_save.assert_called_once()
-                assert result == mock_message
+        # Assert
+        mock_service.conversation.assert_awaited_once_with(
+            str(self.conversation_id), self.message_content
+        )
+        assert result == mock_response
 
     @pytest.mark.asyncio
-    async def test_get_and_save_ai_response_empty_response(self):
+    async def test_get_ai_response_empty_response(self):
         """Test AI response handling when empty response is returned."""
         # Arrange
         mock_service = AsyncMock(spec=LangchainService)
@@ -272,11 +154,10 @@ class TestUtils:
 
         # Act
         with pytest.raises(HTTPException) as exc_info:
-            await get_and_save_ai_response(
+            await get_ai_response(
                 conversation_id=self.conversation_id,
                 user_content=self.message_content,
                 service=mock_service,
-                db=self.mock_db,
             )
 
         # Assert
@@ -284,7 +165,7 @@ class TestUtils:
         assert "Error getting AI response" in str(exc_info.value.detail)
 
     @pytest.mark.asyncio
-    async def test_get_and_save_ai_response_service_exception(self):
+    async def test_get_ai_response_service_exception(self):
         """Test AI response handling when service raises an exception."""
         # Arrange
         mock_service = AsyncMock(spec=LangchainService)
@@ -292,13 +173,101 @@ class TestUtils:
 
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            await get_and_save_ai_response(
+            await get_ai_response(
                 conversation_id=self.conversation_id,
                 user_content=self.message_content,
                 service=mock_service,
-                db=self.mock_db,
             )
 
         assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert "Error getting AI response" in str(exc_info.value.detail)
         assert "Service error" in str(exc_info.value.detail)
+
+    @pytest.mark.asyncio
+    async def test_save_chat_turn_success(self):
+        """Test saving both messages of a turn in one call."""
+        # Arrange
+        ai_response = AIMessage(content="AI generated response")
+        mock_messages = (MagicMock(spec=Message), MagicMock(spec=Message))
+        mock_conversation = MagicMock(spec=Conversation)
+
+        with patch(
+            "app.api.utils.create_chat_turn",
+            new_callable=AsyncMock,
+            return_value=mock_messages,
+        ) as mock_create:
+            # Act
+            result = await save_chat_turn(
+                db=self.mock_db,
+                conversation_id=self.conversation_id,
+                user_content=self.message_content,
+                ai_response=ai_response,
+                conversation=mock_conversation,
+            )
+
+            # Assert
+            mock_create.assert_awaited_once()
+            kwargs = mock_create.call_args.kwargs
+            assert kwargs["conversation_id"] == self.conversation_id
+            assert kwargs["conversation"] == mock_conversation
+            assert kwargs["user_message"].content == self.message_content
+            assert kwargs["user_message"].role == MessageRole.user
+            assert kwargs["assistant_message"].content == "AI generated response"
+            assert kwargs["assistant_message"].role == MessageRole.assistant
+            assert kwargs["assistant_message"].message_data["type"] == "ai"
+            assert result == mock_messages
+
+    def test_extract_message_stats(self):
+        """Test the compact columns are extracted from a Bedrock response."""
+        # Arrange
+        ai_response = AIMessage(
+            content="AI generated response",
+            usage_metadata={
+                "input_tokens": 25,
+                "output_tokens": 11,
+                "total_tokens": 36,
+            },
+            response_metadata={
+                "stopReason": "end_turn",
+                "metrics": {"latencyMs": [400, 209]},
+                "model_name": "anthropic.claude-3-haiku",
+            },
+        )
+
+        # Act
+        result = extract_message_stats(ai_response)
+        empty = extract_message_stats(AIMessage(content="No metadata"))
+
+        # Assert
+        assert result == {
+            "input_tokens": 25,
+            "output_tokens": 11,
+            "latency_ms": 609,
+            "stop_reason": "end_turn",
+            "model_id": "anthropic.claude-3-haiku",
+        }
+        assert all(value is None for value in empty.values())
+
+    @pytest.mark.asyncio
+    async def test_save_chat_turn_failure(self):
+        """Test saving a turn rolls back and raises when the insert fails."""
+        # Arrange
+        ai_response = AIMessage(content="AI generated response")
+
+        with patch(
+            "app.api.utils.create_chat_turn",
+            new_callable=AsyncMock,
+            side_effect=Exception("Database error"),
+        ):
+            # Act & Assert
+            with pytest.raises(HTTPException) as exc_info:
+                await save_chat_turn(
+                    db=self.mock_db,
+                    conversation_id=self.conversation_id,
+                    user_content=self.message_content,
+                    ai_response=ai_response,
+                )
+
+            assert exc_info.value.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+            assert "Failed to save messages" in str(exc_info.value.detail)
+            self.mock_db.rollback.assert_awaited_once()
@@ -1,19 +1,32 @@
 import logging
 import os
+from functools import partial
 from typing import Optional
 from unittest.mock import AsyncMock, MagicMock  # Use AsyncMock for async methods
 
 import pytest
 from fastapi.testclient import TestClient
-from langchain_core.messages.ai import AIMessage
+from langchain_core.messages.ai import AIMessage, AIMessageChunk
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.api.utils import run_chat_turn
 from app.config.config import settings
-from app.core.dependencies import get_langchain_service, get_session
+from app.core.dependencies import (
+    get_async_session,
+    get_langchain_service,
+    get_session_factory,
+    get_turn_queue,
+)
 from app.core.models import UserCreate
 from app.db.crud import create_user
+from app.db.lookup_cache import clear_lookup_caches
 from app.main import app
-from app.services.llm import LangchainService
+from app.services.coalescing import KeyedLocks, SingleFlight
+from app.services.llm import LangchainService, ModelScheduler, TokenUsage
+from app.services.turn_queue import TurnQueue
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +36,9 @@ os.environ["TESTING"] = "True"
 @pytest.fixture(name="session", scope="function")
 def session_fixture():
     """Create a new database session for each test."""
-    # Reset singleton before each test for clean isolation
+    # Reset singleton and caches before each test for clean isolation
     LangchainService.instance = None
+    clear_lookup_caches()
 
     print("Datebase uri = " + str(settings.SQLALCHEMY_DATABASE_URI))
     engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
@@ -53,7 +67,10 @@ def mock_langchain_service_fixture():
     mock_service = MagicMock(spec=LangchainService)
 
     async def mock_conversation(
-        conversation_id: str, user_input: str, user_context: str | None = None
+        conversation_id: str,
+        user_input: str,
+        user_context: str | None = None,
+        history: list | None = None,
     ):
         # Mock the conversation method to return a fixed response
         response = AIMessage(content=f"AI response to:{user_input}")
@@ -61,6 +78,25 @@ def mock_langchain_service_fixture():
 
     mock_service.conversation = AsyncMock(side_effect=mock_conversation)
 
+    async def mock_stream_conversation(
+        conversation_id: str,
+        user_input: str,
+        user_context: str | None = None,
+        history: list | None = None,
+    ):
+        # Mock the streaming method to yield the fixed response in two chunks
+        yield AIMessageChunk(content="AI response ")
+        yield AIMessageChunk(content=f"to:{user_input}")
+
+    mock_service.stream_conversation = MagicMock(side_effect=mock_stream_conversation)
+    mock_service.token_usage = TokenUsage()
+    mock_service.model_scheduler = ModelScheduler(
+        max_concurrency=4, max_queue=4, max_wait=1
+    )
+    mock_service.response_cache = None
+    mock_service.turn_coalescer = SingleFlight()
+    mock_service.thread_locks = KeyedLocks()
+
     # Mock class variables (still needed for backward compatibility)
     LangchainService.initialized = True
     LangchainService.graph = MagicMock()
@@ -84,15 +120,25 @@ def client_fixture(session: Session, mock_langchain_service: LangchainService):
     """Create a TestClient for testing the FastAPI app."""
 
     # Override the dependencies for the test client
-    # Dependency override for the database session
-    def get_session_override():
-        yield session
+    # Dependency override for the async database session. NullPool keeps
+    # connections from outliving the event loop of each TestClient.
+    async_engine = create_async_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool
+    )
+
+    def session_factory_override():
+        return AsyncSession(async_engine, expire_on_commit=False)
+
+    async def get_async_session_override():
+        async with session_factory_override() as async_session:
+            yield async_session
 
     # Dependency override for the langchain service (async for singleton)
     async def get_langchain_override():
         return mock_langchain_service
 
-    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    app.dependency_overrides[get_session_factory] = lambda: session_factory_override
     app.dependency_overrides[get_langchain_service] = get_langchain_override
 
     with TestClient(app) as client:
@@ -102,6 +148,42 @@ def client_fixture(session: Session, mock_langchain_service: LangchainService):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="turn_queue", scope="function")
+def turn_queue_fixture(
+    request, client: TestClient, mock_langchain_service: LangchainService
+):
+    """Run queued chat turns with the mocked service in the test client's loop.
+
+    Parametrize indirectly with True to share the queue through the chat_turns
+    table, as with TURN_QUEUE=postgres.
+    """
+    shared = getattr(request, "param", False)
+    async_engine = create_async_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool
+    )
+
+    def session_factory():
+        return AsyncSession(async_engine, expire_on_commit=False)
+
+    turn_queue = TurnQueue(
+        partial(
+            run_chat_turn,
+            service=mock_langchain_service,
+            session_factory=session_factory,
+            stale_after=60 if shared else None,
+        ),
+        workers=2,
+        max_size=10,
+        poll_interval=0.05,
+        shared=shared,
+    )
+    app.dependency_overrides[get_turn_queue] = lambda: turn_queue
+
+    yield turn_queue
+
+    client.portal.call(turn_queue.stop)
+
+
 @pytest.fixture(name="test_user", scope="function")
 def test_user_fixture(session: Session):
     """Create a test user in the database."""
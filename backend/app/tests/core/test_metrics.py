@@ -0,0 +1,93 @@
+import uuid
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from prometheus_client import REGISTRY
+from sqlmodel import Session
+
+from app.core.metrics import record_llm_tokens, time_stage
+from app.core.models import Conversation, User
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def stage_count(stage: str) -> float:
+    return sample("chat_turn_stage_duration_seconds_count", stage=stage)
+
+
+class TestMetrics:
+    """Test the Prometheus metrics of the app."""
+
+    def test_time_stage_records_failures(self):
+        """Test a stage is timed even when it raises."""
+        # Arrange
+        before = stage_count("test_stage")
+
+        # Act
+        with pytest.raises(ValueError), time_stage("test_stage"):
+            raise ValueError("failed")
+
+        # Assert
+        assert stage_count("test_stage") == before + 1
+
+    def test_record_llm_tokens(self):
+        """Test the tokens of a model response are counted by kind."""
+        # Arrange
+        before = sample("llm_tokens_total", kind="input")
+        response = AIMessage(
+            content="Answer",
+            usage_metadata={
+                "input_tokens": 120,
+                "output_tokens": 30,
+                "total_tokens": 150,
+                "input_token_details": {"cache_read": 100},
+            },
+        )
+
+        # Act
+        record_llm_tokens(response)
+        record_llm_tokens(AIMessage(content="No usage"))
+
+        # Assert
+        assert sample("llm_tokens_total", kind="input") == before + 120
+
+    def test_request_latency_per_route(self, client: TestClient, test_user: User):
+        """Test requests are timed under their route template and status."""
+        # Act
+        client.get(f"/v1/turns/{uuid.uuid4()}", params={"user_id": test_user.id})
+        response = client.get("/metrics")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/v1/turns/{turn_id}",status="404"}'
+        ) in response.text
+
+    def test_chat_turn_stages(
+        self, client: TestClient, session: Session, test_user: User
+    ):
+        """Test a chat turn times its ownership check, insert and response."""
+        # Arrange
+        conversation = Conversation(user_id=test_user.id, title="Headache")
+        session.add(conversation)
+        session.commit()
+        stages = ("ownership_check", "messages_insert", "response_serialization")
+        before = {stage: stage_count(stage) for stage in stages}
+
+        # Act
+        response = client.post(
+            "/v1/conversations",
+            params={"conversation_id": conversation.id, "user_id": test_user.id},
+            json={"content": "Is it serious?", "role": "user"},
+        )
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        for stage in stages:
+            assert stage_count(stage) == before[stage] + 1
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+from passlib.hash import sha256_crypt
+from pydantic import ValidationError
+
+from app.config.config import Settings
+from app.core import security
+from app.core.security import (
+    create_access_token,
+    get_password_executor,
+    get_password_hash_async,
+    shutdown_password_executor,
+    token_cache,
+    verify_access_token,
+    verify_password_async,
+)
+
+
+@pytest.fixture(name="executor_kind", params=["thread", "process"])
+def executor_kind_fixture(request):
+    """Run the test against each kind of hashing pool."""
+    shutdown_password_executor()
+    with patch.object(security.settings, "PASSWORD_HASH_EXECUTOR", request.param):
+        yield request.param
+    shutdown_password_executor()
+
+
+class TestPasswordHashing:
+    """Test hashing passwords off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_async(self, executor_kind: str):
+        """Test a password hashed in the pool verifies and a wrong one does not."""
+        # Act
+        hashed = await get_password_hash_async("secret")
+
+        # Assert
+        assert await verify_password_async("secret", hashed)
+        assert not await verify_password_async("wrong", hashed)
+        assert sha256_crypt.from_string(hashed).rounds == (
+            security.settings.PASSWORD_HASH_ROUNDS
+        )
+
+    @pytest.mark.asyncio
+    async def test_hashing_runs_off_the_event_loop(self):
+        """Test the thread pool hashes outside the event loop's thread."""
+        # Arrange
+        shutdown_password_executor()
+        threads = []
+
+        def record_thread(password: str) -> str:
+            threads.append(threading.current_thread())
+            return password
+
+        with (
+            patch.object(security.settings, "PASSWORD_HASH_EXECUTOR", "thread"),
+            patch("app.core.security.get_password_hash", record_thread),
+        ):
+            # Act
+            await get_password_hash_async("secret")
+            executor = get_password_executor()
+            shutdown_password_executor()
+
+        # Assert
+        assert threads[0] is not threading.current_thread()
+        assert executor._max_workers == security.settings.PASSWORD_HASH_WORKERS
+
+
+class TestAccessTokens:
+    """Test issuing and verifying access tokens."""
+
+    def setup_method(self):
+        """Setup common test resources."""
+        token_cache.clear()
+        self.user_id = uuid.uuid4()
+
+    def test_verify_access_token(self):
+        """Test a token verifies once and is then served from the token cache."""
+        # Arrange
+        token = create_access_token(self.user_id)
+
+        # Act
+        first = verify_access_token(token)
+        with patch("app.core.security.jwt.decode") as mock_decode:
+            second = verify_access_token(token)
+
+        # Assert
+        assert first == second == self.user_id
+        mock_decode.assert_not_called()
+        assert token_cache.stats()["hits"] == 1
+
+    def test_verify_rejects_expired_and_forged_tokens(self):
+        """Test expired tokens and tokens signed with another key are rejected."""
+        # Arrange
+        expired = create_access_token(self.user_id, timedelta(seconds=-1))
+        forged = jwt.encode(
+            {"sub": str(self.user_id), "exp": time.time() + 60},
+            "another-key",
+            algorithm=security.ALGORITHM,
+        )
+
+        # Act & Assert
+        with pytest.raises(jwt.ExpiredSignatureError):
+            verify_access_token(expired)
+        with pytest.raises(jwt.InvalidSignatureError):
+            verify_access_token(forged)
+        assert len(token_cache) == 0
+
+    def test_cached_token_expires(self):
+        """Test a cached token is rejected once its expiry has passed."""
+        # Arrange
+        token = create_access_token(self.user_id)
+        verify_access_token(token)
+
+        # Act & Assert
+        with (
+            patch("app.core.security.time.time", return_value=time.time() + 7200),
+            pytest.raises(jwt.ExpiredSignatureError),
+        ):
+            verify_access_token(token)
+
+    def test_secret_key_required_outside_dev_and_test(self):
+        """Test a production worker refuses to start with a random key."""
+        # Act
+        dev_settings = Settings(ENVIRONMENT="dev")
+        prod_settings = Settings(ENVIRONMENT="prod", SECRET_KEY="shared-key")
+
+        # Assert
+        assert dev_settings.SECRET_KEY
+        assert prod_settings.SECRET_KEY == "shared-key"
+        with pytest.raises(ValidationError):
+            Settings(ENVIRONMENT="prod")
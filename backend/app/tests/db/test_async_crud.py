@@ -0,0 +1,274 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.models import (
+    Conversation,
+    ConversationCreate,
+    Message,
+    MessageCreate,
+    User,
+    UserCreate,
+)
+from app.db.async_crud import (
+    check_conversation_exists,
+    check_user_exists,
+    create_chat_turn,
+    create_conversation,
+    create_message,
+    create_user,
+    get_conversation_by_id,
+    get_conversations_by_user_id,
+    get_user_name,
+)
+
+
+class TestAsyncCRUD:
+    """
+    Test async CRUD operations for User, Conversation, and Message models.
+    """
+
+    def setup_method(self):
+        """Setup common test resources."""
+        self.mock_session = MagicMock(spec=AsyncSession)
+        self.mock_session.identity_map = {}
+        self.user_id = uuid.uuid4()
+        self.conversation_id = uuid.uuid4()
+
+    def teardown_method(self):
+        """Clean up resources after each test."""
+        self.mock_session = None
+
+    @pytest.mark.asyncio
+    async def test_create_user(self):
+        """Test creating a user."""
+        # Arrange
+        mock_user = MagicMock(spec=User)
+
+        with (
+            patch("app.core.models.User.model_validate", return_value=mock_user),
+            patch(
+                "app.db.async_crud.get_password_hash_async",
+                new_callable=AsyncMock,
+                return_value="hashed_password",
+            ) as mock_hash,
+        ):
+            # Act
+            user_create = UserCreate(
+                username="testuser", email="test@example.com", password="password"
+            )
+            result = await create_user(
+                session=self.mock_session, user_create=user_create
+            )
+
+            # Assert
+            mock_hash.assert_awaited_once_with("password")
+            self.mock_session.add.assert_called_once_with(mock_user)
+            self.mock_session.commit.assert_awaited_once()
+            self.mock_session.refresh.assert_awaited_once_with(mock_user)
+            assert result == mock_user
+
+    @pytest.mark.asyncio
+    async def test_create_message(self):
+        """Test creating a message."""
+        # Arrange
+        mock_message = MagicMock(spec=Message)
+
+        with patch("app.core.models.Message.model_validate", return_value=mock_message):
+            # Act
+            message_create = MessageCreate(content="Hello", role="user")
+            result = await create_message(
+                session=self.mock_session,
+                message_create=message_create,
+                conversation_id=self.conversation_id,
+            )
+
+            # Assert
+            self.mock_session.add.assert_called_once_with(mock_message)
+            self.mock_session.commit.assert_awaited_once()
+            self.mock_session.refresh.assert_awaited_once_with(mock_message)
+            assert result == mock_message
+
+    @pytest.mark.asyncio
+    async def test_create_conversation(self):
+        """Test creating a conversation."""
+        # Arrange
+        mock_conversation = MagicMock(spec=Conversation)
+
+        with patch(
+            "app.core.models.Conversation.model_validate",
+            return_value=mock_conversation,
+        ):
+            # Act
+            conversation_create = ConversationCreate(title="Test Conversation")
+            result = await create_conversation(
+                session=self.mock_session,
+                conversation_create=conversation_create,
+                user_id=self.user_id,
+            )
+
+            # Assert
+            self.mock_session.add.assert_called_once_with(mock_conversation)
+            self.mock_session.commit.assert_awaited_once()
+            self.mock_session.refresh.assert_awaited_once_with(mock_conversation)
+            assert result == mock_conversation
+
+    @pytest.mark.asyncio
+    async def test_create_chat_turn(self):
+        """Test both messages of a turn are inserted in one transaction."""
+        # Arrange
+        mock_conversation = MagicMock(spec=Conversation)
+        user_message = MagicMock(spec=Message)
+        assistant_message = MagicMock(spec=Message)
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = [
+            user_message,
+            assistant_message,
+        ]
+        self.mock_session.exec.return_value = mock_result
+
+        # Act
+        result = await create_chat_turn(
+            session=self.mock_session,
+            conversation_id=self.conversation_id,
+            user_message=MessageCreate(content="Hello", role="user"),
+            assistant_message=MessageCreate(
+                content="Hi", role="assistant", message_data={"type": "ai"}
+            ),
+            conversation=mock_conversation,
+        )
+
+        # Assert
+        self.mock_session.add.assert_called_once_with(mock_conversation)
+        assert self.mock_session.exec.await_count == 2  # noqa: PLR2004
+        message_call, metadata_call = self.mock_session.exec.call_args_list
+        rows = message_call.kwargs["params"]
+        assert [row["content"] for row in rows] == ["Hello", "Hi"]
+        assert all(row["conversation_id"] == self.conversation_id for row in rows)
+        assert all("message_data" not in row for row in rows)
+        assert metadata_call.kwargs["params"] == [
+            {"message_id": assistant_message.id, "data": {"type": "ai"}}
+        ]
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_session.refresh.assert_not_called()
+        assert result == (user_message, assistant_message)
+
+    @pytest.mark.asyncio
+    async def test_get_conversation_by_id(self):
+        """Test getting a conversation by ID."""
+        # Arrange
+        mock_conversation = MagicMock(spec=Conversation)
+        self.mock_session.get.return_value = mock_conversation
+
+        # Act
+        result = await get_conversation_by_id(
+            session=self.mock_session, conversation_id=self.conversation_id
+        )
+
+        # Assert
+        self.mock_session.get.assert_awaited_once_with(
+            Conversation, self.conversation_id
+        )
+        assert result == mock_conversation
+
+    @pytest.mark.asyncio
+    async def test_get_conversation_by_id_none(self):
+        """Test getting a conversation by ID when it doesn't exist."""
+        # Arrange
+        self.mock_session.get.return_value = None
+
+        # Act
+        result = await get_conversation_by_id(
+            session=self.mock_session, conversation_id=self.conversation_id
+        )
+
+        # Assert
+        self.mock_session.get.assert_awaited_once()
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_get_conversations_by_user_id(self):
+        """Test getting conversations by user ID."""
+        # Arrange
+        mock_conversation = MagicMock(spec=Conversation)
+        mock_result = MagicMock()
+        mock_result.all.return_value = [mock_conversation]
+        self.mock_session.exec.return_value = mock_result
+
+        # Act
+        result = await get_conversations_by_user_id(
+            session=self.mock_session, user_id=self.user_id
+        )
+
+        # Assert
+        self.mock_session.exec.assert_awaited_once()
+        assert result == [mock_conversation]
+
+    @pytest.mark.asyncio
+    async def test_check_conversation_exists(self):
+        """Test checking if a conversation exists."""
+        # Arrange
+        mock_result = MagicMock()
+        mock_result.one.return_value = True
+        self.mock_session.exec.return_value = mock_result
+
+        # Act
+        result = await check_conversation_exists(
+            session=self.mock_session, conversation_id=self.conversation_id
+        )
+
+        # Assert
+        self.mock_session.exec.assert_awaited_once()
+        assert result is True
+
+    @pytest.mark.asyncio
+    async def test_check_user_exists_false(self):
+        """Test checking if a user exists when they don't."""
+        # Arrange
+        mock_result = MagicMock()
+        mock_result.one.return_value = False
+        self.mock_session.exec.return_value = mock_result
+
+        # Act
+        result = await check_user_exists(
+            session=self.mock_session, user_id=self.user_id
+        )
+
+        # Assert
+        self.mock_session.exec.assert_awaited_once()
+        assert result is False
+
+    @pytest.mark.asyncio
+    async def test_check_user_exists_loaded(self):
+        """Test a user already loaded by the session is found without a query."""
+        # Arrange
+        key = AsyncSession.identity_key(User, self.user_id)
+        self.mock_session.identity_key.return_value = key
+        self.mock_session.identity_map = {key: MagicMock(spec=User)}
+
+        # Act
+        result = await check_user_exists(
+            session=self.mock_session, user_id=self.user_id
+        )
+
+        # Assert
+        self.mock_session.exec.assert_not_called()
+        assert result is True
+
+    @pytest.mark.asyncio
+    async def test_get_user_name(self):
+        """Test getting a user by username."""
+        # Arrange
+        mock_user = MagicMock(spec=User)
+        mock_result = MagicMock()
+        mock_result.first.return_value = mock_user
+        self.mock_session.exec.return_value = mock_result
+
+        # Act
+        result = await get_user_name(session=self.mock_session, user_name="testuser")
+
+        # Assert
+        self.mock_session.exec.assert_awaited_once()
+        assert result == mock_user
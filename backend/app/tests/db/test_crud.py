@@ -184,7 +184,7 @@ class TestCRUD:
     def test_check_conversation_exists(self):
         """Test checking if a conversation exists."""
         # Arrange
-        self.mock_session.exec.return_value.first.return_value = True
+        self.mock_session.exec.return_value.one.return_value = True
 
         # Act
         result = check_conversation_exists(
@@ -200,7 +200,7 @@ class TestCRUD:
         """Test checking if a conversation exists when it doesn't."""
         # Arrange
         mock_result = MagicMock()
-        mock_result.first.return_value = None
+        mock_result.one.return_value = False
         self.mock_session.exec.return_value = mock_result
 
         # Act
@@ -216,7 +216,7 @@ class TestCRUD:
     def test_check_user_exists(self):
         """Test checking if a user exists."""
         # Arrange
-        self.mock_session.exec.return_value.first.return_value = True
+        self.mock_session.exec.return_value.one.return_value = True
 
         # Act
         result = check_user_exists(session=self.mock_session, user_id=self.user_id)
@@ -230,7 +230,7 @@ class TestCRUD:
         """Test checking if a user exists when they don't."""
         # Arrange
         mock_result = MagicMock()
-        mock_result.first.return_value = None
+        mock_result.one.return_value = False
         self.mock_session.exec.return_value = mock_result
 
         # Act
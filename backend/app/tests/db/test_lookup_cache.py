@@ -0,0 +1,139 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.models import User
+from app.db.lookup_cache import (
+    check_user_exists,
+    clear_lookup_caches,
+    get_user_name,
+    user_cache,
+    user_name_cache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """Test the bounded TTL cache."""
+
+    def test_entries_expire(self):
+        """Test an entry is a hit until its time to live has passed."""
+        # Arrange
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.set("key", "value")
+
+        # Act
+        hit = cache.get("key")
+        clock.now = 61
+        expired = cache.get("key")
+
+        # Assert
+        assert hit == "value"
+        assert expired is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted once the cache is full."""
+        # Arrange
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        # Act
+        cache.set("c", 3)
+
+        # Assert
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3  # noqa: PLR2004
+        assert cache.stats()["evictions"] == 1
+
+    def test_zero_ttl_disables_cache(self):
+        """Test nothing is cached when the time to live is zero."""
+        # Arrange
+        cache = TTLCache(maxsize=10, ttl=0)
+
+        # Act
+        cache.set("key", "value")
+
+        # Assert
+        assert cache.get("key") is None
+
+
+class TestCachedLookups:
+    """Test the cached user lookups."""
+
+    def setup_method(self):
+        """Setup common test resources."""
+        clear_lookup_caches()
+        self.mock_session = MagicMock(spec=AsyncSession)
+        self.user = User(
+            id=uuid.uuid4(),
+            username="testuser",
+            email="test@example.com",
+            password_hash="hash",
+        )
+
+    def teardown_method(self):
+        """Clean up resources after each test."""
+        clear_lookup_caches()
+
+    @pytest.mark.asyncio
+    async def test_check_user_exists_caches_hits_only(self):
+        """Test a found user is cached while a missing user is looked up again."""
+        # Arrange
+        missing_id = uuid.uuid4()
+        with patch(
+            "app.db.async_crud.check_user_exists",
+            new_callable=AsyncMock,
+            side_effect=lambda session, user_id: user_id == self.user.id,
+        ) as mock_check:
+            # Act
+            for _ in range(2):
+                assert await check_user_exists(
+                    session=self.mock_session, user_id=self.user.id
+                )
+                assert not await check_user_exists(
+                    session=self.mock_session, user_id=missing_id
+                )
+
+        # Assert
+        assert mock_check.await_count == 3  # noqa: PLR2004
+        assert user_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_get_user_name_caches_public_fields(self):
+        """Test cached users are new objects without their password hash."""
+        # Arrange
+        with patch(
+            "app.db.async_crud.get_user_name",
+            new_callable=AsyncMock,
+            return_value=self.user,
+        ) as mock_get:
+            # Act
+            first = await get_user_name(session=self.mock_session, user_name="testuser")
+            second = await get_user_name(
+                session=self.mock_session, user_name="testuser"
+            )
+
+        # Assert
+        mock_get.assert_awaited_once()
+        assert first == second
+        assert first is not second
+        assert second.id == self.user.id
+        assert "password_hash" not in user_name_cache.get("testuser")
+        assert not hasattr(second, "password_hash")
@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+from sqlmodel import text
+
+from app.config.config import Settings, settings
+from app.core.dependencies import async_engine, new_async_session, reset_after_fork
+from app.db.pool import (
+    close_shared_pool,
+    connection_kwargs,
+    get_shared_pool,
+    open_shared_pool,
+    pool_stats,
+)
+
+
+class TestSharedPool:
+    """Test the connection pool shared by the async engine and the checkpointer."""
+
+    @pytest.mark.asyncio
+    async def test_sessions_borrow_from_pool(self):
+        """Test sessions run transactions on pooled connections and return them."""
+        pool = await open_shared_pool()
+        try:
+            # Arrange
+            await pool.wait()  # The minimum connections open in the background
+
+            # Act
+            async with new_async_session() as session:
+                await session.exec(text("SELECT 1"))
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                autocommit_in_session = raw_connection.driver_connection.autocommit
+            stats = pool_stats()
+
+            # Assert
+            assert autocommit_in_session is False
+            assert stats["requests_num"] == 1
+            assert stats["connections_in_use"] == 0
+            assert stats["pool_max"] == settings.DB_POOL_MAX_SIZE
+            async with pool.connection() as conn:
+                assert conn.autocommit is True
+        finally:
+            await async_engine.dispose()
+            await close_shared_pool()
+        assert pool_stats() is None
+
+    def test_reset_after_fork(self):
+        """Test a forked worker forgets the pool of its parent."""
+        # Arrange
+        inherited_pool = get_shared_pool()
+
+        # Act
+        reset_after_fork()
+
+        # Assert
+        assert get_shared_pool() is not inherited_pool
+
+    def test_connection_budget_is_split_between_workers(self):
+        """Test each worker's pool gets its share of the connection budget."""
+        worker_settings = Settings(DB_CONNECTION_BUDGET=40, WEB_CONCURRENCY=3)
+
+        assert worker_settings.DB_POOL_MAX_SIZE == 13  # noqa: PLR2004
+        with pytest.raises(ValidationError):
+            Settings(DB_CONNECTION_BUDGET=2, WEB_CONCURRENCY=4)
+
+    def test_pool_size_within_budget(self):
+        """Test a configured pool size may not exceed the worker's share."""
+        worker_settings = Settings(
+            DB_CONNECTION_BUDGET=40, WEB_CONCURRENCY=2, DB_POOL_MAX_SIZE=10
+        )
+
+        assert worker_settings.DB_POOL_MAX_SIZE == 10  # noqa: PLR2004
+        with pytest.raises(ValidationError):
+            Settings(DB_CONNECTION_BUDGET=40, WEB_CONCURRENCY=2, DB_POOL_MAX_SIZE=30)
+
+    def test_prepared_statements_can_be_disabled(self):
+        """Test disabling prepared statements unsets psycopg's threshold."""
+        with patch.object(settings, "DB_PREPARED_STATEMENTS", False):
+            kwargs = connection_kwargs()
+
+        assert kwargs["prepare_threshold"] is None
+        assert kwargs["autocommit"] is True
@@ -0,0 +1,85 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.prompts.prompt_utils import (
+    BEDROCK_CACHE_POINT,
+    DEFAULT_USER_CONTEXT,
+    HEALTH_ANXIETY_STATIC_PROMPT,
+    format_health_anxiety_messages,
+    generate_health_anxiety_prompt,
+    render_health_anxiety_context,
+    render_health_anxiety_system_prompt,
+)
+
+
+def test_render_system_prompt_matches_template():
+    """Test the cached rendering matches the prompt template output."""
+    # Arrange
+    messages = [HumanMessage(content="I have a headache")]
+
+    # Act
+    rendered = render_health_anxiety_system_prompt("Age 30")
+    from_template = generate_health_anxiety_prompt("Age 30").invoke(
+        {"messages": messages}
+    )
+
+    # Assert
+    assert from_template.to_messages()[0].content == rendered
+    assert "- User Context: Age 30" in rendered
+
+
+def test_render_system_prompt_is_cached():
+    """Test the same context reuses the rendered prompt."""
+    # Arrange
+    render_health_anxiety_system_prompt.cache_clear()
+
+    # Act
+    first = render_health_anxiety_system_prompt("Age 30")
+    second = render_health_anxiety_system_prompt("Age 30")
+
+    # Assert
+    assert first is second
+    assert render_health_anxiety_system_prompt.cache_info().hits == 1
+
+
+def test_user_context_with_braces_is_not_parsed():
+    """Test user context is inserted as a value, not as template syntax."""
+    assert "{not a variable}" in render_health_anxiety_system_prompt("{not a variable}")
+
+
+def test_format_health_anxiety_messages():
+    """Test the system prompt is placed before the conversation messages."""
+    # Arrange
+    messages = [HumanMessage(content="I have a headache")]
+
+    # Act
+    result = format_health_anxiety_messages(messages)
+
+    # Assert
+    assert isinstance(result[0], SystemMessage)
+    assert DEFAULT_USER_CONTEXT in result[0].content
+    assert result[1:] == messages
+
+
+def test_format_health_anxiety_messages_with_cache_points():
+    """Test cache points follow the static prompt and the previous turn."""
+    # Arrange
+    messages = [
+        HumanMessage(content="I have a headache"),
+        AIMessage(content="How long has it lasted?"),
+        HumanMessage(content="Two days"),
+    ]
+
+    # Act
+    result = format_health_anxiety_messages(
+        messages, "Age 30", cache_prompt=True, cache_history=True
+    )
+
+    # Assert
+    assert result[0].content == [
+        {"type": "text", "text": HEALTH_ANXIETY_STATIC_PROMPT},
+        BEDROCK_CACHE_POINT,
+        {"type": "text", "text": render_health_anxiety_context("Age 30")},
+    ]
+    assert result[2].content[-1] == BEDROCK_CACHE_POINT
+    assert messages[1].content == "How long has it lasted?"
+    assert result[3] == messages[2]
@@ -0,0 +1,142 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg import AsyncConnection
+from sqlmodel import Session
+
+from app.config.config import settings
+from app.core.models import Conversation, User
+from app.services.checkpoint_compaction import CHECKPOINT_TABLES, compact_checkpoints
+from app.services.llm import LangchainService
+from app.tests.services.test_llm import TrackingChatModel
+
+
+async def count_rows(conn: AsyncConnection, table: str, thread_id: str) -> int:
+    cursor = await conn.execute(
+        f"SELECT count(*) AS rows FROM {table} WHERE thread_id = %s",
+        (thread_id,),
+    )
+    return (await cursor.fetchone())["rows"]
+
+
+@pytest_asyncio.fixture(name="postgres_service")
+async def postgres_service_fixture():
+    """Build a LangchainService with a Postgres checkpointer and fake model."""
+    LangchainService.instance = None
+    async with AsyncPostgresSaver.from_conn_string(
+        settings.PSYCOPG_CONNINFO
+    ) as checkpointer:
+        await checkpointer.setup()
+        service = LangchainService()
+        service._model = TrackingChatModel(latency=0)
+        service.checkpointer = checkpointer
+        service.initialized = True
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        yield service
+        for table in CHECKPOINT_TABLES:
+            await checkpointer.conn.execute(f"DELETE FROM {table}")
+    LangchainService.instance = None
+
+
+@pytest.fixture(name="conversation")
+def conversation_fixture(session: Session, test_user: User) -> Conversation:
+    conversation = Conversation(title="Headache", user_id=test_user.id)
+    session.add(conversation)
+    session.commit()
+    session.refresh(conversation)
+    return conversation
+
+
+class TestCheckpointCompaction:
+    """Test compaction of the LangGraph checkpoint tables."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_only_latest_checkpoint(
+        self, postgres_service: LangchainService, conversation: Conversation
+    ):
+        """Test old checkpoints are removed and the thread still resumes."""
+        # Arrange
+        thread_id = str(conversation.id)
+        await postgres_service.conversation(thread_id, "First")
+        await postgres_service.conversation(thread_id, "Second")
+        conn = postgres_service.checkpointer.conn
+
+        # Act
+        report = await compact_checkpoints(conn, orphan_grace_seconds=0)
+
+        # Assert
+        assert await count_rows(conn, "checkpoints", thread_id) == 1
+        assert report.rows_deleted["checkpoints"] > 0
+        assert report.total_bytes > 0
+        assert report.orphaned_threads == 0
+        await postgres_service.conversation(thread_id, "Third")
+        contents = [m.content for m in postgres_service._model.last_messages]
+        assert contents[1:] == [
+            "First",
+            "reply to First",
+            "Second",
+            "reply to Second",
+            "Third",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_deletes_threads_without_conversation(
+        self, postgres_service: LangchainService, conversation: Conversation
+    ):
+        """Test threads of deleted conversations are removed after the grace period."""
+        # Arrange
+        orphan_id = str(uuid.uuid4())
+        await postgres_service.conversation(orphan_id, "Lost")
+        await postgres_service.conversation("not-a-uuid", "Lost")
+        await postgres_service.conversation(str(conversation.id), "Kept")
+        conn = postgres_service.checkpointer.conn
+
+        # Act
+        recent = await compact_checkpoints(conn, orphan_grace_seconds=3600)
+        report = await compact_checkpoints(conn, orphan_grace_seconds=0)
+
+        # Assert
+        assert recent.orphaned_threads == 0
+        assert report.orphaned_threads == 2  # noqa: PLR2004
+        for table in CHECKPOINT_TABLES:
+            assert await count_rows(conn, table, orphan_id) == 0
+            assert await count_rows(conn, table, "not-a-uuid") == 0
+        assert await count_rows(conn, "checkpoints", str(conversation.id)) == 1
+
+    @pytest.mark.asyncio
+    async def test_dry_run_deletes_nothing(
+        self, postgres_service: LangchainService, conversation: Conversation
+    ):
+        """Test a dry run reports the deletions and rolls them back."""
+        # Arrange
+        thread_id = str(conversation.id)
+        await postgres_service.conversation(thread_id, "First")
+        conn = postgres_service.checkpointer.conn
+        before = await count_rows(conn, "checkpoints", thread_id)
+
+        # Act
+        report = await compact_checkpoints(conn, orphan_grace_seconds=0, dry_run=True)
+
+        # Assert
+        assert report.rows_deleted["checkpoints"] > 0
+        assert await count_rows(conn, "checkpoints", thread_id) == before
+
+    @pytest.mark.asyncio
+    async def test_delete_conversation_state(
+        self, postgres_service: LangchainService, conversation: Conversation
+    ):
+        """Test deleting a conversation's state removes all of its checkpoints."""
+        # Arrange
+        thread_id = str(conversation.id)
+        await postgres_service.conversation(thread_id, "First")
+        conn = postgres_service.checkpointer.conn
+
+        # Act
+        await postgres_service.delete_conversation_state(thread_id)
+
+        # Assert
+        for table in CHECKPOINT_TABLES:
+            assert await count_rows(conn, table, thread_id) == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.services.coalescing import KeyedLocks, SingleFlight
+
+
+class TestSingleFlight:
+    """Test sharing one in-flight call between duplicate callers."""
+
+    @pytest.mark.asyncio
+    async def test_duplicates_share_one_call(self):
+        """Test concurrent calls with the same key run once and get the same result."""
+        # Arrange
+        single_flight = SingleFlight()
+        calls = []
+
+        async def call(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return object()
+
+        # Act
+        first, second, other = await asyncio.gather(
+            single_flight.do("a", lambda: call("a")),
+            single_flight.do("a", lambda: call("a")),
+            single_flight.do("b", lambda: call("b")),
+        )
+        again = await single_flight.do("a", lambda: call("a"))
+
+        # Assert
+        assert first is second
+        assert other is not first
+        assert again is not first
+        assert calls == ["a", "b", "a"]
+        assert single_flight.stats() == {"started": 3, "coalesced": 1, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_call_survives_cancelled_caller(self):
+        """Test cancelling the caller that started a call does not cancel it for others."""
+        # Arrange
+        single_flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        leader = asyncio.create_task(single_flight.do("a", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do("a", call))
+        await asyncio.sleep(0)
+
+        # Act
+        leader.cancel()
+
+        # Assert
+        assert await follower == "done"
+        assert leader.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared(self):
+        """Test every duplicate caller gets the error of the shared call."""
+        # Arrange
+        single_flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ValueError("Model failed")
+
+        # Act
+        results = await asyncio.gather(
+            single_flight.do("a", call),
+            single_flight.do("a", call),
+            return_exceptions=True,
+        )
+
+        # Assert
+        assert results[0] is results[1]
+        assert isinstance(results[0], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_keyed_locks_serialize_per_key():
+    """Test holders of the same key run one at a time and locks are dropped after."""
+    # Arrange
+    locks = KeyedLocks()
+    events = []
+
+    async def turn(key, name):
+        async with locks.hold(key):
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+
+    # Act
+    await asyncio.gather(turn("a", "1"), turn("a", "2"), turn("b", "3"))
+
+    # Assert
+    assert events.index("end 1") < events.index("start 2")
+    assert events.index("start 3") < events.index("end 1")
+    assert len(locks) == 0
+    assert locks.stats() == {"held": 0, "contended": 1}
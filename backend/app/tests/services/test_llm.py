@@ -0,0 +1,665 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from pydantic import Field
+
+from app.config.config import settings
+from app.prompts.prompt_utils import BEDROCK_CACHE_POINT
+from app.services.llm import (
+    LangchainService,
+    ModelScheduler,
+    ServiceOverloadedError,
+    TokenBucket,
+    TokenUsage,
+    is_throttling_error,
+    is_transient_error,
+    select_last_turns,
+    select_token_budget,
+)
+from app.tests.core.test_metrics import stage_count
+
+
+class TrackingChatModel(BaseChatModel):
+    """Async fake chat model that records how many calls overlap."""
+
+    latency: float = 0.05
+    in_flight: int = 0
+    max_in_flight: int = 0
+    calls: int = 0
+    last_messages: list[BaseMessage] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "tracking-fake"
+
+    def _generate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        raise NotImplementedError("The graph should only call the model async")
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        self.last_messages = messages
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        reply = f"reply to {messages[-1].content}"
+        usage = {
+            "input_tokens": 10,
+            "output_tokens": 5,
+            "total_tokens": 15,
+            "input_token_details": {"cache_read": 8, "cache_creation": 2},
+        }
+        return ChatResult(
+            generations=[
+                ChatGeneration(message=AIMessage(content=reply, usage_metadata=usage))
+            ]
+        )
+
+
+class SyncChatModel(BaseChatModel):
+    """Sync-only fake chat model that records the threads it is called from."""
+
+    threads: list[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "sync-fake"
+
+    def _generate(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> ChatResult:
+        self.threads.append(threading.current_thread().name)
+        reply = AIMessage(content=f"reply to {messages[-1].content}")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    def _stream(
+        self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        self.threads.append(threading.current_thread().name)
+        for token in ["reply to ", messages[-1].content]:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+@pytest.fixture(name="service")
+def service_fixture():
+    """Build a LangchainService with an in-memory checkpointer and fake model."""
+    LangchainService.instance = None
+    service = LangchainService()
+    service._model = TrackingChatModel()
+    service.checkpointer = MemorySaver()
+    service.graph = None
+    service.initialized = True
+    yield service
+    LangchainService.instance = None
+
+
+class TestLangchainService:
+    """Test the LangGraph model node against a fake chat model."""
+
+    @pytest.mark.asyncio
+    async def test_conversation_uses_async_model(self, service: LangchainService):
+        """Test a conversation turn goes through the async model path."""
+        # Arrange
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+
+        # Act
+        response = await service.conversation("thread-1", "Is it a tumor?")
+
+        # Assert
+        assert isinstance(response, AIMessage)
+        assert response.content == "reply to Is it a tumor?"
+
+    @pytest.mark.asyncio
+    async def test_sync_model_runs_in_model_executor(self, service: LangchainService):
+        """Test a sync-only model is called and streamed from the model threads."""
+        # Arrange
+        service._model = SyncChatModel()
+        service.initialize_concurrency_limit(2)
+        service.initialize_graph()
+
+        # Act
+        response = await service.conversation("thread-1", "Is it a tumor?")
+        chunks = [
+            chunk async for chunk in service.stream_conversation("thread-2", "Hi")
+        ]
+        service.shutdown_model_executor()
+
+        # Assert
+        assert response.content == "reply to Is it a tumor?"
+        assert [chunk.text() for chunk in chunks] == ["reply to ", "Hi"]
+        assert all(name.startswith("llm") for name in service._model.threads)
+        assert service.model_executor is None
+
+    @pytest.mark.asyncio
+    async def test_call_model_respects_concurrency_limit(
+        self, service: LangchainService
+    ):
+        """Test concurrent turns never exceed the configured model concurrency."""
+        # Arrange
+        limit = 3
+        service.initialize_concurrency_limit(limit)
+        service.initialize_graph()
+
+        # Act
+        await asyncio.gather(
+            *(service.conversation(f"thread-{i}", f"question {i}") for i in range(10))
+        )
+
+        # Assert
+        assert service._model.max_in_flight == limit
+
+    @pytest.mark.asyncio
+    async def test_conversation_without_checkpointer_uses_history(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test history passed in is sent to the model when no checkpointer runs."""
+        # Arrange
+        monkeypatch.setattr(settings, "CONVERSATION_HISTORY_SOURCE", "messages")
+        service.checkpointer = None
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        history = [HumanMessage(content="first"), AIMessage(content="answer")]
+
+        # Act
+        await service.conversation("thread-1", "second", history=history)
+
+        # Assert
+        sent = service._model.last_messages
+        assert [message.type for message in sent] == ["system", "human", "ai", "human"]
+        assert [message.content for message in sent[1:]] == [
+            "first",
+            "answer",
+            "second",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_conversation_with_checkpointer_ignores_history(
+        self, service: LangchainService
+    ):
+        """Test the checkpoint, not the passed history, provides earlier turns."""
+        # Arrange
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        await service.conversation("thread-1", "first")
+
+        # Act
+        await service.conversation(
+            "thread-1", "second", history=[HumanMessage(content="ignored")]
+        )
+
+        # Assert
+        sent = service._model.last_messages
+        assert [message.content for message in sent[1:]] == [
+            "first",
+            "reply to first",
+            "second",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_last_turns_policy_limits_history(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test only the last turns are sent to the model with the last_turns policy."""
+        # Arrange
+        monkeypatch.setattr(settings, "HISTORY_POLICY", "last_turns")
+        monkeypatch.setattr(settings, "HISTORY_MAX_TURNS", 2)
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        for question in ("first", "second"):
+            await service.conversation("thread-1", question)
+
+        # Act
+        await service.conversation("thread-1", "third")
+
+        # Assert
+        sent = service._model.last_messages
+        assert [message.content for message in sent[1:]] == [
+            "second",
+            "reply to second",
+            "third",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_summary_policy_folds_older_turns_once(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test older turns are summarised once per batch and the summary reused."""
+        # Arrange
+        monkeypatch.setattr(settings, "HISTORY_POLICY", "summary")
+        monkeypatch.setattr(settings, "HISTORY_MAX_TURNS", 2)
+        monkeypatch.setattr(settings, "HISTORY_SUMMARY_BATCH_TURNS", 2)
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        config = {"configurable": {"thread_id": "thread-1"}}
+
+        # Act
+        for i in range(4):
+            await service.conversation("thread-1", f"question {i}")
+        calls_after_summary = service._model.calls
+        await service.conversation("thread-1", "question 4")
+
+        # Assert
+        state = (await service.graph.aget_state(config)).values
+        assert calls_after_summary == 5  # noqa: PLR2004
+        assert service._model.calls == calls_after_summary + 1
+        assert state["summary"].startswith("reply to Existing summary")
+        assert state["messages"][0].content == "question 2"
+        sent = service._model.last_messages
+        assert sent[1].type == "system"
+        assert state["summary"] in sent[1].content
+        assert sent[-1].content == "question 4"
+
+    @pytest.mark.asyncio
+    async def test_bedrock_prompt_caching(self, service: LangchainService, monkeypatch):
+        """Test cache points are added for Bedrock and cache usage is recorded."""
+        # Arrange
+        monkeypatch.setattr(settings, "BEDROCK_PROMPT_CACHING", True)
+        monkeypatch.setattr(settings, "BEDROCK_CACHE_HISTORY", True)
+        service.model_provider = "bedrock_converse"
+        service.token_usage = TokenUsage()
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        await service.conversation("thread-1", "first")
+
+        # Act
+        await service.conversation("thread-1", "second", user_context="Age 30")
+
+        # Assert
+        system, *history = service._model.last_messages
+        assert system.content[1] == BEDROCK_CACHE_POINT
+        assert "Age 30" in system.content[2]["text"]
+        assert history[-2].content[-1] == BEDROCK_CACHE_POINT
+        assert history[-1].content == "second"
+        assert service.token_usage.cache_read_tokens == 16  # noqa: PLR2004
+        assert service.token_usage.cache_write_tokens == 4  # noqa: PLR2004
+        assert service.token_usage.cache_read_ratio == 0.8  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_no_cache_points_for_other_providers(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test the prompt is sent unchanged to providers without cache points."""
+        # Arrange
+        monkeypatch.setattr(settings, "BEDROCK_PROMPT_CACHING", True)
+        service.model_provider = "openai"
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+
+        # Act
+        await service.conversation("thread-1", "first")
+
+        # Assert
+        assert isinstance(service._model.last_messages[0].content, str)
+
+    @pytest.mark.asyncio
+    async def test_response_cache_answers_repeated_first_turns(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test a repeated opening question is answered without calling the model."""
+        # Arrange
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+        service.initialize_concurrency_limit(4)
+        service.initialize_response_cache()
+        service.initialize_graph()
+
+        # Act
+        first = await service.conversation("thread-1", "Is it a tumor?")
+        second = await service.conversation("thread-2", "is it a  TUMOR")
+        chunks = [
+            chunk
+            async for chunk in service.stream_conversation("thread-3", "Is it a tumor")
+        ]
+        state = await service.graph.aget_state(
+            {"configurable": {"thread_id": "thread-2"}}
+        )
+
+        # Assert
+        assert service._model.calls == 1
+        assert first.content == second.content == "reply to Is it a tumor?"
+        assert second.response_metadata["response_cache"] == "hit"
+        assert second.usage_metadata is None
+        assert "".join(chunk.text() for chunk in chunks) == first.content
+        assert [message.type for message in state.values["messages"]] == ["human", "ai"]
+        assert service.response_cache.stats()["hits"] == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_response_cache_skips_other_turns(
+        self, service: LangchainService, monkeypatch
+    ):
+        """Test follow-up turns and turns with user context always call the model."""
+        # Arrange
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+        service.initialize_concurrency_limit(4)
+        service.initialize_response_cache()
+        service.initialize_graph()
+        await service.conversation("thread-1", "Is it a tumor?")
+
+        # Act
+        await service.conversation("thread-1", "Is it a tumor?")
+        await service.conversation("thread-2", "Is it a tumor?", user_context="Age 30")
+
+        # Assert
+        assert service._model.calls == 3  # noqa: PLR2004
+        assert service.response_cache.stats()["hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_duplicate_turns_are_coalesced(self, service: LangchainService):
+        """Test identical concurrent turns of a conversation share one model call."""
+        # Arrange
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+
+        # Act
+        first, second = await asyncio.gather(
+            service.conversation("thread-1", "Is it a tumor?"),
+            service.conversation("thread-1", "Is it a tumor?"),
+        )
+        state = await service.graph.aget_state(
+            {"configurable": {"thread_id": "thread-1"}}
+        )
+
+        # Assert
+        assert service._model.calls == 1
+        assert first is second
+        assert [message.type for message in state.values["messages"]] == ["human", "ai"]
+
+    @pytest.mark.asyncio
+    async def test_turns_of_a_conversation_run_one_at_a_time(
+        self, service: LangchainService
+    ):
+        """Test different concurrent turns of a conversation never interleave."""
+        # Arrange
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+
+        async def stream(user_input):
+            return [
+                chunk
+                async for chunk in service.stream_conversation("thread-1", user_input)
+            ]
+
+        # Act
+        await asyncio.gather(
+            service.conversation("thread-1", "first"),
+            service.conversation("thread-1", "second"),
+            stream("third"),
+            service.conversation("thread-2", "other"),
+        )
+        state = await service.graph.aget_state(
+            {"configurable": {"thread_id": "thread-1"}}
+        )
+
+        # Assert
+        assert service._model.max_in_flight == 2  # noqa: PLR2004
+        assert [message.type for message in state.values["messages"]] == [
+            "human",
+            "ai",
+        ] * 3
+        assert service.thread_locks.stats() == {"held": 0, "contended": 2}
+
+    @pytest.mark.asyncio
+    async def test_streamed_turn_times_model_stages(self, service: LangchainService):
+        """Test a streamed turn records its first token and model call times."""
+        # Arrange
+        service.initialize_concurrency_limit(4)
+        service.initialize_graph()
+        before = {
+            stage: stage_count(stage) for stage in ("llm_first_token", "llm_call")
+        }
+
+        # Act
+        chunks = [
+            chunk async for chunk in service.stream_conversation("thread-1", "Hi")
+        ]
+
+        # Assert
+        assert chunks
+        for stage, count in before.items():
+            assert stage_count(stage) == count + 1
+
+
+def test_select_last_turns():
+    """Test whole turns are kept from the most recent user message backwards."""
+    messages = [
+        HumanMessage(content="a"),
+        AIMessage(content="b"),
+        HumanMessage(content="c"),
+        AIMessage(content="d"),
+        HumanMessage(content="e"),
+    ]
+
+    assert select_last_turns(messages, 2) == messages[2:]
+    assert select_last_turns(messages, 5) == messages
+    assert select_last_turns(messages, 0) == messages
+
+
+def test_select_token_budget():
+    """Test the budget keeps the latest turns and always the current message."""
+    messages = [
+        HumanMessage(content="old " * 200),
+        AIMessage(content="old answer " * 200),
+        HumanMessage(content="recent"),
+        AIMessage(content="recent answer"),
+        HumanMessage(content="now"),
+    ]
+
+    assert select_token_budget(messages, 50) == messages[2:]
+    assert select_token_budget(messages, 1) == messages[-1:]
+
+
+def throttling_error() -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}},
+        "Converse",
+    )
+
+
+def server_error() -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "InternalServerException", "Message": "Internal error"}},
+        "Converse",
+    )
+
+
+class ResponseAttributeError(Exception):
+    def __init__(self, response: Any):
+        super().__init__("HTTP error")
+        self.response = response
+
+
+def test_classify_errors():
+    """Test throttles and transient failures are told apart from other errors."""
+    # Arrange
+    try:
+        try:
+            raise throttling_error()
+        except ClientError as e:
+            raise ValueError("Model call failed") from e
+    except ValueError as e:
+        wrapped_throttle = e
+
+    # Act & Assert
+    assert is_throttling_error(wrapped_throttle)
+    assert not is_transient_error(wrapped_throttle)
+    assert is_transient_error(server_error())
+    assert is_transient_error(ReadTimeoutError(endpoint_url="https://bedrock"))
+    for response in [None, object(), {"Error": "Throttled"}]:
+        assert not is_throttling_error(ResponseAttributeError(response))
+        assert not is_transient_error(ResponseAttributeError(response))
+
+
+class TestModelScheduler:
+    """Test admission control and throttling retries of model calls."""
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        """Test calls queue behind the limit and are rejected once the queue is full."""
+        # Arrange
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=1, max_wait=5)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+            return "done"
+
+        running = asyncio.create_task(scheduler.run(blocked))
+        queued = asyncio.create_task(scheduler.run(blocked))
+        await asyncio.sleep(0.01)
+
+        # Act & Assert
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            await scheduler.run(blocked)
+        assert exc_info.value.retry_after == 5  # noqa: PLR2004
+        assert (scheduler.in_flight, scheduler.waiting) == (1, 1)
+        release.set()
+        assert await asyncio.gather(running, queued) == ["done", "done"]
+        assert scheduler.stats.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_times_out_waiting_for_a_slot(self):
+        """Test a queued call gives up after the maximum wait."""
+        # Arrange
+        scheduler = ModelScheduler(max_concurrency=1, max_queue=4, max_wait=0.05)
+        release = asyncio.Event()
+        running = asyncio.create_task(scheduler.run(release.wait))
+        await asyncio.sleep(0)
+
+        # Act & Assert
+        with pytest.raises(ServiceOverloadedError):
+            await scheduler.run(release.wait)
+        assert scheduler.stats.timed_out == 1
+        assert scheduler.waiting == 0
+        release.set()
+        await running
+
+    @pytest.mark.asyncio
+    async def test_retries_throttled_calls(self):
+        """Test throttled calls are retried until they succeed or run out of retries."""
+        # Arrange
+        scheduler = ModelScheduler(
+            max_concurrency=1, max_queue=1, max_wait=1, max_retries=2, backoff_base=0
+        )
+        attempts = []
+
+        async def throttled_twice():
+            attempts.append(1)
+            if len(attempts) <= 2:  # noqa: PLR2004
+                raise throttling_error()
+            return "done"
+
+        async def always_throttled():
+            raise throttling_error()
+
+        # Act
+        result = await scheduler.run(throttled_twice)
+
+        # Assert
+        assert result == "done"
+        assert scheduler.stats.retries == 2  # noqa: PLR2004
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            await scheduler.run(always_throttled)
+        assert isinstance(exc_info.value.__cause__, ClientError)
+        assert scheduler.stats.throttled == 5  # noqa: PLR2004
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_failures(self):
+        """Test server errors are retried, then raised once out of retries."""
+        # Arrange
+        scheduler = ModelScheduler(
+            max_concurrency=1, max_queue=1, max_wait=1, max_retries=1, backoff_base=0
+        )
+        attempts = []
+
+        async def failing_once():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise server_error()
+            return "done"
+
+        async def always_failing():
+            raise server_error()
+
+        # Act
+        result = await scheduler.run(failing_once)
+
+        # Assert
+        assert result == "done"
+        with pytest.raises(ClientError):
+            await scheduler.run(always_failing)
+        assert scheduler.stats.transient_errors == 3  # noqa: PLR2004
+        assert scheduler.stats.retries == 2  # noqa: PLR2004
+        assert scheduler.stats.throttled == 0
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        """Test errors other than throttling propagate straight away."""
+        # Arrange
+        scheduler = ModelScheduler(
+            max_concurrency=1, max_queue=1, max_wait=1, max_retries=3, backoff_base=0
+        )
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise ValueError("Invalid prompt")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid prompt"):
+            await scheduler.run(failing)
+        assert len(attempts) == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_calls_beyond_the_quota(self):
+        """Test calls wait for the token quota and are rejected past the max wait."""
+        # Arrange
+        scheduler = ModelScheduler(
+            max_concurrency=4, max_queue=4, max_wait=1, tokens_per_minute=600
+        )
+
+        async def call():
+            return "done"
+
+        # Act
+        first = await scheduler.run(call, estimated_tokens=600)
+        second = await scheduler.run(call, estimated_tokens=5)
+
+        # Assert
+        assert (first, second) == ("done", "done")
+        assert 0 < scheduler.stats.rate_limited_seconds <= 1
+        with pytest.raises(ServiceOverloadedError) as exc_info:
+            await scheduler.run(call, estimated_tokens=600)
+        assert exc_info.value.retry_after > 1
+
+    def test_token_bucket_refills(self):
+        """Test the bucket refills at its per-minute rate up to its capacity."""
+        # Arrange
+        now = [0.0]
+        bucket = TokenBucket(per_minute=60, clock=lambda: now[0])
+
+        # Act
+        immediate = bucket.reserve(60)
+        delayed = bucket.reserve(30)
+        now[0] = 120
+        refilled = bucket.reserve(60)
+
+        # Assert
+        assert immediate == 0
+        assert delayed == 30  # noqa: PLR2004
+        assert refilled == 0
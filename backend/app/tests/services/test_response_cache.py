@@ -0,0 +1,104 @@
+from langchain_core.messages import AIMessage
+
+from app.services.response_cache import ResponseCache, normalize_question
+
+MODEL_ID = "test-model"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def answer(content: str = "It is most likely a tension headache.", **metadata):
+    return AIMessage(
+        content=content,
+        response_metadata={"stopReason": "end_turn", "metrics": {"latencyMs": [900]}}
+        | metadata,
+        usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+    )
+
+
+def test_normalize_question():
+    """Test case, punctuation and spacing do not change the normalized question."""
+    assert normalize_question("  I have a HEADACHE,  is it a tumor?? ") == (
+        "i have a headache is it a tumor"
+    )
+    assert normalize_question("Isn't it?") == "isn't it"
+
+
+def test_exact_match():
+    """Test only the same question for the same model is a hit."""
+    # Arrange
+    cache = ResponseCache(maxsize=10, ttl=60)
+    cache.put("I have a headache, is it a tumor?", MODEL_ID, answer())
+
+    # Act
+    hit = cache.get("i have a headache is it a tumor", MODEL_ID)
+    other_model = cache.get("I have a headache, is it a tumor?", "other-model")
+    similar = cache.get("I have a bad headache, is it a tumor?", MODEL_ID)
+
+    # Assert
+    assert hit.content == "It is most likely a tension headache."
+    assert hit.response_metadata == {"stopReason": "end_turn", "response_cache": "hit"}
+    assert hit.usage_metadata is None
+    assert other_model is None
+    assert similar is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2  # noqa: PLR2004
+
+
+def test_similar_match():
+    """Test a similar question reuses the answer once similarity reaches the threshold."""
+    # Arrange
+    cache = ResponseCache(maxsize=10, ttl=60, similarity_threshold=0.8)
+    cache.put("I have a headache, is it a tumor?", MODEL_ID, answer())
+    cache.put("My chest hurts, is it my heart?", MODEL_ID, answer("Probably not."))
+
+    # Act
+    similar = cache.get("I have a bad headache, is it a tumor?", MODEL_ID)
+    unrelated = cache.get("Is my mole cancer?", MODEL_ID)
+
+    # Assert
+    assert similar.content == "It is most likely a tension headache."
+    assert unrelated is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["similar_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_entries_expire_and_are_bounded():
+    """Test answers expire after the time to live and the oldest are evicted."""
+    # Arrange
+    clock = FakeClock()
+    cache = ResponseCache(maxsize=2, ttl=60, clock=clock)
+    for question in ("first question", "second question", "third question"):
+        cache.put(question, MODEL_ID, answer(question))
+
+    # Act
+    evicted = cache.get("first question", MODEL_ID)
+    kept = cache.get("third question", MODEL_ID)
+    clock.now = 61
+    expired = cache.get("third question", MODEL_ID)
+
+    # Assert
+    assert evicted is None
+    assert kept.content == "third question"
+    assert expired is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_skips_incomplete_answers():
+    """Test truncated and empty answers are not cached."""
+    # Arrange
+    cache = ResponseCache(maxsize=10, ttl=60)
+
+    # Act
+    cache.put("truncated", MODEL_ID, answer(stopReason="max_tokens"))
+    cache.put("empty", MODEL_ID, answer(""))
+    cache.put("?!", MODEL_ID, answer())
+
+    # Assert
+    assert len(cache) == 0
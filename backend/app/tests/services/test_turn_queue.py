@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.llm import ServiceOverloadedError
+from app.services.turn_queue import TurnQueue
+
+
+class TestTurnQueue:
+    """Test running queued chat turns in worker tasks."""
+
+    @pytest.mark.asyncio
+    async def test_runs_queued_turns_and_wakes_waiters(self):
+        """Test queued turns run in the workers and wake clients waiting on them."""
+        # Arrange
+        processed = []
+
+        async def process(turn_id):
+            await asyncio.sleep(0.01)
+            processed.append(turn_id)
+            return turn_id
+
+        queue = TurnQueue(process, workers=2, max_size=10, poll_interval=5)
+        turn_ids = [uuid.uuid4() for _ in range(3)]
+
+        # Act
+        for turn_id in turn_ids:
+            queue.enqueue(turn_id)
+        await asyncio.wait_for(queue.wait(turn_ids[-1], 5), 1)
+        await asyncio.sleep(0.02)
+        await queue.stop()
+
+        # Assert
+        assert sorted(processed) == sorted(turn_ids)
+        assert queue.stats()["processed"] == 3  # noqa: PLR2004
+        assert queue.waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_full(self):
+        """Test new turns are rejected up front once the queue is full."""
+        # Arrange
+        release = asyncio.Event()
+
+        async def process(turn_id):
+            await release.wait()
+            return turn_id
+
+        queue = TurnQueue(process, workers=1, max_size=1, poll_interval=2)
+        queue.enqueue(uuid.uuid4())
+        await asyncio.sleep(0)
+        queue.enqueue(uuid.uuid4())
+
+        # Act & Assert
+        with pytest.raises(ServiceOverloadedError):
+            queue.check_capacity()
+        release.set()
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_shared_queue_claims_until_empty(self):
+        """Test shared workers claim turns until none is left, then wait to be woken."""
+        # Arrange
+        pending = [uuid.uuid4(), uuid.uuid4()]
+        claims = []
+
+        async def process(turn_id):
+            claims.append(turn_id)
+            return pending.pop(0) if pending else None
+
+        queue = TurnQueue(process, workers=1, max_size=0, poll_interval=5, shared=True)
+
+        # Act
+        queue.start()
+        await asyncio.sleep(0.01)
+        pending.append(uuid.uuid4())
+        queue.enqueue(pending[0])
+        await asyncio.sleep(0.01)
+        await queue.stop()
+
+        # Assert
+        assert claims == [None] * 5
+        assert queue.stats()["processed"] == 3  # noqa: PLR2004
@@ -1,7 +1,7 @@
 // This file is auto-generated by @hey-api/openapi-ts
 
 import type { Options as ClientOptions, TDataShape, Client } from '@hey-api/client-axios';
-import type { StartConversationV1NewPostData, StartConversationV1NewPostResponse, StartConversationV1NewPostError, GetConversationsV1ConversationsGetData, GetConversationsV1ConversationsGetResponse, GetConversationsV1ConversationsGetError, ContinueConversationV1ConversationsPostData, ContinueConversationV1ConversationsPostResponse, ContinueConversationV1ConversationsPostError, GetUserByNameV1NameGetData, GetUserByNameV1NameGetResponse, GetUserByNameV1NameGetError } from './types.gen';
+import type { StartConversationV1NewPostData, StartConversationV1NewPostResponse, StartConversationV1NewPostError, GetConversationsV1ConversationsGetData, GetConversationsV1ConversationsGetResponse, GetConversationsV1ConversationsGetError, ContinueConversationV1ConversationsPostData, ContinueConversationV1ConversationsPostResponse, ContinueConversationV1ConversationsPostError, GetMessagesV1MessagesGetData, GetMessagesV1MessagesGetResponse, GetMessagesV1MessagesGetError, GetUserByNameV1NameGetData, GetUserByNameV1NameGetResponse, GetUserByNameV1NameGetError } from './types.gen';
 import { client as _heyApiClient } from './client.gen';
 
 export type Options<TData extends TDataShape = TDataShape, ThrowOnError extends boolean = boolean> = ClientOptions<TData, ThrowOnError> & {
@@ -44,14 +44,20 @@ export const startConversationV1NewPost = <ThrowOnError extends boolean = false>
 
 /**
  * Get Conversations
- * Get all conversations for a user by user ID.
+ * Get a page of a user's conversations, newest first, without their messages.
+ *
+ * When more conversations exist, the cursor for the next page is returned in
+ * the X-Next-Cursor header.
  *
  * Args:
+ * response (Response): The response, to set the next page cursor on.
  * user_id (UUID): The ID of the user.
- * db (Session): The SQLModel session.
+ * limit (int): The maximum number of conversations to return.
+ * cursor (Optional[str]): The cursor of the page to return.
+ * db (AsyncSession): The async SQLModel session.
  *
  * Returns:
- * List[ConversationPublic]: A list of conversations for the user.
+ * List[ConversationSummary]: A page of conversations for the user.
  */
 export const getConversationsV1ConversationsGet = <ThrowOnError extends boolean = false>(options: Options<GetConversationsV1ConversationsGetData, ThrowOnError>) => {
     return (options.client ?? _heyApiClient).get<GetConversationsV1ConversationsGetResponse, GetConversationsV1ConversationsGetError, ThrowOnError>({
@@ -84,6 +90,30 @@ export const continueConversationV1ConversationsPost = <ThrowOnError extends boo
     });
 };
 
+/**
+ * Get Messages
+ * Get a page of a conversation's messages, newest first.
+ *
+ * When older messages exist, the cursor for the next page is returned in the
+ * X-Next-Cursor header.
+ *
+ * Args:
+ * response (Response): The response, to set the next page cursor on.
+ * conversation_id (UUID): The ID of the conversation.
+ * limit (int): The maximum number of messages to return.
+ * cursor (Optional[str]): The cursor of the page to return.
+ * db (AsyncSession): The async SQLModel session.
+ *
+ * Returns:
+ * List[MessagePublic]: A page of messages of the conversation.
+ */
+export const getMessagesV1MessagesGet = <ThrowOnError extends boolean = false>(options: Options<GetMessagesV1MessagesGetData, ThrowOnError>) => {
+    return (options.client ?? _heyApiClient).get<GetMessagesV1MessagesGetResponse, GetMessagesV1MessagesGetError, ThrowOnError>({
+        url: '/v1/messages',
+        ...options
+    });
+};
+
 /**
  * Get User By Name
  * Get a user by their username.
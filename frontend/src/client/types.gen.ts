@@ -8,6 +8,16 @@ export type ConversationPublic = {
     messages?: Array<MessagePublic>;
 };
 
+/**
+ * A conversation without its messages, for listing a user's conversations.
+ */
+export type ConversationSummary = {
+    title?: string | null;
+    id: string;
+    created_at: string;
+    user_id: string;
+};
+
 export type HttpValidationError = {
     detail?: Array<ValidationError>;
 };
@@ -73,6 +83,8 @@ export type GetConversationsV1ConversationsGetData = {
     path?: never;
     query: {
         user_id: string;
+        limit?: number;
+        cursor?: string | null;
     };
     url: '/v1/conversations';
 };
@@ -90,7 +102,7 @@ export type GetConversationsV1ConversationsGetResponses = {
     /**
      * Successful Response
      */
-    200: Array<ConversationPublic>;
+    200: Array<ConversationSummary>;
 };
 
 export type GetConversationsV1ConversationsGetResponse = GetConversationsV1ConversationsGetResponses[keyof GetConversationsV1ConversationsGetResponses];
@@ -100,6 +112,7 @@ export type ContinueConversationV1ConversationsPostData = {
     path?: never;
     query: {
         conversation_id: string;
+        user_id: string;
     };
     url: '/v1/conversations';
 };
@@ -122,6 +135,36 @@ export type ContinueConversationV1ConversationsPostResponses = {
 
 export type ContinueConversationV1ConversationsPostResponse = ContinueConversationV1ConversationsPostResponses[keyof ContinueConversationV1ConversationsPostResponses];
 
+export type GetMessagesV1MessagesGetData = {
+    body?: never;
+    path?: never;
+    query: {
+        conversation_id: string;
+        user_id: string;
+        limit?: number;
+        cursor?: string | null;
+    };
+    url: '/v1/messages';
+};
+
+export type GetMessagesV1MessagesGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetMessagesV1MessagesGetError = GetMessagesV1MessagesGetErrors[keyof GetMessagesV1MessagesGetErrors];
+
+export type GetMessagesV1MessagesGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: Array<MessagePublic>;
+};
+
+export type GetMessagesV1MessagesGetResponse = GetMessagesV1MessagesGetResponses[keyof GetMessagesV1MessagesGetResponses];
+
 export type GetUserByNameV1NameGetData = {
     body?: never;
     path?: never;
@@ -1,7 +1,9 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { ConversationPublic, MessagePublic } from '../client/types.gen';
-import { continueConversationV1ConversationsPost } from '../client/sdk.gen';
+import { continueConversationV1ConversationsPost, getMessagesV1MessagesGet } from '../client/sdk.gen';
+
+const MESSAGE_PAGE_SIZE = 50;
 
 interface ConversationProps {
   initialConversation?: ConversationPublic;
@@ -14,16 +16,41 @@ const Conversation: React.FC<ConversationProps> = ({ initialConversation }) => {
 
   const [messages, setMessages] = useState<MessagePublic[]>([]);
   const [conversationId, setConversationId] = useState<string | null>(null);
+  const [userId, setUserId] = useState<string | null>(null);
   const [newMessage, setNewMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isTyping, setIsTyping] = useState(false);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+
+  // Fetch a page of messages, newest first, and prepend it in chronological order
+  const loadMessages = async (id: string, ownerId: string, cursor?: string) => {
+    try {
+      const result = await getMessagesV1MessagesGet({
+        query: { conversation_id: id, user_id: ownerId, limit: MESSAGE_PAGE_SIZE, cursor }
+      });
+
+      if (result.data) {
+        const page = [...result.data].reverse();
+        setMessages(prev => (cursor ? [...page, ...prev] : page));
+        setOlderCursor(result.headers?.['x-next-cursor'] ?? null);
+      }
+    } catch (error) {
+      console.error('Error loading messages:', error);
+    }
+  };
 
   // Initialize conversation from location state or prop
   useEffect(() => {
     const conversation = location.state?.conversation || initialConversation;
-    if (conversation?.messages) {
+    if (!conversation) return;
+
+    setConversationId(conversation.id);
+    setUserId(conversation.user_id);
+    if (conversation.messages?.length) {
       setMessages(conversation.messages);
-      setConversationId(conversation.id);
+    } else {
+      // Conversations listed in the history come without their messages
+      loadMessages(conversation.id, conversation.user_id);
     }
   }, [location.state, initialConversation]);
 
@@ -41,7 +68,7 @@ const Conversation: React.FC<ConversationProps> = ({ initialConversation }) => {
 
   const handleSendMessage = async (e: React.FormEvent) => {
     e.preventDefault();
-    if (!newMessage.trim() || !conversationId) return;
+    if (!newMessage.trim() || !conversationId || !userId) return;
 
     const userMessage: MessagePublic = {
       id: Date.now().toString(),
@@ -57,7 +84,7 @@ const Conversation: React.FC<ConversationProps> = ({ initialConversation }) => {
 
     try {
       const result = await continueConversationV1ConversationsPost({
-        query: { conversation_id: conversationId },
+        query: { conversation_id: conversationId, user_id: userId },
         body: {
           content: newMessage,
           role: 'user'
@@ -65,8 +92,9 @@ const Conversation: React.FC<ConversationProps> = ({ initialConversation }) => {
       });
 
       if (result.data?.messages) {
-        // Update messages with the full conversation response
-        setMessages(result.data.messages);
+        // The response only carries the new turn, replace the optimistic message with it
+        const turn = result.data.messages;
+        setMessages(prev => [...prev.slice(0, -1), ...turn]);
       }
     } catch (error) {
       console.error('Error sending message:', error);
@@ -123,6 +151,17 @@ const Conversation: React.FC<ConversationProps> = ({ initialConversation }) => {
 
       {/* Messages Container */}
       <div className="flex-1 overflow-y-auto p-4 space-y-4 max-w-4xl mx-auto w-full">
+        {olderCursor && conversationId && userId && (
+          <div className="flex justify-center">
+            <button
+              onClick={() => loadMessages(conversationId, userId, olderCursor)}
+              className="text-sm text-purple-600 hover:text-purple-800 transition-colors"
+            >
+              Load earlier messages
+            </button>
+          </div>
+        )}
+
         {messages.map((message) => (
           <div
             key={message.id}
@@ -1,7 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { getConversationsV1ConversationsGet } from '../client/sdk.gen';
-import { ConversationPublic } from '../client/types.gen';
+import { ConversationSummary } from '../client/types.gen';
+
+const CONVERSATION_PAGE_SIZE = 20;
 
 interface ConversationHistoryProps {
   isCollapsed: boolean;
@@ -11,9 +13,11 @@ interface ConversationHistoryProps {
 
 const ConversationHistory: React.FC<ConversationHistoryProps> = ({ isCollapsed, onToggle, userId }) => {
   const navigate = useNavigate();
-  const [conversations, setConversations] = useState<ConversationPublic[]>([]);
+  const [conversations, setConversations] = useState<ConversationSummary[]>([]);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   useEffect(() => {
     if (userId) {
@@ -21,47 +25,38 @@ const ConversationHistory: React.FC<ConversationHistoryProps> = ({ isCollapsed,
     }
   }, [userId]);
 
-  const fetchConversations = async () => {
-    setLoading(true);
+  // Fetch a page of conversations, newest first, and append it to the list
+  const fetchConversations = async (cursor?: string) => {
+    const setBusy = cursor ? setLoadingMore : setLoading;
+    setBusy(true);
     setError(null);
 
     try {
       const result = await getConversationsV1ConversationsGet({
-        query: { user_id: userId }
+        query: { user_id: userId, limit: CONVERSATION_PAGE_SIZE, cursor }
       });
 
       if (result.data) {
-        setConversations(result.data);
+        const page = result.data;
+        setConversations(prev => (cursor ? [...prev, ...page] : page));
+        setNextCursor(result.headers?.['x-next-cursor'] ?? null);
       }
     } catch (err) {
       console.error('Error fetching conversations:', err);
       setError('Failed to load conversation history');
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
 
-  const handleConversationClick = (conversation: ConversationPublic) => {
+  const handleConversationClick = (conversation: ConversationSummary) => {
     navigate('/conversation', {
       state: { conversation }
     });
   };
 
-  const getConversationDisplayText = (conversation: ConversationPublic) => {
-    if (conversation.title) {
-      return conversation.title;
-    }
-
-    if (conversation.messages && conversation.messages.length > 0) {
-      const firstUserMessage = conversation.messages.find(m => m.role === 'user');
-      if (firstUserMessage) {
-        return firstUserMessage.content.length > 40
-          ? firstUserMessage.content.substring(0, 40) + '...'
-          : firstUserMessage.content;
-      }
-    }
-
-    return 'New Conversation';
+  const getConversationDisplayText = (conversation: ConversationSummary) => {
+    return conversation.title || 'New Conversation';
   };
 
   const formatDate = (dateString: string) => {
@@ -117,7 +112,7 @@ const ConversationHistory: React.FC<ConversationHistoryProps> = ({ isCollapsed,
             <div className="bg-red-50 border border-red-200 rounded-lg p-3 mb-4">
               <p className="text-red-800 text-sm">{error}</p>
               <button
-                onClick={fetchConversations}
+                onClick={() => fetchConversations()}
                 className="mt-2 text-red-600 hover:text-red-800 text-sm underline"
               >
                 Try again
@@ -156,6 +151,16 @@ const ConversationHistory: React.FC<ConversationHistoryProps> = ({ isCollapsed,
                   </div>
                 </button>
               ))}
+
+              {nextCursor && (
+                <button
+                  onClick={() => fetchConversations(nextCursor)}
+                  disabled={loadingMore}
+                  className="w-full py-2 text-sm text-pink-600 hover:text-pink-800 disabled:text-gray-400"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -151,6 +151,28 @@ resource "aws_secretsmanager_secret_version" "superuser_email" {
   secret_string = "admin@hypochondriai.com"
 }
 
+# Key signing the access tokens, shared by all tasks
+resource "random_password" "secret_key" {
+  length  = 64
+  special = false
+}
+
+resource "aws_secretsmanager_secret" "secret_key" {
+  name        = "${var.project_name}/${var.environment}/app/secret-key"
+  description = "Application access token signing key"
+  force_overwrite_replica_secret = true
+
+  tags = {
+    Name        = "${var.project_name}-secret-key-secret"
+    Environment = var.environment
+  }
+}
+
+resource "aws_secretsmanager_secret_version" "secret_key" {
+  secret_id     = aws_secretsmanager_secret.secret_key.id
+  secret_string = random_password.secret_key.result
+}
+
 
 # ECS Module
 module "ecs" {
@@ -173,6 +195,7 @@ module "ecs" {
   superuser_username_secret_arn = aws_secretsmanager_secret.superuser_username.arn
   superuser_password_secret_arn = aws_secretsmanager_secret.superuser_password.arn
   superuser_email_secret_arn    = aws_secretsmanager_secret.superuser_email.arn
+  secret_key_secret_arn         = aws_secretsmanager_secret.secret_key.arn
 
   # Optional ECS configuration
   desired_count         = var.ecs_desired_count
@@ -95,7 +95,8 @@ resource "aws_iam_role_policy" "ecs_execution_role_custom" {
           var.database_url_secret_arn,
           var.superuser_username_secret_arn,
           var.superuser_password_secret_arn,
-          var.superuser_email_secret_arn
+          var.superuser_email_secret_arn,
+          var.secret_key_secret_arn
         ]
       },
       {
@@ -149,7 +150,8 @@ resource "aws_iam_role_policy" "ecs_task_role_policy" {
           var.database_url_secret_arn,
           var.superuser_username_secret_arn,
           var.superuser_password_secret_arn,
-          var.superuser_email_secret_arn
+          var.superuser_email_secret_arn,
+          var.secret_key_secret_arn
         ]
       },
       {
@@ -176,6 +176,10 @@ resource "aws_ecs_task_definition" "backend" {
         {
           name      = "DB_SUPERUSER_EMAIL"
           valueFrom = var.superuser_email_secret_arn
+        },
+        {
+          name      = "SECRET_KEY"
+          valueFrom = var.secret_key_secret_arn
         }
       ]
 
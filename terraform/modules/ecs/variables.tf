@@ -58,6 +58,11 @@ variable "superuser_email_secret_arn" {
   type        = string
 }
 
+variable "secret_key_secret_arn" {
+  description = "ARN of the secret containing the access token signing key"
+  type        = string
+}
+
 variable "ecr_repository_url" {
   description = "URL of the ECR repository for container images"
   type        = string